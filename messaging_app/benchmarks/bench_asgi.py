@@ -0,0 +1,341 @@
+#!/usr/bin/env python3
+"""
+Latency of the hot endpoints under ASGI (async views) vs WSGI (DRF views).
+
+Seeds a temporary SQLite database, then drives the conversation list, the
+message list and send-message in-process with N concurrent client loops
+(500 by default) and reports p50 / p99 latency and throughput per server.
+
+- WSGI: the WSGI application served by a pool of --threads worker threads,
+  like a threaded gunicorn worker; latency includes the time a request
+  waits for a free thread.
+- ASGI: messaging_app.asgi.application (CHATS_ASYNC_VIEWS on) driven on
+  one event loop, like a uvicorn worker.
+
+Each server runs in its own process so its URLconf and caches are fresh.
+
+Usage (from the messaging_app directory):
+    python benchmarks/bench_asgi.py [--connections 500] [--requests 5000]
+"""
+import argparse
+import asyncio
+import io
+import json
+import os
+import random
+import statistics
+import subprocess
+import sys
+import tempfile
+import time
+from concurrent.futures import ThreadPoolExecutor
+from pathlib import Path
+
+sys.path.insert(0, str(Path(__file__).resolve().parent.parent))
+os.environ.setdefault("DJANGO_SETTINGS_MODULE", "messaging_app.settings")
+
+import django  # noqa: E402
+from django.conf import settings  # noqa: E402
+
+SERVERS = ("wsgi", "asgi")
+
+# Share of each endpoint in the request mix.
+MIX = (
+    ("conversations", 0.45),
+    ("messages", 0.45),
+    ("send-message", 0.10),
+)
+
+
+def setup_django(database: str) -> None:
+    settings.DATABASES["default"]["NAME"] = database
+    settings.DATABASES["default"]["OPTIONS"] = {"timeout": 30}
+    settings.DEBUG = False
+    django.setup()
+
+
+# ---------- Seeding ----------
+
+def seed(users: int, conversations: int, messages: int) -> None:
+    from django.contrib.auth.hashers import make_password
+    from django.core.management import call_command
+
+    from chats.activity import refresh_activity
+    from chats.inbox import refresh_inbox
+    from chats.models import Conversation, Message, User
+
+    call_command("migrate", verbosity=0)
+
+    password = make_password("password123")
+    people = User.objects.bulk_create(
+        User(username=f"user{i}", email=f"user{i}@example.com", password=password)
+        for i in range(users)
+    )
+    rooms = Conversation.objects.bulk_create(
+        Conversation() for _ in range(conversations)
+    )
+    rng = random.Random(0)
+    Membership = Conversation.participants.through
+    pairs = [(room, rng.sample(people, 2)) for room in rooms]
+    Membership.objects.bulk_create(
+        Membership(conversation_id=room.pk, user_id=user.pk)
+        for room, members in pairs
+        for user in members
+    )
+    Message.objects.bulk_create(
+        (
+            Message(
+                conversation_id=room.pk,
+                sender_id=members[i % 2].pk,
+                message_body=f"Message {i} of this benchmark conversation.",
+            )
+            for room, members in pairs
+            for i in range(messages)
+        ),
+        batch_size=1000,
+    )
+    refresh_activity()
+    refresh_inbox()
+
+
+def build_requests(count: int):
+    """
+    (endpoint, method, path, body, authorization) tuples.
+    """
+    from rest_framework_simplejwt.tokens import AccessToken
+
+    from chats.models import Conversation, User
+
+    Membership = Conversation.participants.through
+    memberships = {}
+    for user_id, conversation_id in Membership.objects.values_list(
+        "user_id", "conversation_id"
+    ):
+        memberships.setdefault(user_id, []).append(conversation_id)
+    tokens = {
+        user.pk: f"Bearer {AccessToken.for_user(user)}".encode()
+        for user in User.objects.filter(pk__in=memberships)
+    }
+
+    rng = random.Random(1)
+    endpoints, weights = zip(*MIX)
+    user_ids = sorted(memberships)
+    requests = []
+    for endpoint in rng.choices(endpoints, weights, k=count):
+        user_id = rng.choice(user_ids)
+        conversation_id = rng.choice(memberships[user_id])
+        if endpoint == "conversations":
+            request = ("GET", "/api/conversations/", b"")
+        elif endpoint == "messages":
+            request = ("GET", f"/api/conversations/{conversation_id}/messages/", b"")
+        else:
+            request = (
+                "POST",
+                f"/api/conversations/{conversation_id}/send-message/",
+                b'{"message_body": "benchmark"}',
+            )
+        requests.append((endpoint, *request, tokens[user_id]))
+    return requests
+
+
+# ---------- Drivers ----------
+
+def wsgi_caller(threads: int):
+    from django.core.wsgi import get_wsgi_application
+
+    application = get_wsgi_application()
+    pool = ThreadPoolExecutor(max_workers=threads)
+
+    def call(method, path, body, authorization) -> int:
+        environ = {
+            "REQUEST_METHOD": method,
+            "PATH_INFO": path,
+            "QUERY_STRING": "",
+            "SERVER_NAME": "localhost",
+            "SERVER_PORT": "80",
+            "SERVER_PROTOCOL": "HTTP/1.1",
+            "HTTP_HOST": "localhost",
+            "HTTP_AUTHORIZATION": authorization.decode(),
+            "CONTENT_TYPE": "application/json",
+            "CONTENT_LENGTH": str(len(body)),
+            "wsgi.input": io.BytesIO(body),
+            "wsgi.errors": sys.stderr,
+            "wsgi.url_scheme": "http",
+            "wsgi.version": (1, 0),
+            "wsgi.multithread": True,
+            "wsgi.multiprocess": False,
+            "wsgi.run_once": False,
+        }
+        status = []
+        response = application(environ, lambda s, headers, exc_info=None: status.append(s))
+        try:
+            b"".join(response)
+        finally:
+            response.close()
+        return int(status[0].split()[0])
+
+    async def caller(method, path, body, authorization) -> int:
+        loop = asyncio.get_running_loop()
+        return await loop.run_in_executor(pool, call, method, path, body, authorization)
+
+    return caller
+
+
+def asgi_caller():
+    from messaging_app.asgi import application
+
+    async def caller(method, path, body, authorization) -> int:
+        scope = {
+            "type": "http",
+            "asgi": {"version": "3.0"},
+            "http_version": "1.1",
+            "method": method,
+            "scheme": "http",
+            "path": path,
+            "raw_path": path.encode(),
+            "root_path": "",
+            "query_string": b"",
+            "headers": [
+                (b"host", b"localhost"),
+                (b"authorization", authorization),
+                (b"content-type", b"application/json"),
+                (b"content-length", str(len(body)).encode()),
+            ],
+            "client": ("127.0.0.1", 50000),
+            "server": ("localhost", 80),
+        }
+        received = False
+        finished = asyncio.Event()
+        status = []
+
+        async def receive():
+            nonlocal received
+            if not received:
+                received = True
+                return {"type": "http.request", "body": body, "more_body": False}
+            await finished.wait()
+            return {"type": "http.disconnect"}
+
+        async def send(message):
+            if message["type"] == "http.response.start":
+                status.append(message["status"])
+            elif not message.get("more_body"):
+                finished.set()
+
+        await application(scope, receive, send)
+        finished.set()
+        return status[0]
+
+    return caller
+
+
+async def drive(caller, requests, connections: int):
+    """
+    Run the requests over `connections` concurrent client loops.
+    """
+    queue = iter(requests)
+    samples = []
+
+    async def client():
+        for endpoint, method, path, body, authorization in queue:
+            start = time.perf_counter()
+            status = await caller(method, path, body, authorization)
+            samples.append((endpoint, time.perf_counter() - start, status))
+
+    start = time.perf_counter()
+    await asyncio.gather(*(client() for _ in range(connections)))
+    return samples, time.perf_counter() - start
+
+
+def percentile(values, fraction: float) -> float:
+    values = sorted(values)
+    return values[min(len(values) - 1, int(len(values) * fraction))]
+
+
+def summarize(samples, elapsed: float) -> dict:
+    def stats(latencies):
+        return {
+            "p50_ms": percentile(latencies, 0.50) * 1000,
+            "p99_ms": percentile(latencies, 0.99) * 1000,
+            "mean_ms": statistics.fmean(latencies) * 1000,
+        }
+
+    return {
+        "requests": len(samples),
+        "errors": sum(1 for _, _, status in samples if status >= 400),
+        "requests_per_sec": len(samples) / elapsed,
+        **stats([latency for _, latency, _ in samples]),
+        "endpoints": {
+            endpoint: stats(
+                [latency for name, latency, _ in samples if name == endpoint]
+            )
+            for endpoint, _ in MIX
+        },
+    }
+
+
+def run(server: str, args) -> dict:
+    setup_django(args.database)
+    requests = build_requests(args.requests)
+    caller = asgi_caller() if server == "asgi" else wsgi_caller(args.threads)
+    # Warm up caches and connections before measuring.
+    asyncio.run(drive(caller, requests[: args.connections], args.connections))
+    return summarize(*asyncio.run(drive(caller, requests, args.connections)))
+
+
+# ---------- Main ----------
+
+def main() -> None:
+    parser = argparse.ArgumentParser(description=__doc__.splitlines()[1])
+    parser.add_argument("--connections", type=int, default=500)
+    parser.add_argument("--requests", type=int, default=5000)
+    parser.add_argument("--threads", type=int, default=32, help="WSGI worker threads")
+    parser.add_argument("--users", type=int, default=100)
+    parser.add_argument("--conversations", type=int, default=300)
+    parser.add_argument("--messages", type=int, default=50)
+    parser.add_argument("--server", choices=SERVERS, help=argparse.SUPPRESS)
+    parser.add_argument("--database", help=argparse.SUPPRESS)
+    args = parser.parse_args()
+
+    if args.server:
+        print(json.dumps(run(args.server, args)))
+        return
+
+    with tempfile.TemporaryDirectory() as directory:
+        database = os.path.join(directory, "bench.sqlite3")
+        setup_django(database)
+        seed(args.users, args.conversations, args.messages)
+
+        results = {}
+        for server in SERVERS:
+            env = {
+                **os.environ,
+                "CHATS_ASYNC_VIEWS": "1" if server == "asgi" else "0",
+                "CHATS_CACHE_LOCATION": os.path.join(directory, f"{server}-cache.sqlite3"),
+            }
+            output = subprocess.run(
+                [sys.executable, __file__, *sys.argv[1:], "--server", server,
+                 "--database", database],
+                env=env,
+                check=True,
+                capture_output=True,
+                text=True,
+            ).stdout
+            results[server] = json.loads(output.splitlines()[-1])
+
+    print(
+        f"{args.connections} connections, {args.requests} requests, "
+        f"WSGI with {args.threads} threads"
+    )
+    print(f"{'':>14} {'p50 ms':>9} {'p99 ms':>9} {'req/s':>9} {'errors':>7}")
+    for server, result in results.items():
+        print(
+            f"{server.upper():>14} {result['p50_ms']:>9.1f} {result['p99_ms']:>9.1f} "
+            f"{result['requests_per_sec']:>9.0f} {result['errors']:>7}"
+        )
+        for endpoint, stats in result["endpoints"].items():
+            print(f"{endpoint:>14} {stats['p50_ms']:>9.1f} {stats['p99_ms']:>9.1f}")
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,93 @@
+#!/usr/bin/env python3
+"""
+Encode/decode throughput and payload size of JSON vs MessagePack pages.
+
+Renders in-memory message pages (no database access) the way the API
+does: the fast read serializer (or the compact ?include=users format)
+followed by the renderer. JSON pages are built with text ids and
+timestamps; MessagePack pages with native values (see chats.binary).
+Decoding is timed with json.loads and chats.binary.unpackb.
+
+Usage (from the messaging_app directory):
+    python benchmarks/bench_binary.py [--repeat 20]
+"""
+import argparse
+import json
+import time
+
+from bench_serializers import PAGE_SIZES, build_messages
+
+from rest_framework.renderers import JSONRenderer
+
+from chats.binary import (
+    BACKEND,
+    MessagePackRenderer,
+    begin_native_values,
+    end_native_values,
+    unpackb,
+)
+from chats.serializers import CompactMessageListSerializer, MessageReadSerializer
+
+# name -> (renderer, decoder, native values)
+FORMATS = {
+    "json": (JSONRenderer(), json.loads, False),
+    "msgpack": (MessagePackRenderer(), unpackb, True),
+}
+
+
+def full(messages):
+    return {"results": MessageReadSerializer(messages, many=True).data}
+
+
+def compact(messages):
+    serializer = CompactMessageListSerializer(messages)
+    return {"results": serializer.data, "included": serializer.included}
+
+
+SHAPES = {"full": full, "compact": compact}
+
+
+def encode(shape, renderer, native: bool, messages) -> bytes:
+    token = begin_native_values(native)
+    try:
+        return renderer.render(shape(messages))
+    finally:
+        end_native_values(token)
+
+
+def rows_per_second(function, rows: int, repeat: int) -> float:
+    start = time.perf_counter()
+    for _ in range(repeat):
+        function()
+    return rows * repeat / (time.perf_counter() - start)
+
+
+def main() -> None:
+    parser = argparse.ArgumentParser(description=__doc__.splitlines()[1])
+    parser.add_argument("--repeat", type=int, default=20)
+    args = parser.parse_args()
+
+    print(f"MessagePack codec: {BACKEND}")
+    print(
+        f"{'page size':>10} {'shape':>8} {'format':>8} {'encode':>14} "
+        f"{'decode':>14} {'bytes':>10}"
+    )
+    for page_size in PAGE_SIZES:
+        messages = build_messages(page_size)
+        repeat = max(1, args.repeat * 100 // page_size)
+        for shape_name, shape in SHAPES.items():
+            for format_name, (renderer, decode, native) in FORMATS.items():
+                payload = encode(shape, renderer, native, messages)
+                assert len(decode(payload)["results"]) == page_size
+                encoded = rows_per_second(
+                    lambda: encode(shape, renderer, native, messages), page_size, repeat
+                )
+                decoded = rows_per_second(lambda: decode(payload), page_size, repeat)
+                print(
+                    f"{page_size:>10} {shape_name:>8} {format_name:>8} "
+                    f"{encoded:>10,.0f} r/s {decoded:>10,.0f} r/s {len(payload):>10,}"
+                )
+
+
+if __name__ == "__main__":
+    main()
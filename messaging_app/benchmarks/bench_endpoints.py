@@ -0,0 +1,498 @@
+#!/usr/bin/env python3
+"""
+Latency, queries and throughput of every chats.urls route at several data scales.
+
+For each scale (total messages: 1k, 100k and 1M by default) a SQLite
+database is seeded with synthetic users, conversations and messages, then
+every route and method registered by chats.urls is driven through the
+Django test client as one participant, --requests times. Per route it
+reports:
+
+- p50 / p90 / p99 / mean latency
+- SQL queries per request
+- rows/sec: result rows returned (or created) per second of request time
+
+Writes (send-message, bulk import, deletes, ...) run on rows created for
+them outside the timed section, so every request of a route does the same
+work. Unless --cold is given, repeated GETs are served by the shared page
+cache like a client polling with unchanged data.
+
+Results go to a JSON file (benchmarks/results/endpoints-<commit>.json by
+default); --compare prints the change of p50 and queries against an
+earlier file.
+
+Each scale runs in its own process so its settings, caches and
+connections are fresh. Seeding 1M messages takes a couple of minutes; with
+--data-dir the seeded databases are kept and reused by later runs
+(migrated to the current schema first).
+
+Usage (from the messaging_app directory):
+    python benchmarks/bench_endpoints.py [--scales 1000,100000,1000000]
+        [--requests 50] [--cold] [--data-dir DIR] [--compare OLD.json]
+"""
+import argparse
+import json
+import os
+import platform
+import statistics
+import subprocess
+import sys
+import tempfile
+import time
+from datetime import timedelta
+from pathlib import Path
+
+BASE_DIR = Path(__file__).resolve().parent.parent
+sys.path.insert(0, str(BASE_DIR))
+os.environ.setdefault("DJANGO_SETTINGS_MODULE", "messaging_app.settings")
+
+import django  # noqa: E402
+from django.conf import settings  # noqa: E402
+
+DEFAULT_SCALES = "1000,100000,1000000"
+
+
+def setup_django(database: str) -> None:
+    settings.DATABASES["default"]["NAME"] = database
+    settings.DEBUG = False
+    django.setup()
+
+
+def git_commit() -> str:
+    try:
+        return subprocess.run(
+            ["git", "rev-parse", "--short", "HEAD"],
+            cwd=BASE_DIR,
+            check=True,
+            capture_output=True,
+            text=True,
+        ).stdout.strip()
+    except (OSError, subprocess.CalledProcessError):
+        return "unknown"
+
+
+# ---------- Seeding ----------
+
+def shape(messages: int):
+    """
+    (users, conversations) for a total number of messages: about 200
+    messages per conversation and 10 conversations per user.
+    """
+    conversations = max(5, messages // 200)
+    users = max(2, conversations // 5)
+    return users, conversations
+
+
+def seed(messages: int) -> None:
+    from django.contrib.auth.hashers import make_password
+    from django.utils import timezone
+
+    from chats.activity import refresh_activity
+    from chats.inbox import refresh_inbox
+    from chats.models import Conversation, Message, User
+
+    users, conversations = shape(messages)
+    password = make_password("password123")
+    people = User.objects.bulk_create(
+        User(username=f"user{i}", email=f"user{i}@example.com", password=password)
+        for i in range(users)
+    )
+    rooms = Conversation.objects.bulk_create(
+        Conversation() for _ in range(conversations)
+    )
+    Membership = Conversation.participants.through
+    # Every conversation has two neighbouring users, so user i takes part
+    # in about 2 * conversations / users of them.
+    pairs = [
+        (room, (people[i % users], people[(i + 1) % users]))
+        for i, room in enumerate(rooms)
+    ]
+    Membership.objects.bulk_create(
+        Membership(conversation_id=room.pk, user_id=user.pk)
+        for room, members in pairs
+        for user in members
+    )
+
+    start = timezone.now() - timedelta(days=30)
+    per_room, extra = divmod(messages, conversations)
+    Message.objects.bulk_create(
+        (
+            Message(
+                conversation_id=room.pk,
+                sender_id=members[i % 2].pk,
+                message_body=f"Message {i} of this benchmark conversation.",
+                sent_at=start + timedelta(seconds=i * 7 + r),
+            )
+            for r, (room, members) in enumerate(pairs)
+            for i in range(per_room + (r < extra))
+        ),
+        batch_size=5000,
+    )
+    refresh_activity()
+    refresh_inbox()
+
+
+# ---------- Routes ----------
+
+class Fixture:
+    """
+    Ids the request builders need, and untimed setup for writes.
+    """
+
+    def __init__(self) -> None:
+        from chats.models import Conversation, Message, User
+
+        self.user = User.objects.get(username="user0")
+        self.other = User.objects.get(username="user1")
+        self.conversation = (
+            Conversation.objects.filter(participants=self.user)
+            .filter(participants=self.other)
+            .order_by("created_at")
+            .first()
+        )
+        self.message = (
+            Message.objects.filter(conversation=self.conversation, sender=self.user)
+            .order_by("-sent_at")
+            .first()
+        )
+
+    def new_conversation(self):
+        from chats.models import Conversation
+
+        conversation = Conversation.objects.create()
+        conversation.participants.add(self.user, self.other)
+        return conversation.pk
+
+    def new_message(self):
+        from chats.models import Message
+
+        return Message.objects.create(
+            sender=self.user,
+            conversation=self.conversation,
+            message_body="to be deleted",
+        ).pk
+
+
+def conversation_url(f: Fixture, suffix: str = "") -> str:
+    return f"/api/conversations/{f.conversation.pk}/{suffix}"
+
+
+def bulk_body(f: Fixture) -> dict:
+    return {"messages": [{"message_body": f"bulk {i}"} for i in range(100)]}
+
+
+# (URL name, method) -> builder of (path, JSON body) for one request.
+ROUTES = {
+    ("api-root", "GET"): lambda f: ("/api/", None),
+    ("conversation-list", "GET"): lambda f: ("/api/conversations/", None),
+    ("conversation-list", "POST"): lambda f: (
+        "/api/conversations/",
+        {"participant_ids": [str(f.other.pk)]},
+    ),
+    ("conversation-bulk", "POST"): lambda f: (
+        "/api/conversations/bulk/",
+        {"conversations": [{"participant_ids": [str(f.other.pk)]}] * 20},
+    ),
+    ("conversation-detail", "GET"): lambda f: (conversation_url(f), None),
+    ("conversation-detail", "PUT"): lambda f: (
+        conversation_url(f),
+        {"participant_ids": [str(f.user.pk), str(f.other.pk)]},
+    ),
+    ("conversation-detail", "PATCH"): lambda f: (
+        conversation_url(f),
+        {"participant_ids": [str(f.user.pk), str(f.other.pk)]},
+    ),
+    ("conversation-detail", "DELETE"): lambda f: (
+        f"/api/conversations/{f.new_conversation()}/",
+        None,
+    ),
+    ("conversation-mark-read", "POST"): lambda f: (conversation_url(f, "mark-read/"), {}),
+    ("conversation-send-message", "POST"): lambda f: (
+        conversation_url(f, "send-message/"),
+        {"message_body": "benchmark"},
+    ),
+    ("message-list", "GET"): lambda f: ("/api/messages/", None),
+    ("message-list", "POST"): lambda f: (
+        "/api/messages/",
+        {"conversation": str(f.conversation.pk), "message_body": "benchmark"},
+    ),
+    ("message-bulk", "POST"): lambda f: ("/api/messages/bulk/", bulk_body(f)),
+    ("message-search", "GET"): lambda f: ("/api/messages/search/?q=benchmark", None),
+    ("message-wait", "GET"): lambda f: ("/api/messages/wait/?timeout=0", None),
+    ("message-export", "GET"): lambda f: ("/api/messages/export/", None),
+    ("message-detail", "GET"): lambda f: (f"/api/messages/{f.message.pk}/", None),
+    ("message-detail", "PUT"): lambda f: (
+        f"/api/messages/{f.message.pk}/",
+        {"conversation": str(f.conversation.pk), "message_body": "edited"},
+    ),
+    ("message-detail", "PATCH"): lambda f: (
+        f"/api/messages/{f.message.pk}/",
+        {"message_body": "edited"},
+    ),
+    ("message-detail", "DELETE"): lambda f: (f"/api/messages/{f.new_message()}/", None),
+    ("conversation-messages-list", "GET"): lambda f: (conversation_url(f, "messages/"), None),
+    ("conversation-messages-list", "POST"): lambda f: (
+        conversation_url(f, "messages/"),
+        {"conversation": str(f.conversation.pk), "message_body": "benchmark"},
+    ),
+    ("conversation-messages-bulk", "POST"): lambda f: (
+        conversation_url(f, "messages/bulk/"),
+        bulk_body(f),
+    ),
+    ("conversation-messages-search", "GET"): lambda f: (
+        conversation_url(f, "messages/search/?q=benchmark"),
+        None,
+    ),
+    ("conversation-messages-wait", "GET"): lambda f: (
+        conversation_url(f, "messages/wait/?after=&timeout=0"),
+        None,
+    ),
+    ("conversation-messages-export", "GET"): lambda f: (
+        conversation_url(f, "messages/export/"),
+        None,
+    ),
+    ("conversation-messages-detail", "GET"): lambda f: (
+        conversation_url(f, f"messages/{f.message.pk}/"),
+        None,
+    ),
+    ("conversation-messages-detail", "PUT"): lambda f: (
+        conversation_url(f, f"messages/{f.message.pk}/"),
+        {"conversation": str(f.conversation.pk), "message_body": "edited"},
+    ),
+    ("conversation-messages-detail", "PATCH"): lambda f: (
+        conversation_url(f, f"messages/{f.message.pk}/"),
+        {"message_body": "edited"},
+    ),
+    ("conversation-messages-detail", "DELETE"): lambda f: (
+        conversation_url(f, f"messages/{f.new_message()}/"),
+        None,
+    ),
+}
+
+
+def registered_routes():
+    """
+    (URL name, method) of every route of chats.urls, format suffixes and
+    HEAD (served by the GET handler) aside.
+    """
+    from chats.urls import nested_router, router
+
+    routes = set()
+    for pattern in [*router.urls, *nested_router.urls]:
+        if "format" in pattern.pattern.regex.groupindex:
+            continue
+        actions = getattr(pattern.callback, "actions", None) or {"get": None}
+        routes.update(
+            (pattern.name, method.upper()) for method in actions if method != "head"
+        )
+    return routes
+
+
+# ---------- Measuring ----------
+
+def response_rows(response, streamed: bytes = b"") -> int:
+    if response.streaming:
+        # Exports: one line per row, plus the CSV header.
+        return streamed.count(b"\n") - response["Content-Type"].startswith("text/csv")
+    if response.status_code == 204 or not response.content:
+        return 0
+    data = response.json()
+    if isinstance(data, dict):
+        if isinstance(data.get("results"), list):
+            return len(data["results"])
+        if "created" in data:
+            return data["created"]
+    if isinstance(data, list):
+        return len(data)
+    return 1
+
+
+def percentile(values, fraction: float) -> float:
+    values = sorted(values)
+    return values[min(len(values) - 1, int(len(values) * fraction))]
+
+
+def measure(client, fixture: Fixture, build, method: str, count: int, cold: bool):
+    from django.db import connection
+    from django.test.utils import CaptureQueriesContext
+
+    from chats.cache import get_cache
+
+    latencies, queries, rows, statuses = [], [], 0, {}
+    for _ in range(count):
+        path, body = build(fixture)
+        if cold:
+            get_cache().clear()
+        kwargs = {}
+        if body is not None:
+            kwargs = {"data": json.dumps(body), "content_type": "application/json"}
+        with CaptureQueriesContext(connection) as ctx:
+            start = time.perf_counter()
+            response = getattr(client, method.lower())(path, **kwargs)
+            # Streamed rows are only read as the body is consumed.
+            streamed = b"".join(response.streaming_content) if response.streaming else b""
+            latencies.append(time.perf_counter() - start)
+        queries.append(len(ctx.captured_queries))
+        rows += response_rows(response, streamed)
+        statuses[response.status_code] = statuses.get(response.status_code, 0) + 1
+
+    elapsed = sum(latencies)
+    return {
+        "requests": count,
+        "statuses": {str(status): n for status, n in sorted(statuses.items())},
+        "p50_ms": percentile(latencies, 0.50) * 1000,
+        "p90_ms": percentile(latencies, 0.90) * 1000,
+        "p99_ms": percentile(latencies, 0.99) * 1000,
+        "mean_ms": statistics.fmean(latencies) * 1000,
+        "queries_per_request": statistics.fmean(queries),
+        "max_queries": max(queries),
+        "rows_per_sec": rows / elapsed if elapsed else 0.0,
+    }
+
+
+def run_scale(messages: int, args) -> dict:
+    from django.core.management import call_command
+    from django.test import Client
+    from django.test.utils import setup_test_environment
+    from rest_framework_simplejwt.tokens import AccessToken
+
+    from chats.models import Message
+
+    call_command("migrate", verbosity=0)
+    seed_seconds = None
+    if not Message.objects.exists():
+        start = time.perf_counter()
+        seed(messages)
+        seed_seconds = time.perf_counter() - start
+
+    setup_test_environment()
+    missing = registered_routes() - set(ROUTES)
+    if missing:
+        raise SystemExit(f"No benchmark for routes: {sorted(missing)}")
+
+    fixture = Fixture()
+    client = Client(HTTP_AUTHORIZATION=f"Bearer {AccessToken.for_user(fixture.user)}")
+    users, conversations = shape(messages)
+    routes = {}
+    for (name, method), build in ROUTES.items():
+        # One untimed request warms up connections and imports.
+        measure(client, fixture, build, method, 1, args.cold)
+        routes[f"{method} {name}"] = measure(
+            client, fixture, build, method, args.requests, args.cold
+        )
+    return {
+        "messages": messages,
+        "conversations": conversations,
+        "users": users,
+        "seed_seconds": seed_seconds,
+        "routes": routes,
+    }
+
+
+# ---------- Reporting ----------
+
+def print_scale(result: dict) -> None:
+    print(
+        f"\n{result['messages']:,} messages, {result['conversations']:,} "
+        f"conversations, {result['users']:,} users"
+    )
+    print(
+        f"{'route':<44} {'p50 ms':>8} {'p99 ms':>8} {'queries':>8} "
+        f"{'rows/s':>10} statuses"
+    )
+    for route, stats in result["routes"].items():
+        print(
+            f"{route:<44} {stats['p50_ms']:>8.1f} {stats['p99_ms']:>8.1f} "
+            f"{stats['queries_per_request']:>8.1f} {stats['rows_per_sec']:>10,.0f} "
+            f"{','.join(stats['statuses'])}"
+        )
+
+
+def print_comparison(old: dict, new: dict) -> None:
+    print(f"\nChange from {old['commit']} to {new['commit']} (p50, queries)")
+    for scale, result in new["scales"].items():
+        previous = old["scales"].get(scale)
+        if previous is None:
+            continue
+        print(f"\n{int(scale):,} messages")
+        for route, stats in result["routes"].items():
+            before = previous["routes"].get(route)
+            if before is None:
+                continue
+            change = (stats["p50_ms"] / before["p50_ms"] - 1) * 100 if before["p50_ms"] else 0
+            print(
+                f"{route:<44} {before['p50_ms']:>8.1f} -> {stats['p50_ms']:>8.1f} ms "
+                f"({change:+.0f}%)   {before['queries_per_request']:.1f} -> "
+                f"{stats['queries_per_request']:.1f}"
+            )
+
+
+# ---------- Main ----------
+
+def main() -> None:
+    parser = argparse.ArgumentParser(description=__doc__.splitlines()[1])
+    parser.add_argument(
+        "--scales",
+        default=DEFAULT_SCALES,
+        help=f"Comma-separated total message counts (default {DEFAULT_SCALES}).",
+    )
+    parser.add_argument("--requests", type=int, default=50, help="Requests per route.")
+    parser.add_argument(
+        "--cold", action="store_true", help="Clear the shared cache before each request."
+    )
+    parser.add_argument("--data-dir", help="Keep and reuse seeded databases here.")
+    parser.add_argument("--output", help="JSON results file.")
+    parser.add_argument("--compare", help="Earlier JSON results file to compare with.")
+    parser.add_argument("--scale", type=int, help=argparse.SUPPRESS)
+    parser.add_argument("--database", help=argparse.SUPPRESS)
+    args = parser.parse_args()
+
+    if args.scale:
+        setup_django(args.database)
+        print(json.dumps(run_scale(args.scale, args)))
+        return
+
+    scales = [int(scale) for scale in args.scales.split(",")]
+    commit = git_commit()
+    results = {
+        "commit": commit,
+        "created_at": time.strftime("%Y-%m-%dT%H:%M:%S%z"),
+        "python": platform.python_version(),
+        "django": django.get_version(),
+        "requests_per_route": args.requests,
+        "cold": args.cold,
+        "scales": {},
+    }
+
+    with tempfile.TemporaryDirectory() as directory:
+        data_dir = args.data_dir or directory
+        os.makedirs(data_dir, exist_ok=True)
+        for messages in scales:
+            env = {
+                **os.environ,
+                "CHATS_ASYNC_VIEWS": "0",
+                "CHATS_CACHE_LOCATION": os.path.join(directory, f"cache-{messages}.sqlite3"),
+            }
+            output = subprocess.run(
+                [sys.executable, __file__, *sys.argv[1:], "--scale", str(messages),
+                 "--database", os.path.join(data_dir, f"bench-{messages}.sqlite3")],
+                env=env,
+                check=True,
+                capture_output=True,
+                text=True,
+            ).stdout
+            result = json.loads(output.splitlines()[-1])
+            results["scales"][str(messages)] = result
+            print_scale(result)
+
+    output = Path(args.output or BASE_DIR / "benchmarks" / "results" / f"endpoints-{commit}.json")
+    output.parent.mkdir(parents=True, exist_ok=True)
+    output.write_text(json.dumps(results, indent=2))
+    print(f"\nWrote {output}")
+
+    if args.compare:
+        print_comparison(json.loads(Path(args.compare).read_text()), results)
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,113 @@
+#!/usr/bin/env python3
+"""
+Serialization throughput of MessageSerializer vs MessageReadSerializer,
+and of the compact ?include=users format (CompactMessageListSerializer).
+
+Builds in-memory messages of a two-person conversation (no database
+access) and reports rows/sec for page sizes 20, 100 and 1000, checking
+that both full serializers produce identical JSON, plus the rendered
+payload size of the full and compact formats.
+
+Usage (from the messaging_app directory):
+    python benchmarks/bench_serializers.py [--repeat 20]
+"""
+import argparse
+import os
+import sys
+import time
+import uuid
+from datetime import timedelta
+from pathlib import Path
+
+sys.path.insert(0, str(Path(__file__).resolve().parent.parent))
+os.environ.setdefault("DJANGO_SETTINGS_MODULE", "messaging_app.settings")
+
+import django  # noqa: E402
+
+django.setup()
+
+from django.utils import timezone  # noqa: E402
+from rest_framework.renderers import JSONRenderer  # noqa: E402
+
+from chats.models import Message, User  # noqa: E402
+from chats.serializers import (  # noqa: E402
+    CompactMessageListSerializer,
+    MessageReadSerializer,
+    MessageSerializer,
+)
+
+PAGE_SIZES = (20, 100, 1000)
+
+
+def build_messages(count: int):
+    now = timezone.now()
+    users = [
+        User(
+            user_id=uuid.uuid4(),
+            email=f"user{i}@example.com",
+            first_name=f"First{i}",
+            last_name=f"Last{i}",
+            phone_number=None if i % 2 else "+20 100 000 0000",
+        )
+        for i in range(2)
+    ]
+    conversation_id = uuid.uuid4()
+    return [
+        Message(
+            message_id=uuid.uuid4(),
+            sender=users[i % 2],
+            conversation_id=conversation_id,
+            message_body=f"Message number {i} in this benchmark conversation.",
+            sent_at=now - timedelta(seconds=i),
+        )
+        for i in range(count)
+    ]
+
+
+def rows_per_second(serialize, messages, repeat: int) -> float:
+    start = time.perf_counter()
+    for _ in range(repeat):
+        serialize(messages)
+    return len(messages) * repeat / (time.perf_counter() - start)
+
+
+def full(serializer_class):
+    return lambda messages: serializer_class(messages, many=True).data
+
+
+def compact(messages):
+    serializer = CompactMessageListSerializer(messages)
+    return {"results": serializer.data, "included": serializer.included}
+
+
+def main() -> None:
+    parser = argparse.ArgumentParser(description=__doc__.splitlines()[1])
+    parser.add_argument("--repeat", type=int, default=20)
+    args = parser.parse_args()
+
+    renderer = JSONRenderer()
+    print(
+        f"{'page size':>10} {'ModelSerializer':>18} {'read path':>14} {'speedup':>8}"
+        f" {'compact':>14} {'speedup':>8} {'bytes':>10} {'compact':>10}"
+    )
+    for page_size in PAGE_SIZES:
+        messages = build_messages(page_size)
+        assert renderer.render(MessageSerializer(messages, many=True).data) == (
+            renderer.render(MessageReadSerializer(messages, many=True).data)
+        ), "read serializer output differs"
+
+        repeat = max(1, args.repeat * 100 // page_size)
+        baseline = rows_per_second(full(MessageSerializer), messages, repeat)
+        fast = rows_per_second(full(MessageReadSerializer), messages, repeat)
+        sideloaded = rows_per_second(compact, messages, repeat)
+        size = len(renderer.render(full(MessageReadSerializer)(messages)))
+        compact_size = len(renderer.render(compact(messages)))
+        print(
+            f"{page_size:>10} {baseline:>13,.0f} r/s {fast:>10,.0f} r/s "
+            f"{fast / baseline:>7.1f}x {sideloaded:>10,.0f} r/s "
+            f"{sideloaded / baseline:>7.1f}x {size:>10,} {compact_size:>10,}"
+        )
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,114 @@
+"""
+Denormalized activity counters of conversations.
+
+Conversation.last_message, last_message_at and message_count are kept up
+to date from the message write paths (see chats.signals):
+
+- a new message (send-message, POST /messages/, async send) and a bulk
+  import add to the count and move the last message forward, in one
+  UPDATE built from F() expressions so concurrent writers do not lose
+  increments
+- a deleted message decrements the count and, when it was the last
+  message, the last message is recomputed by the same UPDATE
+
+Paths that bypass signals (raw SQL, QuerySet.update(), bulk_create()
+without messages_bulk_created) leave the counters stale; they are
+recomputed from the messages with refresh_activity(), also available as
+``manage.py repair_conversation_activity``.
+"""
+from typing import Iterable, Optional
+
+from django.db import models
+from django.db.models.functions import Coalesce
+
+from .models import Conversation, Message
+
+
+def _latest(field: str) -> models.Subquery:
+    """
+    Column of the latest message (by sent_at, message_id) of the
+    conversation of the outer query.
+    """
+    return models.Subquery(
+        Message.objects.filter(conversation=models.OuterRef("pk"))
+        .order_by("-sent_at", "-message_id")
+        .values(field)[:1]
+    )
+
+
+def record_messages(conversation_id, messages: Iterable[Message], using=None) -> None:
+    """
+    Count new messages of a conversation in its activity counters.
+    """
+    messages = list(messages)
+    if not messages:
+        return
+    last = max(messages, key=lambda message: (message.sent_at, message.pk))
+    newer = (
+        models.Q(last_message_at__isnull=True)
+        | models.Q(last_message_at__lt=last.sent_at)
+        | models.Q(last_message_at=last.sent_at, last_message__lt=last.pk)
+    )
+    # last_message is assigned first: MySQL evaluates SET clauses in
+    # order, and `newer` must still see the old last_message_at.
+    Conversation.objects.using(using).filter(pk=conversation_id).update(
+        last_message=models.Case(
+            models.When(newer, then=models.Value(last.pk)),
+            default=models.F("last_message"),
+        ),
+        last_message_at=models.Case(
+            models.When(newer, then=models.Value(last.sent_at)),
+            default=models.F("last_message_at"),
+        ),
+        message_count=models.F("message_count") + len(messages),
+    )
+
+
+def record_deleted_message(message: Message, using=None) -> None:
+    """
+    Remove a deleted message from the activity counters of its
+    conversation. Runs after the row is gone, so the replacement last
+    message is read from the remaining ones.
+    """
+    was_last = models.Q(last_message=message.pk)
+    # last_message_at is assigned first: MySQL evaluates SET clauses in
+    # order, and `was_last` must still see the old last_message.
+    Conversation.objects.using(using).filter(pk=message.conversation_id).update(
+        last_message_at=models.Case(
+            models.When(was_last, then=_latest("sent_at")),
+            default=models.F("last_message_at"),
+        ),
+        last_message=models.Case(
+            models.When(was_last, then=_latest("pk")),
+            default=models.F("last_message"),
+        ),
+        message_count=models.Case(
+            models.When(message_count__gt=0, then=models.F("message_count") - 1),
+            default=models.Value(0),
+        ),
+    )
+
+
+def refresh_activity(
+    conversation_ids: Optional[Iterable] = None, using=None
+) -> int:
+    """
+    Recompute the activity counters of the given conversations (all of
+    them by default) from their messages. Returns the number of
+    conversations updated.
+    """
+    queryset = Conversation.objects.using(using)
+    if conversation_ids is not None:
+        queryset = queryset.filter(pk__in=list(conversation_ids))
+    count = (
+        Message.objects.filter(conversation=models.OuterRef("pk"))
+        .order_by()
+        .values("conversation")
+        .annotate(n=models.Count("*"))
+        .values("n")
+    )
+    return queryset.update(
+        last_message=_latest("pk"),
+        last_message_at=_latest("sent_at"),
+        message_count=Coalesce(models.Subquery(count), 0),
+    )
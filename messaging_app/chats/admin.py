@@ -1,7 +1,94 @@
+from typing import Optional
+from uuid import UUID
+
 from django.contrib import admin
 from django.contrib.auth.admin import UserAdmin as BaseUserAdmin
+from django.core.paginator import Paginator
+from django.db import connections
+from django.utils.functional import cached_property
 
 from .models import User, Conversation, Message
+from .search import get_search_backend
+
+
+# ---------- Large tables ----------
+
+def estimated_row_count(model, using: str) -> Optional[int]:
+    """
+    Number of rows of a model's table as estimated by the database,
+    without scanning it; None when the backend keeps no estimate.
+
+    - PostgreSQL: pg_class.reltuples (maintained by VACUUM / ANALYZE)
+    - MySQL:      information_schema.TABLES.TABLE_ROWS
+    - SQLite:     the largest rowid (rows are appended, deleted ones
+                  leave gaps: an upper bound)
+    """
+    connection = connections[using]
+    table = model._meta.db_table
+    queries = {
+        "postgresql": (
+            "SELECT reltuples::bigint FROM pg_class WHERE oid = to_regclass(%s)",
+            [table],
+        ),
+        "mysql": (
+            "SELECT table_rows FROM information_schema.tables "
+            "WHERE table_schema = DATABASE() AND table_name = %s",
+            [table],
+        ),
+        "sqlite": (f"SELECT MAX(_rowid_) FROM {connection.ops.quote_name(table)}", []),
+    }
+    if connection.vendor not in queries:
+        return None
+    sql, params = queries[connection.vendor]
+    with connection.cursor() as cursor:
+        cursor.execute(sql, params)
+        row = cursor.fetchone()
+    # reltuples is -1 until the table is first analyzed.
+    if row is None or row[0] is None or row[0] < 0:
+        return None
+    return int(row[0])
+
+
+class EstimatedCountPaginator(Paginator):
+    """
+    Changelist paginator that never runs a full COUNT(*).
+
+    - unfiltered changelists use estimated_row_count(), counting exactly
+      only below exact_count_limit rows
+    - filtered ones (search, list filters) count at most
+      filtered_count_limit matches; further ones are not paginated to
+    """
+
+    exact_count_limit = 10_000
+    filtered_count_limit = 10_000
+
+    @cached_property
+    def count(self) -> int:
+        queryset = self.object_list
+        if queryset.query.where:
+            return queryset.order_by()[: self.filtered_count_limit].count()
+        estimate = estimated_row_count(queryset.model, queryset.db)
+        if estimate is None or estimate < self.exact_count_limit:
+            return queryset.count()
+        return estimate
+
+
+class LargeTableAdminMixin:
+    """
+    ModelAdmin settings for tables of millions of rows: estimated
+    counts, and no second count of the unfiltered table next to search
+    results.
+    """
+
+    paginator = EstimatedCountPaginator
+    show_full_result_count = False
+
+
+def parse_uuid(value: str) -> Optional[UUID]:
+    try:
+        return UUID(value)
+    except ValueError:
+        return None
 
 
 @admin.register(User)
@@ -41,15 +128,56 @@ class UserAdmin(BaseUserAdmin):
 
 
 @admin.register(Conversation)
-class ConversationAdmin(admin.ModelAdmin):
+class ConversationAdmin(LargeTableAdminMixin, admin.ModelAdmin):
     list_display = ("conversation_id", "created_at")
-    search_fields = ("conversation_id",)
-    filter_horizontal = ("participants",)
+    search_fields = ("conversation_id", "participants__email")
+    search_help_text = "A conversation id or a participant's email address."
+    raw_id_fields = ("participants",)
+
+    def get_search_results(self, request, queryset, search_term):
+        """
+        Exact lookups on the primary key or the participant's unique
+        email index instead of LIKE scans.
+        """
+        term = search_term.strip()
+        if not term:
+            return queryset, False
+        conversation_id = parse_uuid(term)
+        if conversation_id is not None:
+            return queryset.filter(pk=conversation_id), False
+        return queryset.filter(participants__email=term), False
 
 
 @admin.register(Message)
-class MessageAdmin(admin.ModelAdmin):
-    list_display = ("message_id", "sender", "conversation", "sent_at")
+class MessageAdmin(LargeTableAdminMixin, admin.ModelAdmin):
+    list_display = ("message_id", "sender", "conversation_display", "sent_at")
+    # Message.__str__ and the sender column read the sender.
+    list_select_related = ("sender",)
+    # Newest first, read backwards along chats_msg_sent_idx.
+    ordering = ("-sent_at", "-message_id")
     search_fields = ("message_body", "sender__email")
+    search_help_text = (
+        "A message id, a sender's email address, or words of the message body."
+    )
     list_filter = ("sent_at",)
+    raw_id_fields = ("sender", "conversation")
+
+    @admin.display(description="conversation", ordering="conversation")
+    def conversation_display(self, message: Message) -> str:
+        # Conversation.__str__ only needs the id: no join.
+        return str(Conversation(conversation_id=message.conversation_id))
 
+    def get_search_results(self, request, queryset, search_term):
+        """
+        Route the search through an index: the primary key, the sender's
+        unique email, or the full-text index of chats.search.
+        """
+        term = search_term.strip()
+        if not term:
+            return queryset, False
+        message_id = parse_uuid(term)
+        if message_id is not None:
+            return queryset.filter(pk=message_id), False
+        if "@" in term:
+            return queryset.filter(sender__email=term), False
+        return get_search_backend(queryset.db).search(queryset, term, ranked=False), False
@@ -0,0 +1,353 @@
+"""
+Native async versions of the hot endpoints, served under ASGI.
+
+- GET  /conversations/                                   (conversation list)
+- GET  /conversations/{conversation_pk}/messages/        (message list)
+- POST /conversations/{conversation_pk}/send-message/    (send a message)
+- GET  /conversations/{conversation_pk}/messages/wait/   (long-poll)
+
+They reuse the querysets, filters, pagination, validators and serializers
+of the DRF viewsets, but run every query through the async ORM and the
+cache's async API, so a request waiting on I/O does not hold one of the
+threads of the sync_to_async pool.
+
+Only the common case is handled natively. Anything else (other methods,
+Basic auth, session-authenticated writes, invalid input, pages that do not
+exist, ?search=, MessagePack responses) is delegated to the synchronous viewset, so responses and
+error bodies are the same as under WSGI.
+
+The long-poll is always served here, so a waiting request holds no
+thread under ASGI. The other routes are enabled by
+settings.CHATS_ASYNC_VIEWS (see chats.urls). They are opt-in: measure them
+against the sync views under your ASGI server first
+(benchmarks/bench_asgi.py).
+"""
+import json
+from typing import Optional
+from uuid import UUID
+
+from asgiref.sync import sync_to_async
+from django.contrib.auth import get_user
+from django.http import HttpResponse
+from rest_framework.exceptions import APIException, NotAcceptable
+from rest_framework.permissions import SAFE_METHODS
+from rest_framework.renderers import JSONRenderer
+from rest_framework.request import Request
+from rest_framework.settings import api_settings
+from rest_framework.status import HTTP_201_CREATED
+
+from .auth import (
+    CachedJWTAuthentication,
+    aload_user,
+    check_user,
+    claim_user,
+    token_user_id,
+    uses_token_claims,
+)
+from .cache import get_cache
+from .conditional import (
+    PAGE_CACHE_TIMEOUT,
+    not_modified_response,
+    set_validator_headers,
+    shared_page_key,
+)
+from .membership import ais_participant
+from .models import Conversation, Message, User, participant_conversation_ids
+from .notifications import notifier
+from .routers import use_primary
+from .serializers import MessageSerializer
+from .versions import aget_version
+from .views import (
+    ConversationViewSet,
+    MessageViewSet,
+    aconversation_stats,
+    amessage_stats,
+    list_validators,
+)
+
+jwt_authentication = CachedJWTAuthentication()
+renderer = JSONRenderer()
+negotiation = api_settings.DEFAULT_CONTENT_NEGOTIATION_CLASS()
+renderers = [renderer_class() for renderer_class in api_settings.DEFAULT_RENDERER_CLASSES]
+
+
+# ---------- Authentication ----------
+
+async def authenticate(request) -> Optional[User]:
+    """
+    Resolve the user of a request without blocking the event loop,
+    or return None to let the synchronous view handle the request.
+
+    Bearer tokens are validated in-process and the user is read through
+    the shared cache with the async ORM, like CachedJWTAuthentication.
+    Session cookies are only honoured on safe methods:
+    session-authenticated writes need DRF's CSRF check.
+    """
+    header = jwt_authentication.get_header(request)
+    if header is not None:
+        try:
+            raw_token = jwt_authentication.get_raw_token(header)
+            if raw_token is None:
+                return None
+            token = jwt_authentication.get_validated_token(raw_token)
+            if uses_token_claims(request):
+                return claim_user(token)
+            return check_user(await aload_user(token_user_id(token)), token)
+        except APIException:
+            return None
+
+    if request.method in SAFE_METHODS:
+        user = await sync_to_async(get_user)(request)
+        if user.is_authenticated:
+            return user
+    return None
+
+
+def api_request(request, user: User) -> Request:
+    """
+    Wrap the Django request like APIView does (query_params, absolute
+    URIs for links), with the already authenticated user.
+    """
+    drf_request = Request(request)
+    drf_request.user = user
+    return drf_request
+
+
+def renders_json(request: Request) -> bool:
+    """
+    Whether content negotiation picks JSON, the only format rendered
+    here; other formats are left to the synchronous views. Records the
+    choice on the request, as APIView.initial() does.
+    """
+    try:
+        selected, media_type = negotiation.select_renderer(request, renderers)
+    except NotAcceptable:
+        return False
+    request.accepted_renderer, request.accepted_media_type = selected, media_type
+    return isinstance(selected, JSONRenderer)
+
+
+# ---------- Responses ----------
+
+def json_response(data, status: int = 200) -> HttpResponse:
+    # Same bytes as the JSONRenderer used by the synchronous views.
+    return HttpResponse(
+        renderer.render(data),
+        content_type=renderer.media_type,
+        status=status,
+    )
+
+
+async def conditional_list(request, validators, get_data):
+    """
+    ConditionalListMixin.list() for async views: 304 when the client is
+    up to date, then the shared page cache, then get_data().
+
+    get_data() returns the response data, or None to fall back.
+    """
+    not_modified = not_modified_response(request, validators)
+    if not_modified is not None:
+        return not_modified
+
+    cache = get_cache()
+    key = shared_page_key(request, validators)
+    data = await cache.aget(key) if key is not None else None
+    if data is None:
+        data = await get_data()
+        if data is None:
+            return None
+        if key is not None:
+            await cache.aset(key, data, PAGE_CACHE_TIMEOUT)
+
+    response = json_response(data)
+    set_validator_headers(response, validators)
+    return response
+
+
+# ---------- Views ----------
+
+async def conversation_list(request):
+    """
+    GET /conversations/ (see ConversationViewSet.list).
+    """
+    if request.method != "GET":
+        return None
+    user = await authenticate(request)
+    if user is None:
+        return None
+
+    request = api_request(request, user)
+    if not renders_json(request):
+        return None
+    view = ConversationViewSet(
+        request=request, action="list", args=(), kwargs={}, format_kwarg=None
+    )
+    try:
+        queryset = view.filter_queryset(view.get_queryset())
+    except APIException:
+        return None
+
+    stats = await aconversation_stats(
+        Conversation.objects.filter(pk__in=participant_conversation_ids(user))
+    )
+    validators = list_validators(request, stats, await aget_version("user", user.pk))
+
+    async def get_data():
+        paginator = view.paginator
+        try:
+            page = await paginator.apaginate_queryset(queryset, request, view=view)
+        except APIException:
+            return None
+        if page is None:
+            return None
+        serializer = view.get_serializer(page, many=True)
+        return paginator.get_paginated_response(serializer.data).data
+
+    return await conditional_list(request, validators, get_data)
+
+
+async def conversation_messages(request, conversation_pk):
+    """
+    GET /conversations/{conversation_pk}/messages/ (see MessageViewSet.list).
+    """
+    if request.method != "GET" or "search" in request.GET:
+        return None
+    user = await authenticate(request)
+    if user is None:
+        return None
+
+    request = api_request(request, user)
+    if not renders_json(request):
+        return None
+    if not await ais_participant(request, conversation_pk):
+        return None
+
+    view = MessageViewSet(
+        request=request,
+        action="list",
+        args=(),
+        kwargs={"conversation_pk": conversation_pk},
+        format_kwarg=None,
+    )
+    try:
+        queryset = view.filter_queryset(view.get_queryset())
+    except APIException:
+        return None
+
+    stats = await amessage_stats(Message.objects.filter(conversation_id=conversation_pk))
+    validators = list_validators(
+        request, stats, await aget_version("conversation", conversation_pk)
+    )
+
+    async def get_data():
+        paginator = view.paginator
+        try:
+            page = await paginator.apaginate_queryset(queryset, request, view=view)
+            # The view's serializer: the read path, a fieldset or side-loads.
+            serializer = view.get_serializer(page, many=True)
+        except APIException:
+            return None
+        return paginator.get_paginated_response(serializer.data).data
+
+    return await conditional_list(request, validators, get_data)
+
+
+async def wait_messages(request, conversation_pk):
+    """
+    GET /conversations/{conversation_pk}/messages/wait/ (see MessageViewSet.wait).
+
+    Holds the request on the event loop rather than on a thread.
+    """
+    if request.method != "GET":
+        return None
+    user = await authenticate(request)
+    if user is None:
+        return None
+
+    request = api_request(request, user)
+    if not renders_json(request):
+        return None
+    if not await ais_participant(request, conversation_pk):
+        return None
+
+    view = MessageViewSet(
+        request=request,
+        action="wait",
+        args=(),
+        kwargs={"conversation_pk": conversation_pk},
+        format_kwarg=None,
+    )
+    try:
+        cursor, timeout = view.wait_params(request)
+        queryset = view.wait_queryset(conversation_pk, cursor)
+    except APIException:
+        return None
+    # Woken up by a commit on the primary; a replica may lag behind.
+    use_primary()
+
+    limit = view.wait_max_results
+    async with await notifier.alisten(conversation_pk) as listener:
+        messages = [message async for message in queryset[:limit]]
+        if not messages and timeout > 0 and await listener.wait(timeout):
+            messages = [message async for message in queryset[:limit]]
+    try:
+        data = view.wait_data(messages, cursor)
+    except APIException:
+        return None
+    return json_response(data)
+
+
+async def send_message(request, pk):
+    """
+    POST /conversations/{pk}/send-message/ (see ConversationViewSet.send_message).
+    """
+    if request.method != "POST" or request.content_type != "application/json":
+        return None
+    user = await authenticate(request)
+    if user is None:
+        return None
+
+    request = api_request(request, user)
+    if not renders_json(request):
+        return None
+    if not await ais_participant(request, pk):
+        return None
+
+    try:
+        data = json.loads(request.body or b"{}")
+    except ValueError:
+        return None
+    message_body = data.get("message_body") if isinstance(data, dict) else None
+    if not message_body:
+        return None
+
+    message = await Message.objects.acreate(
+        sender=user,
+        conversation_id=UUID(str(pk)),
+        message_body=message_body,
+    )
+    serializer = MessageSerializer(message, context={"request": request})
+    return json_response(serializer.data, status=HTTP_201_CREATED)
+
+
+def with_fallback(handler, sync_view):
+    """
+    Async view running handler, or sync_view when handler returns None.
+
+    CSRF is left to the synchronous view, like DRF does: the async
+    handlers never accept session-authenticated writes.
+    """
+    run_sync_view = sync_to_async(sync_view, thread_sensitive=True)
+
+    async def view(request, *args, **kwargs):
+        response = await handler(request, *args, **kwargs)
+        if response is None:
+            response = await run_sync_view(request, *args, **kwargs)
+        return response
+
+    # Set by hand: django.views.decorators.csrf.csrf_exempt would turn
+    # the coroutine function into a sync one on Django 4.2.
+    view.csrf_exempt = True
+    view.__name__ = handler.__name__
+    view.__doc__ = handler.__doc__
+    return view
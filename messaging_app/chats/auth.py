@@ -1,5 +1,39 @@
+"""
+JWT helpers and authentication.
+
+CachedJWTAuthentication replaces simplejwt's JWTAuthentication, which
+loads the user row on every request:
+
+- the user behind a token is read through the shared cache, keyed by
+  the token's user id, for settings.CHATS_AUTH_USER_CACHE_TIMEOUT seconds;
+  only CACHED_USER_FIELDS are cached, not the password hash
+- entries are invalidated whenever the user is saved or deleted (profile
+  edits, deactivation, password changes; see chats.signals)
+- with settings.CHATS_JWT_STATELESS_READS, safe-method requests skip the
+  lookup and trust the token's claims (claim_user()); a deactivated
+  user then keeps read access until their access token expires
+"""
+from typing import Optional
+
+from django.conf import settings
 from django.contrib.auth import get_user_model
+from django.db import DEFAULT_DB_ALIAS, transaction
+from django.utils.translation import gettext_lazy as _
+from rest_framework.exceptions import AuthenticationFailed
+from rest_framework.permissions import SAFE_METHODS
+from rest_framework_simplejwt import settings as jwt_settings
+from rest_framework_simplejwt.authentication import JWTAuthentication
+from rest_framework_simplejwt.exceptions import InvalidToken
 from rest_framework_simplejwt.tokens import RefreshToken
+from rest_framework_simplejwt.utils import get_md5_hash_password
+
+from .versions import (
+    aget_versioned,
+    aset_versioned,
+    bump_version,
+    get_versioned,
+    set_versioned,
+)
 
 User = get_user_model()
 
@@ -16,3 +50,171 @@ def create_tokens_for_user(user: User) -> dict:
         "refresh": str(refresh),
         "access": str(refresh.access_token),
     }
+
+
+# ---------- Cached user lookups ----------
+
+# Fields of the cached users: what authentication, permissions and the
+# serializers read from request.user. The password hash is not cached,
+# only its digest as compared with revoke-token claims; users built from
+# the cache load the other fields, and save only these, like .only().
+CACHED_USER_FIELDS = (
+    "user_id",
+    "username",
+    "email",
+    "first_name",
+    "last_name",
+    "phone_number",
+    "role",
+    "created_at",
+    "is_active",
+    "is_staff",
+    "is_superuser",
+)
+
+
+def user_cache_key(user_id) -> str:
+    return f"chats:auth:user:{user_id}"
+
+
+def user_cache_timeout() -> int:
+    return getattr(settings, "CHATS_AUTH_USER_CACHE_TIMEOUT", 60)
+
+
+def _user_queryset(user_id):
+    # Read from the primary, like membership sets, so a lagging replica
+    # cannot put a stale row (old password, still active) in the cache.
+    return (
+        User.objects.using(DEFAULT_DB_ALIAS)
+        .filter(**{jwt_settings.api_settings.USER_ID_FIELD: user_id})
+        .values(*CACHED_USER_FIELDS, "password")
+    )
+
+
+def _cache_entry(row: dict) -> tuple:
+    password = row.pop("password")
+    return row, get_md5_hash_password(password)
+
+
+def _cached_user(entry: tuple) -> User:
+    row, password_hash = entry
+    # from_db() expects the values in field order.
+    names = [f.attname for f in User._meta.concrete_fields if f.attname in row]
+    user = User.from_db(DEFAULT_DB_ALIAS, names, [row[name] for name in names])
+    user.password_hash = password_hash
+    return user
+
+
+def load_user(user_id) -> Optional[User]:
+    """
+    Return the user with the given token user id, reading through the
+    shared cache. Unknown ids are not cached.
+    """
+    version, entry = get_versioned("auth", user_id, user_cache_key(user_id))
+    if entry is None:
+        row = _user_queryset(user_id).first()
+        if row is None:
+            return None
+        entry = _cache_entry(row)
+        set_versioned(user_cache_key(user_id), version, entry, user_cache_timeout())
+    return _cached_user(entry)
+
+
+async def aload_user(user_id) -> Optional[User]:
+    """
+    load_user() for async views.
+    """
+    version, entry = await aget_versioned("auth", user_id, user_cache_key(user_id))
+    if entry is None:
+        row = await _user_queryset(user_id).afirst()
+        if row is None:
+            return None
+        entry = _cache_entry(row)
+        await aset_versioned(
+            user_cache_key(user_id), version, entry, user_cache_timeout()
+        )
+    return _cached_user(entry)
+
+
+def invalidate_user(*user_ids) -> None:
+    """
+    Invalidate the cached rows of the given users, now and once the
+    current transaction commits: a request reading the row in between
+    still sees the old one.
+    """
+    if user_ids:
+        bump_version("auth", *user_ids)
+        transaction.on_commit(lambda: bump_version("auth", *user_ids))
+
+
+# ---------- Token checks ----------
+
+def token_user_id(token):
+    try:
+        return token[jwt_settings.api_settings.USER_ID_CLAIM]
+    except KeyError as e:
+        raise InvalidToken(
+            _("Token contained no recognizable user identification")
+        ) from e
+
+
+def check_user(user: Optional[User], token) -> User:
+    """
+    The checks simplejwt's JWTAuthentication.get_user() runs on the
+    user it loaded, for users returned by load_user().
+    """
+    if user is None:
+        raise AuthenticationFailed(_("User not found"), code="user_not_found")
+    if jwt_settings.api_settings.CHECK_USER_IS_ACTIVE and not user.is_active:
+        raise AuthenticationFailed(_("User is inactive"), code="user_inactive")
+    if jwt_settings.api_settings.CHECK_REVOKE_TOKEN and token.get(
+        jwt_settings.api_settings.REVOKE_TOKEN_CLAIM
+    ) != user.password_hash:
+        raise AuthenticationFailed(
+            _("The user's password has been changed."), code="password_changed"
+        )
+    return user
+
+
+def uses_token_claims(request) -> bool:
+    """
+    Whether the request is authenticated from token claims alone.
+    """
+    return request.method in SAFE_METHODS and getattr(
+        settings, "CHATS_JWT_STATELESS_READS", False
+    )
+
+
+def claim_user(token) -> User:
+    """
+    A User built from the token's user id, without a query. Only its
+    primary key is meaningful: enough for the read endpoints, which
+    filter on request.user.
+    """
+    user = User(**{jwt_settings.api_settings.USER_ID_FIELD: token_user_id(token)})
+    user._state.adding = False
+    user._state.db = DEFAULT_DB_ALIAS
+    return user
+
+
+class CachedJWTAuthentication(JWTAuthentication):
+    """
+    JWTAuthentication reading users through the shared cache, or from
+    the token claims alone on safe methods when
+    settings.CHATS_JWT_STATELESS_READS is set.
+    """
+
+    def authenticate(self, request):
+        header = self.get_header(request)
+        if header is None:
+            return None
+        raw_token = self.get_raw_token(header)
+        if raw_token is None:
+            return None
+        validated_token = self.get_validated_token(raw_token)
+        if uses_token_claims(request):
+            return claim_user(validated_token), validated_token
+        return self.get_user(validated_token), validated_token
+
+    def get_user(self, validated_token) -> User:
+        return check_user(load_user(token_user_id(validated_token)), validated_token)
@@ -0,0 +1,426 @@
+"""
+MessagePack rendering and parsing of the API.
+
+Clients sending "Accept: application/msgpack" (or ?format=msgpack, or a
+.msgpack suffix) get responses encoded as MessagePack instead of JSON,
+and requests with "Content-Type: application/msgpack" are parsed from it.
+
+UUIDs and datetimes are encoded as fixed-width binary rather than text:
+
+- UUID:      ext type 1, the 16 bytes of the UUID (fixext 16)
+- datetime:  the standard timestamp extension (type -1): 32 bit for
+             whole seconds from 1970 to 2106, 64 bit (seconds and
+             nanoseconds since the epoch, 1970 to 2514), or 96 bit outside
+             that range; decoded as UTC datetimes
+
+For that to pay off the read path must hand the renderer the values
+themselves: the negotiated renderer's native_values flag is published to
+serializers for the duration of the request (NativeValuesMixin,
+uses_native_values()), and they skip formatting ids and timestamps as
+text. Other responses still encode them as strings.
+
+The C extension of the msgpack package is used when it is installed; a
+pure-Python codec producing the same bytes is the fallback.
+"""
+import struct
+from contextvars import ContextVar, Token
+from datetime import date, datetime, time, timedelta, timezone
+from decimal import Decimal
+from typing import Optional, Tuple
+from uuid import UUID
+
+from django.utils.functional import Promise
+from rest_framework.exceptions import ParseError
+from rest_framework.parsers import BaseParser
+from rest_framework.renderers import BaseRenderer
+
+try:
+    import msgpack
+except ImportError:  # pragma: no cover - depends on the environment
+    msgpack = None
+
+MEDIA_TYPE = "application/msgpack"
+
+UUID_EXT = 1
+TIMESTAMP_EXT = -1
+
+_EPOCH = datetime(1970, 1, 1, tzinfo=timezone.utc)
+_TIMESTAMP32_SECONDS = 1 << 32
+_TIMESTAMP64_SECONDS = 1 << 34
+
+
+# ---------- Native values ----------
+
+_native_values: ContextVar[bool] = ContextVar("chats_native_values", default=False)
+
+
+def uses_native_values() -> bool:
+    """
+    Whether the response being built is rendered by a renderer encoding
+    UUIDs and datetimes itself, so serializers should not format them.
+    """
+    return _native_values.get()
+
+
+def begin_native_values(enabled: bool) -> Token:
+    """
+    Publish the native_values flag of a response's renderer.
+    Returns the token to pass to end_native_values().
+    """
+    return _native_values.set(enabled)
+
+
+def end_native_values(token: Token) -> None:
+    _native_values.reset(token)
+
+
+class NativeValuesMixin:
+    """
+    APIView mixin publishing the native_values flag of the negotiated
+    renderer while the view builds its response.
+    """
+
+    def initial(self, request, *args, **kwargs) -> None:
+        super().initial(request, *args, **kwargs)
+        self._native_values_token = begin_native_values(
+            getattr(request.accepted_renderer, "native_values", False)
+        )
+
+    def finalize_response(self, request, response, *args, **kwargs):
+        token = getattr(self, "_native_values_token", None)
+        if token is not None:
+            end_native_values(token)
+            self._native_values_token = None
+        return super().finalize_response(request, response, *args, **kwargs)
+
+
+# ---------- Extension types ----------
+
+def _timestamp_parts(value: datetime) -> Tuple[int, int]:
+    # (seconds, nanoseconds) since the epoch, naive datetimes being UTC.
+    if value.tzinfo is None:
+        value = value.replace(tzinfo=timezone.utc)
+    delta = value - _EPOCH
+    return delta.days * 86400 + delta.seconds, delta.microseconds * 1000
+
+
+def _timestamp(value: datetime) -> bytes:
+    seconds, nanoseconds = _timestamp_parts(value)
+    if nanoseconds == 0 and 0 <= seconds < _TIMESTAMP32_SECONDS:
+        return seconds.to_bytes(4, "big")
+    if 0 <= seconds < _TIMESTAMP64_SECONDS:
+        return ((nanoseconds << 34) | seconds).to_bytes(8, "big")
+    return struct.pack(">Iq", nanoseconds, seconds)
+
+
+def _from_timestamp(data: bytes) -> datetime:
+    if len(data) == 4:
+        seconds, nanoseconds = int.from_bytes(data, "big"), 0
+    elif len(data) == 8:
+        value = int.from_bytes(data, "big")
+        seconds, nanoseconds = value & (_TIMESTAMP64_SECONDS - 1), value >> 34
+    elif len(data) == 12:
+        nanoseconds, seconds = struct.unpack(">Iq", data)
+    else:
+        raise ValueError("Invalid timestamp.")
+    return _EPOCH + timedelta(seconds=seconds, microseconds=nanoseconds // 1000)
+
+
+def _to_ext(value) -> Optional[Tuple[int, bytes]]:
+    if isinstance(value, UUID):
+        return UUID_EXT, value.bytes
+    if isinstance(value, datetime):
+        return TIMESTAMP_EXT, _timestamp(value)
+    return None
+
+
+def _from_ext(code: int, data: bytes):
+    if code == UUID_EXT and len(data) == 16:
+        return UUID(bytes=bytes(data))
+    if code == TIMESTAMP_EXT:
+        return _from_timestamp(data)
+    raise ValueError(f"Unsupported extension type {code}.")
+
+
+def _coerce(value):
+    """
+    Encodable stand-in for values MessagePack has no type for, as DRF's
+    JSON encoder converts them.
+    """
+    if isinstance(value, Promise):
+        return str(value)
+    if isinstance(value, Decimal):
+        return str(value)
+    if isinstance(value, (date, time)):
+        return value.isoformat()
+    if isinstance(value, timedelta):
+        return str(value.total_seconds())
+    if hasattr(value, "__iter__") and not isinstance(value, (str, bytes, dict)):
+        return list(value)
+    raise TypeError(f"Cannot encode {type(value).__name__} as MessagePack.")
+
+
+# ---------- Pure-Python codec ----------
+
+def _pack_header(out: bytearray, size: int, fix: int, fix_limit: int, codes: bytes) -> None:
+    # Size header of str/bin/array/map: a fix form, then 8/16/32 bit
+    # lengths (codes lists the markers of the sized forms, smallest first).
+    if size < fix_limit:
+        out.append(fix | size)
+        return
+    widths = (1, 2, 4)[-len(codes):]
+    for code, width in zip(codes, widths):
+        if size < 1 << (8 * width):
+            out.append(code)
+            out += size.to_bytes(width, "big")
+            return
+    raise ValueError("Object too large for MessagePack.")
+
+
+# (marker, struct format, bound) of the sized integer forms.
+_UINTS = ((0xCC, ">B", 1 << 8), (0xCD, ">H", 1 << 16), (0xCE, ">I", 1 << 32), (0xCF, ">Q", 1 << 64))
+_INTS = ((0xD0, ">b", 1 << 7), (0xD1, ">h", 1 << 15), (0xD2, ">i", 1 << 31), (0xD3, ">q", 1 << 63))
+
+
+def _pack_int(out: bytearray, value: int) -> None:
+    if 0 <= value < 0x80:
+        out.append(value)
+        return
+    if -0x20 <= value < 0:
+        out.append(value & 0xFF)
+        return
+    for code, fmt, bound in _UINTS if value >= 0 else _INTS:
+        if (value < bound) if value >= 0 else (value >= -bound):
+            out.append(code)
+            out += struct.pack(fmt, value)
+            return
+    raise OverflowError("Integer out of MessagePack range.")
+
+
+_FIXEXT = {1: 0xD4, 2: 0xD5, 4: 0xD6, 8: 0xD7, 16: 0xD8}
+
+
+def _pack_ext(out: bytearray, code: int, data: bytes) -> None:
+    fixext = _FIXEXT.get(len(data))
+    if fixext is not None:
+        out.append(fixext)
+    else:
+        _pack_header(out, len(data), 0, 0, b"\xc7\xc8\xc9")
+    out += struct.pack(">b", code)
+    out += data
+
+
+def _pack(out: bytearray, value) -> None:
+    kind = type(value)
+    if kind is str or isinstance(value, str):
+        data = value.encode("utf-8")
+        _pack_header(out, len(data), 0xA0, 32, b"\xd9\xda\xdb")
+        out += data
+    elif value is None:
+        out.append(0xC0)
+    elif kind is bool:
+        out.append(0xC3 if value else 0xC2)
+    elif kind is int or isinstance(value, int):
+        _pack_int(out, int(value))
+    elif kind is float or isinstance(value, float):
+        out.append(0xCB)
+        out += struct.pack(">d", value)
+    elif isinstance(value, dict):
+        _pack_header(out, len(value), 0x80, 16, b"\xde\xdf")
+        for key, item in value.items():
+            _pack(out, key)
+            _pack(out, item)
+    elif isinstance(value, (list, tuple)):
+        _pack_header(out, len(value), 0x90, 16, b"\xdc\xdd")
+        for item in value:
+            _pack(out, item)
+    elif isinstance(value, (bytes, bytearray, memoryview)):
+        data = bytes(value)
+        _pack_header(out, len(data), 0, 0, b"\xc4\xc5\xc6")
+        out += data
+    else:
+        ext = _to_ext(value)
+        if ext is not None:
+            _pack_ext(out, *ext)
+        else:
+            _pack(out, _coerce(value))
+
+
+def _py_packb(value) -> bytes:
+    out = bytearray()
+    _pack(out, value)
+    return bytes(out)
+
+
+# Markers of the sized forms: marker -> (kind, size prefix format).
+_SIZED = {
+    0xC4: ("bin", ">B"), 0xC5: ("bin", ">H"), 0xC6: ("bin", ">I"),
+    0xC7: ("ext", ">B"), 0xC8: ("ext", ">H"), 0xC9: ("ext", ">I"),
+    0xD9: ("text", ">B"), 0xDA: ("text", ">H"), 0xDB: ("text", ">I"),
+    0xDC: ("array", ">H"), 0xDD: ("array", ">I"),
+    0xDE: ("map", ">H"), 0xDF: ("map", ">I"),
+}
+
+# Markers of numbers: marker -> struct format.
+_NUMBERS = {
+    0xCA: ">f", 0xCB: ">d",
+    0xCC: ">B", 0xCD: ">H", 0xCE: ">I", 0xCF: ">Q",
+    0xD0: ">b", 0xD1: ">h", 0xD2: ">i", 0xD3: ">q",
+}
+
+_CONSTANTS = {0xC0: None, 0xC2: False, 0xC3: True}
+
+
+class _Reader:
+    """
+    Decoder of one MessagePack document.
+    """
+
+    def __init__(self, data: bytes) -> None:
+        self.data = data
+        self.pos = 0
+
+    def take(self, size: int) -> bytes:
+        end = self.pos + size
+        if end > len(self.data):
+            raise ValueError("Truncated MessagePack data.")
+        chunk = self.data[self.pos:end]
+        self.pos = end
+        return chunk
+
+    def number(self, fmt: str):
+        return struct.unpack(fmt, self.take(struct.calcsize(fmt)))[0]
+
+    def read(self):
+        code = self.take(1)[0]
+        if code <= 0x7F:
+            return code
+        if code >= 0xE0:
+            return code - 0x100
+        if code <= 0x8F:
+            return self.map(code & 0x0F)
+        if code <= 0x9F:
+            return self.array(code & 0x0F)
+        if code <= 0xBF:
+            return self.text(code & 0x1F)
+        if code in _CONSTANTS:
+            return _CONSTANTS[code]
+        if code in _NUMBERS:
+            return self.number(_NUMBERS[code])
+        if 0xD4 <= code <= 0xD8:
+            # fixext 1, 2, 4, 8, 16
+            return self.ext(1 << (code - 0xD4))
+        if code in _SIZED:
+            kind, fmt = _SIZED[code]
+            return getattr(self, kind)(self.number(fmt))
+        raise ValueError(f"Invalid MessagePack marker 0x{code:02x}.")
+
+    def bin(self, size: int) -> bytes:
+        return self.take(size)
+
+    def text(self, size: int) -> str:
+        return self.take(size).decode("utf-8")
+
+    def array(self, size: int) -> list:
+        return [self.read() for _ in range(size)]
+
+    def map(self, size: int) -> dict:
+        result = {}
+        for _ in range(size):
+            key = self.read()
+            result[key] = self.read()
+        return result
+
+    def ext(self, size: int):
+        code = self.number(">b")
+        return _from_ext(code, self.take(size))
+
+
+def _py_unpackb(data: bytes):
+    reader = _Reader(bytes(data))
+    value = reader.read()
+    if reader.pos != len(reader.data):
+        raise ValueError("Extra data after the MessagePack document.")
+    return value
+
+
+# ---------- Codec ----------
+
+def _default(value):
+    # msgpack.ExtType only takes application types (0 to 127): the
+    # predefined timestamp type goes through msgpack.Timestamp.
+    if isinstance(value, datetime):
+        return msgpack.Timestamp(*_timestamp_parts(value))
+    ext = _to_ext(value)
+    if ext is not None:
+        return msgpack.ExtType(*ext)
+    return _coerce(value)
+
+
+def _ext_hook(code: int, data: bytes):
+    return _from_ext(code, data)
+
+
+def packb(value) -> bytes:
+    """
+    Encode a value (JSON-like data, UUIDs, datetimes) as MessagePack.
+    """
+    if msgpack is not None:
+        return msgpack.packb(value, default=_default, use_bin_type=True)
+    return _py_packb(value)
+
+
+def unpackb(data: bytes):
+    """
+    Decode a MessagePack document. Raises ValueError on invalid data.
+    """
+    try:
+        if msgpack is not None:
+            # Maps may be keyed by UUIDs (side-loads), as in the fallback.
+            return msgpack.unpackb(
+                data, ext_hook=_ext_hook, timestamp=3, raw=False, strict_map_key=False
+            )
+        return _py_unpackb(data)
+    except ValueError:
+        raise
+    except Exception as exc:  # truncated data, struct and recursion errors
+        raise ValueError(str(exc) or type(exc).__name__) from exc
+
+
+# Name of the codec in use, for benchmarks and diagnostics.
+BACKEND = "msgpack" if msgpack is not None else "pure-python"
+
+
+# ---------- Renderer / parser ----------
+
+class MessagePackRenderer(BaseRenderer):
+    """
+    Renders responses as MessagePack, with UUIDs and datetimes as
+    extension types.
+    """
+
+    media_type = MEDIA_TYPE
+    format = "msgpack"
+    charset = None
+    render_style = "binary"
+    # Serializers leave UUIDs and datetimes unformatted (see above).
+    native_values = True
+
+    def render(self, data, accepted_media_type=None, renderer_context=None) -> bytes:
+        if data is None:
+            return b""
+        return packb(data)
+
+
+class MessagePackParser(BaseParser):
+    """
+    Parses MessagePack request bodies.
+    """
+
+    media_type = MEDIA_TYPE
+
+    def parse(self, stream, media_type=None, parser_context=None):
+        try:
+            return unpackb(stream.read())
+        except ValueError as exc:
+            raise ParseError(f"MessagePack parse error - {exc}")
@@ -0,0 +1,114 @@
+from hashlib import sha1
+from typing import Iterable, Optional, Tuple
+
+from django.utils.cache import get_conditional_response, patch_vary_headers
+from django.utils.http import http_date, quote_etag
+from rest_framework.response import Response
+
+from .cache import get_cache
+
+# (etag, last_modified timestamp in seconds)
+Validators = Tuple[str, int]
+
+# Lifetime of cached first pages. Entries never go stale before that:
+# their key is the ETag, which changes whenever the content does.
+PAGE_CACHE_TIMEOUT = 300
+
+# Query parameters that select a page other than the first one.
+PAGE_QUERY_PARAMS = ("cursor", "page")
+
+
+def build_validators(request, parts: Iterable, last_modified) -> Validators:
+    """
+    Derive an ETag from cheap aggregates plus the requesting user, the
+    absolute URL (pagination, filters, and the scheme and host of the
+    next / previous links of cached pages) and the negotiated media type
+    (JSON and MessagePack variants, see chats.binary), and a
+    Last-Modified timestamp.
+
+    Hashing the media type rather than the Accept header lets every
+    client negotiating the same format share the cached pages.
+    """
+    digest = sha1(usedforsecurity=False)
+    media_type = request.accepted_renderer.media_type
+    for part in (request.user.pk, request.build_absolute_uri(), media_type, *parts):
+        digest.update(str(part).encode())
+        digest.update(b"\0")
+    return quote_etag(digest.hexdigest()), int(last_modified)
+
+
+def set_validator_headers(response, validators: Validators) -> None:
+    etag, last_modified = validators
+    response["ETag"] = etag
+    response["Last-Modified"] = http_date(last_modified)
+    response["Cache-Control"] = "private, no-cache"
+    patch_vary_headers(response, ("Accept", "Authorization", "Cookie"))
+
+
+def page_cache_key(etag: str) -> str:
+    return "chats:page:" + etag.strip('"')
+
+
+def not_modified_response(request, validators: Validators):
+    """
+    304 response when the client's If-None-Match / If-Modified-Since
+    still match the validators, else None.
+    """
+    etag, last_modified = validators
+    response = get_conditional_response(request, etag=etag, last_modified=last_modified)
+    if response is not None:
+        set_validator_headers(response, validators)
+    return response
+
+
+def shared_page_key(request, validators: Validators) -> Optional[str]:
+    """
+    Shared cache key of the requested page, None for pages that are not
+    cached (only first pages are).
+    """
+    if any(param in request.query_params for param in PAGE_QUERY_PARAMS):
+        return None
+    return page_cache_key(validators[0])
+
+
+class ConditionalListMixin:
+    """
+    Conditional GET and shared page caching for list actions.
+
+    Views implement get_list_validators(), which must be cheap (at most
+    one small indexed query).
+
+    - When the client's If-None-Match / If-Modified-Since still matches,
+      a 304 is returned without building the queryset or serializing.
+    - Otherwise first pages are served from the shared cache, keyed by
+      the ETag: any change to the underlying data changes the key, so
+      invalidation is O(1) and a stale page is never returned.
+    """
+
+    def get_list_validators(self) -> Optional[Validators]:
+        return None
+
+    def list(self, request, *args, **kwargs):
+        validators = self.get_list_validators()
+        if validators is None:
+            return super().list(request, *args, **kwargs)
+
+        not_modified = not_modified_response(request, validators)
+        if not_modified is not None:
+            return not_modified
+
+        cache = get_cache()
+        key = shared_page_key(request, validators)
+        if key is not None:
+            data = cache.get(key)
+            if data is not None:
+                response = Response(data)
+                set_validator_headers(response, validators)
+                return response
+
+        response = super().list(request, *args, **kwargs)
+        if response.status_code == 200:
+            if key is not None:
+                cache.set(key, response.data, PAGE_CACHE_TIMEOUT)
+            set_validator_headers(response, validators)
+        return response
@@ -0,0 +1,16 @@
+from django.db.backends.mysql.base import DatabaseWrapper as MySQLDatabaseWrapper
+
+from chats.db.backends.pooling import PooledDatabaseWrapperMixin
+
+
+class DatabaseWrapper(PooledDatabaseWrapperMixin, MySQLDatabaseWrapper):
+    """
+    MySQL with pooled connections (USE_DOCKER_DB profile).
+    """
+
+    def check_pooled_connection(self, connection) -> bool:
+        try:
+            connection.ping()
+        except self.Database.Error:
+            return False
+        return True
@@ -0,0 +1,63 @@
+from chats.db.pool import DEFAULTS, ConnectionPool, PoolTimeout, get_pool
+
+
+class PooledDatabaseWrapperMixin:
+    """
+    DatabaseWrapper mixin taking connections from a per-process
+    ConnectionPool (see chats.db.pool) instead of opening a new one
+    for every request.
+
+    Django still "closes" the connection at the end of each request
+    (CONN_MAX_AGE = 0); closing hands it back to the pool after rolling
+    back anything left open. Connections closed inside an atomic block or
+    after a failed health check are really closed.
+    """
+
+    def get_pool(self) -> ConnectionPool:
+        def create_pool() -> ConnectionPool:
+            options = {**DEFAULTS, **self.settings_dict.get("POOL", {})}
+            return ConnectionPool(
+                check=self.check_pooled_connection,
+                max_size=options["MAX_SIZE"],
+                timeout=options["TIMEOUT"],
+                idle_timeout=options["IDLE_TIMEOUT"],
+                max_lifetime=options["MAX_LIFETIME"],
+                check_interval=options["CHECK_INTERVAL"],
+            )
+
+        return get_pool(self.alias, create_pool)
+
+    def get_new_connection(self, conn_params):
+        try:
+            return self.get_pool().acquire(
+                lambda: super(PooledDatabaseWrapperMixin, self).get_new_connection(
+                    conn_params
+                )
+            )
+        except PoolTimeout as exc:
+            raise self.Database.OperationalError(str(exc)) from exc
+
+    def check_pooled_connection(self, connection) -> bool:
+        try:
+            cursor = connection.cursor()
+            try:
+                cursor.execute("SELECT 1")
+                cursor.fetchall()
+            finally:
+                cursor.close()
+        except self.Database.Error:
+            return False
+        return True
+
+    def _close(self):
+        if self.connection is None:
+            return
+        reusable = not self.in_atomic_block
+        if reusable:
+            try:
+                self.connection.rollback()
+            except self.Database.Error:
+                reusable = False
+        if reusable and self.errors_occurred:
+            reusable = self.check_pooled_connection(self.connection)
+        self.get_pool().release(self.connection, reusable=reusable)
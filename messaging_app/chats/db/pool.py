@@ -0,0 +1,279 @@
+"""
+Bounded per-process pool of database connections.
+
+Django 4.2 has no connection pool: with CONN_MAX_AGE = 0 every request
+opens a new connection, and persistent connections (CONN_MAX_AGE > 0) are
+pinned to one thread each, unbounded. The backends in chats.db.backends
+check a DB-API connection out of a ConnectionPool in get_new_connection()
+and give it back when Django closes the connection (end of request).
+
+- at most MAX_SIZE connections per process and alias; when all are in
+  use, checkouts wait up to TIMEOUT seconds, then fail
+- idle connections are closed after IDLE_TIMEOUT seconds, and every
+  connection is recycled after MAX_LIFETIME seconds
+- connections idle for more than CHECK_INTERVAL seconds are health
+  checked before being handed out
+- checkouts, waits and wait times are counted (ConnectionPool.stats())
+
+Configured with a "POOL" entry next to ENGINE in DATABASES:
+
+    DATABASES["default"] = {
+        "ENGINE": "chats.db.backends.mysql",
+        ...,
+        "POOL": {"MAX_SIZE": 10, "TIMEOUT": 30, "IDLE_TIMEOUT": 300},
+    }
+"""
+import logging
+import os
+import threading
+import time
+from collections import deque
+from typing import Callable, Dict, Optional
+
+logger = logging.getLogger(__name__)
+
+DEFAULTS = {
+    "MAX_SIZE": 10,
+    "TIMEOUT": 30.0,
+    "IDLE_TIMEOUT": 300.0,
+    "MAX_LIFETIME": 3600.0,
+    "CHECK_INTERVAL": 30.0,
+}
+
+
+class PoolTimeout(Exception):
+    """
+    No connection became available within the pool timeout.
+    """
+
+
+class PooledConnection:
+    __slots__ = ("connection", "created_at", "released_at")
+
+    def __init__(self, connection) -> None:
+        self.connection = connection
+        self.created_at = self.released_at = time.monotonic()
+
+
+class ConnectionPool:
+    """
+    Thread-safe pool of DB-API connections.
+
+    connect() opens a new connection (it can also be given to acquire()),
+    check(connection) tells whether a connection still works and
+    close(connection) closes one.
+    """
+
+    def __init__(
+        self,
+        connect: Optional[Callable] = None,
+        check: Callable = lambda connection: True,
+        close: Callable = lambda connection: connection.close(),
+        max_size: int = DEFAULTS["MAX_SIZE"],
+        timeout: float = DEFAULTS["TIMEOUT"],
+        idle_timeout: Optional[float] = DEFAULTS["IDLE_TIMEOUT"],
+        max_lifetime: Optional[float] = DEFAULTS["MAX_LIFETIME"],
+        check_interval: float = DEFAULTS["CHECK_INTERVAL"],
+    ) -> None:
+        self.connect = connect
+        self.check = check
+        self.close_connection = close
+        self.max_size = max_size
+        self.timeout = timeout
+        self.idle_timeout = idle_timeout
+        self.max_lifetime = max_lifetime
+        self.check_interval = check_interval
+
+        self._condition = threading.Condition()
+        # Most recently released last, so hot connections are reused first
+        # and the others reach the idle timeout.
+        self._idle = deque()
+        self._in_use = {}
+        self._size = 0
+        self._stats = {
+            "checkouts": 0,
+            "created": 0,
+            "closed": 0,
+            "waits": 0,
+            "wait_time": 0.0,
+            "max_wait_time": 0.0,
+            "timeouts": 0,
+            "failed_checks": 0,
+        }
+
+    # ---------- Checkout / return ----------
+
+    def acquire(self, connect: Optional[Callable] = None):
+        """
+        Check a connection out, opening one when the pool is not full.
+        Raises PoolTimeout when none is available within the timeout.
+        """
+        started = time.monotonic()
+        waited = False
+        with self._condition:
+            while True:
+                self._close_expired()
+                if self._idle:
+                    entry = self._idle.pop()
+                    break
+                if self._size < self.max_size:
+                    # Reserve the slot; the connection is opened unlocked.
+                    self._size += 1
+                    entry = None
+                    break
+
+                if not waited:
+                    waited = True
+                    self._stats["waits"] += 1
+                remaining = started + self.timeout - time.monotonic()
+                if remaining <= 0 or not self._condition.wait(remaining):
+                    self._stats["timeouts"] += 1
+                    self._record_wait(started)
+                    logger.warning(
+                        "No database connection available after %.1fs "
+                        "(%d in use).",
+                        self.timeout,
+                        len(self._in_use),
+                    )
+                    raise PoolTimeout(
+                        f"No connection available within {self.timeout}s."
+                    )
+            if waited:
+                self._record_wait(started)
+
+        if entry is not None and not self._is_healthy(entry):
+            # Keep the slot and replace the broken connection.
+            self._safe_close(entry)
+            with self._condition:
+                self._stats["closed"] += 1
+            entry = None
+
+        if entry is None:
+            try:
+                entry = PooledConnection((connect or self.connect)())
+            except BaseException:
+                with self._condition:
+                    self._size -= 1
+                    self._condition.notify()
+                raise
+            with self._condition:
+                self._stats["created"] += 1
+
+        with self._condition:
+            self._stats["checkouts"] += 1
+            self._in_use[id(entry.connection)] = entry
+        return entry.connection
+
+    def release(self, connection, reusable: bool = True) -> None:
+        """
+        Give a connection back. Connections that are not reusable
+        (broken, in an unknown state) are closed instead.
+        """
+        with self._condition:
+            entry = self._in_use.pop(id(connection), None)
+            if entry is None:
+                return
+            if reusable and not self._expired(entry, time.monotonic()):
+                entry.released_at = time.monotonic()
+                self._idle.append(entry)
+                self._condition.notify()
+                return
+        self._discard(entry)
+
+    def close_all(self) -> None:
+        """
+        Close every idle connection.
+        """
+        with self._condition:
+            entries = list(self._idle)
+            self._idle.clear()
+        for entry in entries:
+            self._discard(entry)
+
+    # ---------- Metrics ----------
+
+    def stats(self) -> Dict[str, float]:
+        with self._condition:
+            return {
+                **self._stats,
+                "size": self._size,
+                "idle": len(self._idle),
+                "in_use": len(self._in_use),
+                "max_size": self.max_size,
+            }
+
+    # ---------- Helpers ----------
+
+    def _record_wait(self, waited_since: float) -> None:
+        waited = time.monotonic() - waited_since
+        self._stats["wait_time"] += waited
+        self._stats["max_wait_time"] = max(self._stats["max_wait_time"], waited)
+
+    def _expired(self, entry: PooledConnection, now: float) -> bool:
+        return self.max_lifetime is not None and (
+            now - entry.created_at >= self.max_lifetime
+        )
+
+    def _close_expired(self) -> None:
+        # Called with the lock held; idle entries are ordered by release time.
+        now = time.monotonic()
+        while self._idle and (
+            self._expired(self._idle[0], now)
+            or (
+                self.idle_timeout is not None
+                and now - self._idle[0].released_at >= self.idle_timeout
+            )
+        ):
+            entry = self._idle.popleft()
+            self._size -= 1
+            self._stats["closed"] += 1
+            self._safe_close(entry)
+
+    def _is_healthy(self, entry: PooledConnection) -> bool:
+        if time.monotonic() - entry.released_at < self.check_interval:
+            return True
+        if self.check(entry.connection):
+            return True
+        with self._condition:
+            self._stats["failed_checks"] += 1
+        return False
+
+    def _discard(self, entry: PooledConnection) -> None:
+        with self._condition:
+            self._size -= 1
+            self._stats["closed"] += 1
+            self._condition.notify()
+        self._safe_close(entry)
+
+    def _safe_close(self, entry: PooledConnection) -> None:
+        try:
+            self.close_connection(entry.connection)
+        except Exception:
+            logger.debug("Error closing a pooled connection.", exc_info=True)
+
+
+# Pools of this process, by database alias. Rebuilt after a fork: a
+# child must not reuse the sockets of its parent.
+_pools: Dict[str, ConnectionPool] = {}
+_pools_pid = None
+_pools_lock = threading.Lock()
+
+
+def get_pool(alias: str, factory: Callable[[], ConnectionPool]) -> ConnectionPool:
+    global _pools_pid
+    with _pools_lock:
+        if _pools_pid != os.getpid():
+            _pools.clear()
+            _pools_pid = os.getpid()
+        if alias not in _pools:
+            _pools[alias] = factory()
+        return _pools[alias]
+
+
+def pool_stats() -> Dict[str, Dict[str, float]]:
+    """
+    Metrics of every pool of this process, by database alias.
+    """
+    with _pools_lock:
+        pools = dict(_pools) if _pools_pid == os.getpid() else {}
+    return {alias: pool.stats() for alias, pool in pools.items()}
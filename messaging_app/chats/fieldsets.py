@@ -0,0 +1,335 @@
+"""
+Sparse fieldsets: ?fields= and ?expand=.
+
+Read endpoints accept
+
+    ?fields=message_id,sent_at,message_body     only these fields
+    ?fields=message_id,sender.email             dotted paths select fields
+                                                of a related object (and
+                                                expand it)
+    ?expand=sender                              nested object instead of
+                                                its id
+
+Without either parameter responses keep their default shape, with their
+default relations (e.g. a message's sender) nested. Once one is given,
+relations are rendered as ids unless expanded, so a client only pays for
+what it names.
+
+A Shape describes what a resource can render: its fields with the model
+columns each one reads, and its relations. From a Fieldset it builds
+both the renderer (one dict per object, fields resolved once per
+request rather than per object) and the queryset projection: only() the
+columns read, select_related() / prefetch_related() only the expanded
+relations, so unrequested columns and joins are never fetched.
+"""
+from typing import Any, Callable, Dict, FrozenSet, Iterable, List, Optional, Tuple, Union
+
+from django.db.models import Prefetch, QuerySet
+from rest_framework import serializers
+from rest_framework.exceptions import ValidationError
+
+FIELDS_PARAM = "fields"
+EXPAND_PARAM = "expand"
+
+Renderer = Callable[[Any], Dict[str, Any]]
+
+
+def _split(value: str) -> FrozenSet[str]:
+    return frozenset(part.strip() for part in value.split(",") if part.strip())
+
+
+class Fieldset:
+    """
+    Fields and expansions requested for one resource, as dotted paths
+    relative to it. fields is None when every field is requested.
+    """
+
+    def __init__(self, fields: Optional[Iterable[str]] = None, expand: Iterable[str] = ()) -> None:
+        self.fields = None if fields is None else frozenset(fields)
+        self.expand = frozenset(expand)
+
+    @classmethod
+    def from_request(cls, request) -> Optional["Fieldset"]:
+        """
+        The fieldset of ?fields= / ?expand=, or None when neither is given.
+        """
+        params = request.query_params
+        if FIELDS_PARAM not in params and EXPAND_PARAM not in params:
+            return None
+        fields = params.get(FIELDS_PARAM)
+        return cls(
+            None if fields is None else _split(fields),
+            _split(params.get(EXPAND_PARAM, "")),
+        )
+
+    def top_level(self, paths: FrozenSet[str]) -> FrozenSet[str]:
+        return frozenset(path.split(".", 1)[0] for path in paths)
+
+    def includes(self, name: str) -> bool:
+        return self.fields is None or name in self.top_level(self.fields)
+
+    def expands(self, name: str) -> bool:
+        """
+        Whether a relation is rendered as an object: expanded, or with
+        fields selected by dotted paths.
+        """
+        prefix = name + "."
+        return name in self.top_level(self.expand) or any(
+            path.startswith(prefix) for path in self.fields or ()
+        )
+
+    def nested(self, name: str) -> "Fieldset":
+        """
+        The fieldset of an expanded relation.
+        """
+        prefix = name + "."
+
+        def strip(paths):
+            return [path[len(prefix):] for path in paths if path.startswith(prefix)]
+
+        fields = strip(self.fields or ())
+        return Fieldset(fields or None, strip(self.expand))
+
+
+class Relation:
+    """
+    A related object (or list of them, many=True) of a Shape.
+
+    - shape:    Shape of the related object
+    - id_of:    its id as rendered when not expanded
+    - column:   column holding the id (a foreign key), None for many
+    - default:  expanded when the request has no fieldset
+    """
+
+    def __init__(
+        self,
+        shape: "Shape",
+        id_of: Callable[[Any], Any],
+        column: Optional[str] = None,
+        many: bool = False,
+        default: bool = True,
+    ) -> None:
+        self.shape = shape
+        self.id_of = id_of
+        self.column = column
+        self.many = many
+        self.default = default
+
+
+class Shape:
+    """
+    Renderable fields of a resource, in their default order.
+
+    - fields:   name -> Relation, or (columns read, getter of the
+                rendered value)
+    - required: columns always loaded (primary key, pagination keys,
+                permission checks)
+    """
+
+    def __init__(
+        self,
+        fields: Dict[str, Union[Relation, Tuple[Tuple[str, ...], Callable[[Any], Any]]]],
+        required: Tuple[str, ...] = (),
+    ) -> None:
+        self.fields = fields
+        self.names = tuple(fields)
+        self.relations = {
+            name: field for name, field in fields.items() if isinstance(field, Relation)
+        }
+        self.required = required
+
+    def validate(self, fieldset: Fieldset) -> None:
+        """
+        Raise a ValidationError (400) naming unknown fields and relations.
+        """
+        errors = {}
+        unknown = sorted(
+            name for name in fieldset.top_level(fieldset.fields or ()) if name not in self.names
+        )
+        if unknown:
+            errors[FIELDS_PARAM] = [
+                f"Unknown field: {name}. Choose from: {', '.join(self.names)}."
+                for name in unknown
+            ]
+        unknown = sorted(
+            name
+            for name in fieldset.top_level(fieldset.expand)
+            if name not in self.relations
+        )
+        if unknown:
+            errors[EXPAND_PARAM] = [
+                f"Cannot expand {name}. Choose from: {', '.join(self.relations)}."
+                for name in unknown
+            ]
+        if errors:
+            raise ValidationError(errors)
+        for name, relation in self.relations.items():
+            if fieldset.includes(name) and fieldset.expands(name):
+                relation.shape.validate(fieldset.nested(name))
+
+    def _expanded(self, fieldset: Optional[Fieldset]) -> Dict[str, Optional[Fieldset]]:
+        # Expanded relations and their nested fieldsets (None: default).
+        if fieldset is None:
+            return {
+                name: None for name, relation in self.relations.items() if relation.default
+            }
+        return {
+            name: fieldset.nested(name)
+            for name in self.relations
+            if fieldset.includes(name) and fieldset.expands(name)
+        }
+
+    def renderer(self, fieldset: Optional[Fieldset]) -> Renderer:
+        """
+        Function rendering one object with the given fields.
+        """
+        expanded = self._expanded(fieldset)
+        getters: List[Tuple[str, Callable[[Any], Any]]] = []
+        for name in self.names:
+            if fieldset is not None and not fieldset.includes(name):
+                continue
+            relation = self.relations.get(name)
+            if relation is None:
+                getters.append((name, self.fields[name][1]))
+            elif name not in expanded:
+                getters.append((name, relation.id_of))
+            else:
+                getters.append((name, _nested(name, relation, expanded[name])))
+
+        def render(obj) -> Dict[str, Any]:
+            return {name: getter(obj) for name, getter in getters}
+
+        return render
+
+    def columns(self, fieldset: Optional[Fieldset]) -> List[str]:
+        """
+        Columns of the resource itself the fieldset reads.
+        """
+        columns = list(self.required)
+        for name in self.names:
+            if fieldset is not None and not fieldset.includes(name):
+                continue
+            relation = self.relations.get(name)
+            if relation is None:
+                columns.extend(self.fields[name][0])
+            elif relation.column:
+                columns.append(relation.column)
+        return list(dict.fromkeys(columns))
+
+    def project(self, queryset: QuerySet, fieldset: Optional[Fieldset]) -> QuerySet:
+        """
+        Load only what the fieldset renders: only() on the columns read,
+        select_related() for expanded foreign keys (their columns
+        restricted too) and prefetch_related() for expanded or listed
+        many-to-many relations.
+        """
+        only, select = self._paths(fieldset, prefix="")
+        queryset = queryset.only(*only)
+        if select:
+            queryset = queryset.select_related(*select)
+
+        expanded = self._expanded(fieldset)
+        prefetch = []
+        for name, relation in self.relations.items():
+            if not relation.many or (fieldset is not None and not fieldset.includes(name)):
+                continue
+            # Rendered as ids: only the primary keys are loaded.
+            nested = expanded[name] if name in expanded else Fieldset(fields=())
+            related = queryset.model._meta.get_field(name).related_model
+            prefetch.append(
+                Prefetch(
+                    name,
+                    queryset=related._default_manager.only(*relation.shape.columns(nested)),
+                )
+            )
+        if prefetch:
+            queryset = queryset.prefetch_related(*prefetch)
+        return queryset
+
+    def _paths(self, fieldset: Optional[Fieldset], prefix: str) -> Tuple[List[str], List[str]]:
+        # only() and select_related() paths of the resource and its
+        # expanded foreign keys, recursively.
+        only = [prefix + column for column in self.columns(fieldset)]
+        select: List[str] = []
+        for name, nested in self._expanded(fieldset).items():
+            relation = self.relations[name]
+            if relation.many:
+                continue
+            path = prefix + name
+            select.append(path)
+            nested_only, nested_select = relation.shape._paths(nested, path + "__")
+            only.extend(nested_only)
+            select.extend(nested_select)
+        return only, select
+
+
+def _nested(name: str, relation: Relation, fieldset: Optional[Fieldset]):
+    render = relation.shape.renderer(fieldset)
+    if relation.many:
+        return lambda obj: [render(item) for item in getattr(obj, name).all()]
+
+    def nested(obj):
+        related = getattr(obj, name)
+        return None if related is None else render(related)
+
+    return nested
+
+
+class FieldsetSerializer(serializers.BaseSerializer):
+    """
+    Read-only serializer rendering objects with a Shape and a Fieldset.
+    The renderer is built once, not per object.
+    """
+
+    def __init__(self, *args, shape: Shape, fieldset: Optional[Fieldset] = None, **kwargs) -> None:
+        super().__init__(*args, **kwargs)
+        self._render = shape.renderer(fieldset)
+
+    def to_representation(self, obj) -> Dict[str, Any]:
+        return self._render(obj)
+
+
+class SparseFieldsetMixin:
+    """
+    ViewSet mixin: the actions of fieldset_shapes (action -> Shape)
+    honour ?fields= / ?expand=.
+
+    Views build their default queryset and pass it through project();
+    with a fieldset, get_serializer() returns a FieldsetSerializer.
+    """
+
+    fieldset_shapes: Dict[str, Shape] = {}
+
+    def get_fieldset(self) -> Optional[Fieldset]:
+        """
+        The request's validated fieldset, None when the action does not
+        support fieldsets or none was requested.
+        """
+        if not hasattr(self, "_fieldset"):
+            shape = self.fieldset_shapes.get(self.action)
+            fieldset = Fieldset.from_request(self.request) if shape else None
+            if fieldset is not None:
+                shape.validate(fieldset)
+            self._fieldset = fieldset
+        return self._fieldset
+
+    def project(self, queryset: QuerySet) -> QuerySet:
+        """
+        Replace the joins and prefetches of the default queryset with the
+        ones the fieldset needs.
+        """
+        fieldset = self.get_fieldset()
+        if fieldset is None:
+            return queryset
+        return self.fieldset_shapes[self.action].project(
+            queryset.select_related(None).prefetch_related(None), fieldset
+        )
+
+    def get_serializer(self, *args, **kwargs):
+        fieldset = self.get_fieldset()
+        if fieldset is None:
+            return super().get_serializer(*args, **kwargs)
+        kwargs.setdefault("context", self.get_serializer_context())
+        return FieldsetSerializer(
+            *args, shape=self.fieldset_shapes[self.action], fieldset=fieldset, **kwargs
+        )
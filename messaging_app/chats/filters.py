@@ -1,6 +1,8 @@
 import django_filters
+from rest_framework import filters
 
 from .models import Message
+from .search import get_search_backend
 
 
 class MessageFilter(django_filters.FilterSet):
@@ -23,10 +25,34 @@ class MessageFilter(django_filters.FilterSet):
         field_name="sent_at",
         lookup_expr="lte",
     )
-    conversation = django_filters.UUIDFilter(
-        field_name="conversation__conversation_id"
-    )
+    # Filter on the FK column itself so no join on conversation is needed.
+    conversation = django_filters.UUIDFilter(field_name="conversation_id")
 
     class Meta:
         model = Message
         fields = ["user", "from_date", "to_date", "conversation"]
+
+
+class MessageSearchFilter(filters.SearchFilter):
+    """
+    ?search=<terms> backed by the full-text index (see chats.search)
+    instead of LIKE '%term%' scans. Every term must appear in the body;
+    the listing keeps its chronological ordering.
+    """
+
+    def filter_queryset(self, request, queryset, view):
+        query = request.query_params.get(self.search_param, "")
+        if not query.strip():
+            return queryset
+        return get_search_backend(queryset.db).search(queryset, query, ranked=False)
+
+    def get_schema_operation_parameters(self, view):
+        return [
+            {
+                "name": self.search_param,
+                "required": False,
+                "in": "query",
+                "description": "Full-text search over message bodies.",
+                "schema": {"type": "string"},
+            },
+        ]
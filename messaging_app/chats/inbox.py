@@ -0,0 +1,264 @@
+"""
+Per-user inboxes (fan-out on write).
+
+Every participant of a conversation has an InboxEntry holding the
+conversation's last activity, their read marker and their unread count,
+so GET /conversations/ is one range scan of the user's entries on
+(user, -last_activity_at) instead of per-conversation aggregates over
+messages. Entries are maintained on write (see chats.signals):
+
+- participants added (participants.add(), add_participants()) or
+  removed: entries are created or deleted
+- a new message counts as unread for the other participants, in one
+  UPDATE of the conversation's entries; a bulk import recomputes the
+  unread counts in one UPDATE
+- a deleted message is taken out of the unread counts
+- in both cases last_activity_at is copied from the conversation
+  (chats.activity), so the inbox orders like last_message_at
+- mark_read() moves the read marker and resets the unread count
+
+Like chats.activity, paths that bypass signals leave entries stale;
+refresh_inbox() (``manage.py repair_conversation_activity``) rebuilds
+them.
+"""
+from collections import Counter
+from typing import Iterable, Optional
+
+from django.db import models
+from django.db.models.functions import Coalesce
+from django.db.models.lookups import IsNull
+from django.utils import timezone
+
+from .models import Conversation, InboxEntry, Message
+from .versions import bump_version
+
+
+def _unread() -> Coalesce:
+    """
+    Messages unread by the user of the outer entry: sent by others after
+    its last_read_at (all of them when it is null).
+    """
+    unread = (
+        Message.objects.filter(conversation=models.OuterRef("conversation"))
+        .exclude(sender=models.OuterRef("user"))
+        .filter(
+            models.Q(IsNull(models.OuterRef("last_read_at"), True))
+            | models.Q(sent_at__gt=models.OuterRef("last_read_at"))
+        )
+        .order_by()
+        .values("conversation")
+        .annotate(n=models.Count("*"))
+        .values("n")
+    )
+    return Coalesce(models.Subquery(unread), 0)
+
+
+def _conversation_activity() -> models.Subquery:
+    """
+    Last activity of the conversation of the outer entry: its last
+    message, or its creation while empty.
+    """
+    return models.Subquery(
+        Conversation.objects.filter(pk=models.OuterRef("conversation"))
+        .annotate(activity=Coalesce("last_message_at", "created_at"))
+        .values("activity")[:1]
+    )
+
+
+def _current_activity(conversation_ids, using=None) -> dict:
+    """
+    {conversation id: (message_count, last activity)} read from the
+    database: instances loaded earlier miss the F() updates of
+    chats.activity.
+    """
+    return {
+        pk: (message_count, activity)
+        for pk, message_count, activity in Conversation.objects.using(using)
+        .filter(pk__in=conversation_ids)
+        .annotate(activity=Coalesce("last_message_at", "created_at"))
+        .values_list("pk", "message_count", "activity")
+    }
+
+
+def add_entries(memberships, using=None) -> None:
+    """
+    Put conversations in the inboxes of new participants, for
+    (conversation, user_ids) pairs, with a single bulk INSERT. Messages
+    already in a conversation are unread by its new participants, except
+    their own.
+    """
+    memberships = [
+        (conversation, set(user_ids)) for conversation, user_ids in memberships if user_ids
+    ]
+    if not memberships:
+        return
+
+    activity = _current_activity([conversation.pk for conversation, _ in memberships], using)
+    # Conversations without messages: no need to count them.
+    busy = [pk for pk, (message_count, _) in activity.items() if message_count]
+    sent = Counter()
+    if busy:
+        for conversation_id, sender_id, n in (
+            Message.objects.using(using)
+            .filter(conversation_id__in=busy)
+            .order_by()
+            .values("conversation_id", "sender_id")
+            .annotate(n=models.Count("*"))
+            .values_list("conversation_id", "sender_id", "n")
+        ):
+            sent[conversation_id, sender_id] = n
+
+    entries = []
+    for conversation, user_ids in memberships:
+        message_count, last_activity_at = activity[conversation.pk]
+        entries.extend(
+            InboxEntry(
+                user_id=user_id,
+                conversation_id=conversation.pk,
+                last_activity_at=last_activity_at,
+                unread_count=max(message_count - sent[conversation.pk, user_id], 0),
+            )
+            for user_id in user_ids
+        )
+    InboxEntry.objects.using(using).bulk_create(entries, ignore_conflicts=True)
+
+
+def remove_entries(conversation_ids=None, user_ids=None, using=None) -> None:
+    """
+    Take the given conversations out of the inboxes of the given users
+    (either defaults to all of them).
+    """
+    entries = InboxEntry.objects.using(using)
+    if conversation_ids is not None:
+        entries = entries.filter(conversation_id__in=conversation_ids)
+    if user_ids is not None:
+        entries = entries.filter(user_id__in=user_ids)
+    entries.delete()
+
+
+def record_messages(conversation_id, messages: Iterable[Message], using=None) -> None:
+    """
+    Fan new messages of a conversation out to its participants' inboxes.
+    Runs after chats.activity.record_messages(): last_activity_at is
+    copied from the conversation's updated activity.
+    """
+    messages = list(messages)
+    if not messages:
+        return
+    entries = InboxEntry.objects.using(using).filter(conversation_id=conversation_id)
+
+    if len(messages) > 1:
+        # Imported messages may be older than read markers: recount.
+        entries.update(last_activity_at=_conversation_activity(), unread_count=_unread())
+        return
+
+    (message,) = messages
+    entries.update(
+        last_activity_at=_conversation_activity(),
+        unread_count=models.Case(
+            models.When(
+                models.Q(user=message.sender_id)
+                | models.Q(last_read_at__gte=message.sent_at),
+                then=models.F("unread_count"),
+            ),
+            default=models.F("unread_count") + 1,
+            output_field=models.PositiveIntegerField(),
+        ),
+    )
+
+
+def record_deleted_message(message: Message, using=None) -> None:
+    """
+    Take a deleted message out of its conversation's inboxes. Runs after
+    chats.activity.record_deleted_message() has moved the conversation's
+    last message.
+    """
+    was_unread = (
+        ~models.Q(user=message.sender_id)
+        & (models.Q(last_read_at__isnull=True) | models.Q(last_read_at__lt=message.sent_at))
+        & models.Q(unread_count__gt=0)
+    )
+    InboxEntry.objects.using(using).filter(
+        conversation_id=message.conversation_id
+    ).update(
+        unread_count=models.Case(
+            models.When(was_unread, then=models.F("unread_count") - 1),
+            default=models.F("unread_count"),
+            output_field=models.PositiveIntegerField(),
+        ),
+        last_activity_at=_conversation_activity(),
+    )
+
+
+def mark_read(user, conversation: Conversation, using=None) -> None:
+    """
+    Mark every message currently in the conversation as read by the
+    user, and bump their conversation-list version (unread counts are
+    part of it).
+    """
+    now = timezone.now()
+    updated = (
+        InboxEntry.objects.using(using)
+        .filter(user=user, conversation=conversation)
+        .update(last_read_at=now, unread_count=0)
+    )
+    if not updated:
+        # Participant added by a path that bypassed the signals.
+        InboxEntry.objects.using(using).get_or_create(
+            user=user,
+            conversation=conversation,
+            defaults={
+                "last_read_at": now,
+                "last_activity_at": _current_activity([conversation.pk], using)[
+                    conversation.pk
+                ][1],
+            },
+        )
+    bump_version("user", user.pk)
+
+
+def refresh_inbox(conversation_ids: Optional[Iterable] = None, using=None) -> int:
+    """
+    Rebuild the inbox entries of the given conversations (all of them by
+    default) from their participants and messages: missing entries are
+    created, entries of former participants deleted, and activity and
+    unread counts recomputed. Run after refresh_activity(). Returns the
+    number of entries updated.
+    """
+    through = Conversation.participants.through
+    memberships = through.objects.using(using)
+    entries = InboxEntry.objects.using(using)
+    if conversation_ids is not None:
+        conversation_ids = list(conversation_ids)
+        memberships = memberships.filter(conversation_id__in=conversation_ids)
+        entries = entries.filter(conversation_id__in=conversation_ids)
+
+    entries.exclude(
+        models.Exists(
+            through.objects.filter(
+                conversation_id=models.OuterRef("conversation_id"),
+                user_id=models.OuterRef("user_id"),
+            )
+        )
+    ).delete()
+
+    missing = memberships.exclude(
+        models.Exists(
+            InboxEntry.objects.filter(
+                conversation_id=models.OuterRef("conversation_id"),
+                user_id=models.OuterRef("user_id"),
+            )
+        )
+    ).values_list("conversation_id", "user_id")
+    InboxEntry.objects.using(using).bulk_create(
+        (
+            InboxEntry(conversation_id=conversation_id, user_id=user_id)
+            for conversation_id, user_id in missing.iterator()
+        ),
+        batch_size=1000,
+        ignore_conflicts=True,
+    )
+
+    return entries.update(
+        last_activity_at=_conversation_activity(), unread_count=_unread()
+    )
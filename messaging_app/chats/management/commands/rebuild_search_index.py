@@ -0,0 +1,31 @@
+from django.core.management.base import BaseCommand
+
+from chats.search import BACKENDS, get_search_backend
+
+
+class Command(BaseCommand):
+    """
+    Rebuild the message full-text index.
+
+    Usage:
+        python manage.py rebuild_search_index
+        python manage.py rebuild_search_index --backend python
+    """
+
+    help = "Rebuild the full-text search index over message bodies."
+
+    def add_arguments(self, parser) -> None:
+        parser.add_argument(
+            "--backend",
+            choices=sorted(BACKENDS),
+            help="Backend to rebuild (defaults to the active one).",
+        )
+
+    def handle(self, *args, **options) -> None:
+        if options["backend"]:
+            backend = BACKENDS[options["backend"]]()
+        else:
+            backend = get_search_backend()
+
+        backend.rebuild()
+        self.stdout.write(self.style.SUCCESS(f"Rebuilt {backend.name} search index."))
@@ -0,0 +1,54 @@
+from django.core.management.base import BaseCommand
+
+from chats.activity import refresh_activity
+from chats.inbox import refresh_inbox
+from chats.models import Conversation
+
+
+class Command(BaseCommand):
+    """
+    Recompute the denormalized activity counters of conversations
+    (last_message, last_message_at, message_count) from their messages,
+    then their participants' inbox entries.
+
+    Usage:
+        python manage.py repair_conversation_activity
+        python manage.py repair_conversation_activity --conversation <uuid>
+    """
+
+    help = "Recompute conversation activity counters and inbox entries."
+
+    def add_arguments(self, parser) -> None:
+        parser.add_argument(
+            "--conversation",
+            action="append",
+            dest="conversations",
+            help="Conversation to repair (repeatable, defaults to all).",
+        )
+        parser.add_argument(
+            "--batch-size",
+            type=int,
+            default=1000,
+            help="Conversations updated per query.",
+        )
+
+    def handle(self, *args, **options) -> None:
+        conversation_ids = options["conversations"]
+        if conversation_ids is None:
+            conversation_ids = Conversation.objects.order_by("pk").values_list(
+                "pk", flat=True
+            )
+        conversation_ids = list(conversation_ids)
+
+        batch_size = options["batch_size"]
+        updated = entries = 0
+        for start in range(0, len(conversation_ids), batch_size):
+            batch = conversation_ids[start:start + batch_size]
+            updated += refresh_activity(batch)
+            entries += refresh_inbox(batch)
+        self.stdout.write(
+            self.style.SUCCESS(
+                f"Repaired activity of {updated} conversation(s) "
+                f"and {entries} inbox entries."
+            )
+        )
@@ -0,0 +1,132 @@
+from typing import FrozenSet, Optional
+from uuid import UUID
+
+from django.db import DEFAULT_DB_ALIAS, transaction
+
+from .models import Conversation
+from .versions import (
+    aget_versioned,
+    aset_versioned,
+    bump_version,
+    get_versioned,
+    set_versioned,
+)
+
+# How long a user's conversation-id set stays in the shared cache.
+# Entries are also invalidated explicitly when participants change
+# (guarded by a "membership" version, see chats.versions), and are always
+# loaded from the primary so a lagging read replica cannot cache a stale
+# set.
+MEMBERSHIP_CACHE_TIMEOUT = 300
+
+# Attribute used to memoize the set on the current request.
+REQUEST_ATTR = "_chats_conversation_ids"
+
+
+def membership_cache_key(user_id) -> str:
+    return f"chats:membership:{user_id}"
+
+
+def load_conversation_ids(user_id) -> FrozenSet[UUID]:
+    """
+    Return the ids of every conversation the user participates in,
+    reading through the shared cache.
+    """
+    key = membership_cache_key(user_id)
+    version, conversation_ids = get_versioned("membership", user_id, key)
+    if conversation_ids is None:
+        conversation_ids = frozenset(
+            Conversation.participants.through.objects.using(DEFAULT_DB_ALIAS)
+            .filter(user_id=user_id)
+            .values_list("conversation_id", flat=True)
+        )
+        set_versioned(key, version, conversation_ids, MEMBERSHIP_CACHE_TIMEOUT)
+    return conversation_ids
+
+
+async def aload_conversation_ids(user_id) -> FrozenSet[UUID]:
+    """
+    load_conversation_ids() for async views.
+    """
+    key = membership_cache_key(user_id)
+    version, conversation_ids = await aget_versioned("membership", user_id, key)
+    if conversation_ids is None:
+        rows = (
+            Conversation.participants.through.objects.using(DEFAULT_DB_ALIAS)
+            .filter(user_id=user_id)
+            .values_list("conversation_id", flat=True)
+        )
+        conversation_ids = frozenset([conversation_id async for conversation_id in rows])
+        await aset_versioned(key, version, conversation_ids, MEMBERSHIP_CACHE_TIMEOUT)
+    return conversation_ids
+
+
+def get_conversation_ids(request) -> FrozenSet[UUID]:
+    """
+    Conversation ids of request.user, resolved at most once per request.
+    """
+    conversation_ids = getattr(request, REQUEST_ATTR, None)
+    if conversation_ids is None:
+        user = request.user
+        if not user or not user.is_authenticated:
+            conversation_ids = frozenset()
+        else:
+            conversation_ids = load_conversation_ids(user.pk)
+        setattr(request, REQUEST_ATTR, conversation_ids)
+    return conversation_ids
+
+
+async def aget_conversation_ids(request) -> FrozenSet[UUID]:
+    """
+    get_conversation_ids() for async views. request.user must already
+    be resolved (see chats.async_views.authenticate).
+    """
+    conversation_ids = getattr(request, REQUEST_ATTR, None)
+    if conversation_ids is None:
+        user = request.user
+        if not user or not user.is_authenticated:
+            conversation_ids = frozenset()
+        else:
+            conversation_ids = await aload_conversation_ids(user.pk)
+        setattr(request, REQUEST_ATTR, conversation_ids)
+    return conversation_ids
+
+
+def as_uuid(conversation_id) -> Optional[UUID]:
+    if isinstance(conversation_id, UUID):
+        return conversation_id
+    try:
+        return UUID(str(conversation_id))
+    except ValueError:
+        return None
+
+
+def is_participant(request, conversation_id) -> bool:
+    """
+    Whether request.user takes part in the given conversation.
+    """
+    conversation_id = as_uuid(conversation_id)
+    return conversation_id is not None and conversation_id in get_conversation_ids(
+        request
+    )
+
+
+async def ais_participant(request, conversation_id) -> bool:
+    """
+    is_participant() for async views.
+    """
+    conversation_id = as_uuid(conversation_id)
+    return conversation_id is not None and conversation_id in (
+        await aget_conversation_ids(request)
+    )
+
+
+def invalidate_membership(*user_ids) -> None:
+    """
+    Invalidate the cached conversation-id sets of the given users, now
+    and once the current transaction commits: a request reading the
+    participants in between still sees the old ones.
+    """
+    if user_ids:
+        bump_version("membership", *user_ids)
+        transaction.on_commit(lambda: bump_version("membership", *user_ids))
@@ -0,0 +1,132 @@
+from hashlib import sha1
+from typing import Optional
+
+from asgiref.sync import iscoroutinefunction, sync_to_async
+from django.conf import settings
+from django.utils.decorators import sync_and_async_middleware
+
+from .cache import get_cache
+from .querybudget import (
+    QueryStats,
+    begin_recording,
+    check_budget,
+    end_recording,
+    get_mode,
+    install_recorder,
+    record_queries,
+)
+from .routers import begin_routing, end_routing, get_replicas
+
+SAFE_METHODS = ("GET", "HEAD", "OPTIONS")
+
+
+def client_key(request) -> Optional[str]:
+    """
+    Cache key identifying the client across requests: its bearer
+    token or session cookie. None for anonymous clients.
+    """
+    credential = request.META.get("HTTP_AUTHORIZATION") or request.COOKIES.get(
+        settings.SESSION_COOKIE_NAME
+    )
+    if not credential:
+        return None
+    digest = sha1(credential.encode(), usedforsecurity=False).hexdigest()
+    return f"chats:db:primary:{digest}"
+
+
+def pin_seconds() -> int:
+    return getattr(settings, "DATABASE_REPLICA_PIN_SECONDS", 5)
+
+
+@sync_and_async_middleware
+def replica_routing_middleware(get_response):
+    """
+    Route the request's reads with chats.routers.ReplicaRouter.
+
+    Safe-method requests read from a replica unless the same client
+    wrote within the last DATABASE_REPLICA_PIN_SECONDS seconds. A request
+    that writes pins its client to the primary for that long.
+    """
+
+    if iscoroutinefunction(get_response):
+
+        async def middleware(request):
+            if not get_replicas():
+                return await get_response(request)
+            key = client_key(request)
+            read_only = request.method in SAFE_METHODS and not (
+                key and await get_cache().aget(key)
+            )
+            token = begin_routing(read_only)
+            try:
+                return await get_response(request)
+            finally:
+                if end_routing(token).wrote and key:
+                    await get_cache().aset(key, True, pin_seconds())
+
+    else:
+
+        def middleware(request):
+            if not get_replicas():
+                return get_response(request)
+            key = client_key(request)
+            read_only = request.method in SAFE_METHODS and not (
+                key and get_cache().get(key)
+            )
+            token = begin_routing(read_only)
+            try:
+                return get_response(request)
+            finally:
+                if end_routing(token).wrote and key:
+                    get_cache().set(key, True, pin_seconds())
+
+    return middleware
+
+
+def finish_query_stats(request, response, stats: QueryStats, mode: str):
+    match = request.resolver_match
+    stats.view_name = match.view_name if match else None
+    stats.method = request.method
+    response.query_stats = stats
+    check_budget(stats, mode)
+    return response
+
+
+@sync_and_async_middleware
+def query_budget_middleware(get_response):
+    """
+    Record the queries of every request and check them against the
+    budget of the view that served it (see chats.querybudget). The stats
+    are attached to the response as response.query_stats.
+
+    Database execute wrappers are per thread: sync requests are recorded
+    in their own thread, async ones follow their context into the thread
+    of sync_to_async() (begin_recording()).
+    """
+
+    if iscoroutinefunction(get_response):
+
+        async def middleware(request):
+            mode = get_mode()
+            if mode == "off":
+                return await get_response(request)
+            stats = QueryStats()
+            token = begin_recording(stats)
+            try:
+                await sync_to_async(install_recorder)()
+                response = await get_response(request)
+            finally:
+                end_recording(token)
+            return finish_query_stats(request, response, stats, mode)
+
+    else:
+
+        def middleware(request):
+            mode = get_mode()
+            if mode == "off":
+                return get_response(request)
+            with record_queries() as stats:
+                response = get_response(request)
+            return finish_query_stats(request, response, stats, mode)
+
+    return middleware
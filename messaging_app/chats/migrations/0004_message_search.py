@@ -0,0 +1,88 @@
+# Generated by Django 4.2.30 on 2026-10-17 05:54
+
+from django.db import migrations, models
+import django.db.models.deletion
+
+# SQLite: FTS5 external-content table over chats_message.message_body,
+# kept in sync by triggers (covers save(), bulk_create() and deletes).
+SQLITE_FORWARD = [
+    """
+    CREATE VIRTUAL TABLE chats_message_fts USING fts5(
+        message_body,
+        content='chats_message',
+        content_rowid='rowid'
+    )
+    """,
+    """
+    CREATE TRIGGER chats_message_fts_ai AFTER INSERT ON chats_message BEGIN
+        INSERT INTO chats_message_fts(rowid, message_body)
+        VALUES (new.rowid, new.message_body);
+    END
+    """,
+    """
+    CREATE TRIGGER chats_message_fts_ad AFTER DELETE ON chats_message BEGIN
+        INSERT INTO chats_message_fts(chats_message_fts, rowid, message_body)
+        VALUES ('delete', old.rowid, old.message_body);
+    END
+    """,
+    """
+    CREATE TRIGGER chats_message_fts_au AFTER UPDATE ON chats_message BEGIN
+        INSERT INTO chats_message_fts(chats_message_fts, rowid, message_body)
+        VALUES ('delete', old.rowid, old.message_body);
+        INSERT INTO chats_message_fts(rowid, message_body)
+        VALUES (new.rowid, new.message_body);
+    END
+    """,
+    "INSERT INTO chats_message_fts(chats_message_fts) VALUES ('rebuild')",
+]
+
+SQLITE_BACKWARD = [
+    "DROP TRIGGER IF EXISTS chats_message_fts_au",
+    "DROP TRIGGER IF EXISTS chats_message_fts_ad",
+    "DROP TRIGGER IF EXISTS chats_message_fts_ai",
+    "DROP TABLE IF EXISTS chats_message_fts",
+]
+
+# MySQL (Docker profile): InnoDB FULLTEXT index maintained by the engine.
+MYSQL_FORWARD = [
+    "ALTER TABLE chats_message ADD FULLTEXT INDEX chats_msg_body_ft (message_body)",
+]
+
+MYSQL_BACKWARD = [
+    "ALTER TABLE chats_message DROP INDEX chats_msg_body_ft",
+]
+
+
+def run_vendor_sql(statements):
+    def run(apps, schema_editor):
+        vendor = schema_editor.connection.vendor
+        for sql in statements.get(vendor, []):
+            schema_editor.execute(sql)
+
+    return run
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('chats', '0003_message_composite_indexes'),
+    ]
+
+    operations = [
+        migrations.CreateModel(
+            name='MessageSearchTerm',
+            fields=[
+                ('id', models.BigAutoField(auto_created=True, primary_key=True, serialize=False, verbose_name='ID')),
+                ('term', models.CharField(max_length=64)),
+                ('frequency', models.PositiveIntegerField(default=1)),
+                ('message', models.ForeignKey(on_delete=django.db.models.deletion.CASCADE, related_name='search_terms', to='chats.message')),
+            ],
+            options={
+                'indexes': [models.Index(fields=['term', 'message'], name='chats_search_term_idx')],
+            },
+        ),
+        migrations.RunPython(
+            run_vendor_sql({"sqlite": SQLITE_FORWARD, "mysql": MYSQL_FORWARD}),
+            run_vendor_sql({"sqlite": SQLITE_BACKWARD, "mysql": MYSQL_BACKWARD}),
+        ),
+    ]
@@ -0,0 +1,51 @@
+# Generated by Django 4.2.30 on 2026-10-17 06:18
+
+from django.db import migrations, models
+import django.db.models.deletion
+from django.db.models.functions import Coalesce
+
+
+def backfill_activity(apps, schema_editor):
+    Conversation = apps.get_model("chats", "Conversation")
+    Message = apps.get_model("chats", "Message")
+
+    messages = Message.objects.using(schema_editor.connection.alias).filter(
+        conversation=models.OuterRef("pk")
+    )
+    latest = messages.order_by("-sent_at", "-message_id")
+    count = messages.order_by().values("conversation").annotate(n=models.Count("*"))
+    Conversation.objects.using(schema_editor.connection.alias).update(
+        last_message=models.Subquery(latest.values("pk")[:1]),
+        last_message_at=models.Subquery(latest.values("sent_at")[:1]),
+        message_count=Coalesce(models.Subquery(count.values("n")), 0),
+    )
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('chats', '0004_message_search'),
+    ]
+
+    operations = [
+        migrations.AddField(
+            model_name='conversation',
+            name='last_message',
+            field=models.ForeignKey(blank=True, db_constraint=False, editable=False, null=True, on_delete=django.db.models.deletion.DO_NOTHING, related_name='+', to='chats.message'),
+        ),
+        migrations.AddField(
+            model_name='conversation',
+            name='last_message_at',
+            field=models.DateTimeField(blank=True, editable=False, null=True),
+        ),
+        migrations.AddField(
+            model_name='conversation',
+            name='message_count',
+            field=models.PositiveIntegerField(default=0, editable=False),
+        ),
+        migrations.AddIndex(
+            model_name='conversation',
+            index=models.Index(fields=['-last_message_at'], name='chats_conv_last_msg_at_idx'),
+        ),
+        migrations.RunPython(backfill_activity, migrations.RunPython.noop),
+    ]
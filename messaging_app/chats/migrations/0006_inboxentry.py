@@ -0,0 +1,117 @@
+# Generated by Django 4.2.30 on 2026-10-17 07:02
+
+from django.conf import settings
+from django.db import migrations, models
+import django.db.models.deletion
+from django.db.models.functions import Coalesce
+from django.db.models.lookups import IsNull
+import django.utils.timezone
+
+
+def backfill_inbox(apps, schema_editor):
+    Conversation = apps.get_model("chats", "Conversation")
+    InboxEntry = apps.get_model("chats", "InboxEntry")
+    Message = apps.get_model("chats", "Message")
+    db = schema_editor.connection.alias
+
+    # Read markers became inbox entries; add the participants that
+    # never marked their conversations read.
+    through = Conversation.participants.through
+    missing = (
+        through.objects.using(db)
+        .exclude(
+            models.Exists(
+                InboxEntry.objects.filter(
+                    conversation_id=models.OuterRef("conversation_id"),
+                    user_id=models.OuterRef("user_id"),
+                )
+            )
+        )
+        .values_list("conversation_id", "user_id")
+    )
+    InboxEntry.objects.using(db).bulk_create(
+        (
+            InboxEntry(conversation_id=conversation_id, user_id=user_id, last_read_at=None)
+            for conversation_id, user_id in missing.iterator()
+        ),
+        batch_size=1000,
+    )
+
+    unread = (
+        Message.objects.filter(conversation=models.OuterRef("conversation"))
+        .exclude(sender=models.OuterRef("user"))
+        .filter(
+            models.Q(IsNull(models.OuterRef("last_read_at"), True))
+            | models.Q(sent_at__gt=models.OuterRef("last_read_at"))
+        )
+        .order_by()
+        .values("conversation")
+        .annotate(n=models.Count("*"))
+        .values("n")
+    )
+    activity = (
+        Conversation.objects.filter(pk=models.OuterRef("conversation"))
+        .annotate(activity=Coalesce("last_message_at", "created_at"))
+        .values("activity")[:1]
+    )
+    InboxEntry.objects.using(db).update(
+        last_activity_at=models.Subquery(activity),
+        unread_count=Coalesce(models.Subquery(unread), 0),
+    )
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        migrations.swappable_dependency(settings.AUTH_USER_MODEL),
+        ('chats', '0005_conversation_activity'),
+    ]
+
+    operations = [
+        migrations.RemoveConstraint(
+            model_name='readmarker',
+            name='chats_readmarker_user_conversation_uniq',
+        ),
+        migrations.RenameModel(
+            old_name='ReadMarker',
+            new_name='InboxEntry',
+        ),
+        migrations.AlterModelOptions(
+            name='inboxentry',
+            options={'verbose_name_plural': 'inbox entries'},
+        ),
+        migrations.AlterField(
+            model_name='inboxentry',
+            name='conversation',
+            field=models.ForeignKey(on_delete=django.db.models.deletion.CASCADE, related_name='inbox_entries', to='chats.conversation'),
+        ),
+        migrations.AlterField(
+            model_name='inboxentry',
+            name='user',
+            field=models.ForeignKey(on_delete=django.db.models.deletion.CASCADE, related_name='inbox_entries', to=settings.AUTH_USER_MODEL),
+        ),
+        migrations.AlterField(
+            model_name='inboxentry',
+            name='last_read_at',
+            field=models.DateTimeField(blank=True, null=True),
+        ),
+        migrations.AddField(
+            model_name='inboxentry',
+            name='last_activity_at',
+            field=models.DateTimeField(default=django.utils.timezone.now),
+        ),
+        migrations.AddField(
+            model_name='inboxentry',
+            name='unread_count',
+            field=models.PositiveIntegerField(default=0),
+        ),
+        migrations.AddConstraint(
+            model_name='inboxentry',
+            constraint=models.UniqueConstraint(fields=('user', 'conversation'), name='chats_inbox_user_conversation_uniq'),
+        ),
+        migrations.AddIndex(
+            model_name='inboxentry',
+            index=models.Index(fields=['user', '-last_activity_at'], name='chats_inbox_user_activity_idx'),
+        ),
+        migrations.RunPython(backfill_inbox, migrations.RunPython.noop),
+    ]
@@ -0,0 +1,127 @@
+# Generated by Django 4.2.30 on 2026-10-17 07:25
+
+from django.db import migrations, models
+import django.db.models.deletion
+
+# SQLite: replace the external-content FTS5 table keyed on the implicit
+# rowid of chats_message (renumbered by VACUUM; its triggers dropped by
+# any table remake) with an FTS5 table keyed on an explicit integer key:
+#
+# - chats_message_fts_key: INTEGER PRIMARY KEY per indexed message_id
+# - chats_message_fts:     rowid = key id, message_id UNINDEXED, body
+SQLITE_FORWARD = [
+    "DROP TRIGGER IF EXISTS chats_message_fts_au",
+    "DROP TRIGGER IF EXISTS chats_message_fts_ad",
+    "DROP TRIGGER IF EXISTS chats_message_fts_ai",
+    "DROP TABLE IF EXISTS chats_message_fts",
+    """
+    CREATE TABLE chats_message_fts_key (
+        id INTEGER PRIMARY KEY,
+        message_id char(32) NOT NULL UNIQUE
+    )
+    """,
+    """
+    CREATE VIRTUAL TABLE chats_message_fts USING fts5(
+        message_id UNINDEXED,
+        message_body
+    )
+    """,
+    """
+    CREATE TRIGGER chats_message_fts_ai AFTER INSERT ON chats_message BEGIN
+        INSERT INTO chats_message_fts_key(message_id) VALUES (new.message_id);
+        INSERT INTO chats_message_fts(rowid, message_id, message_body)
+        SELECT id, message_id, new.message_body FROM chats_message_fts_key
+        WHERE message_id = new.message_id;
+    END
+    """,
+    """
+    CREATE TRIGGER chats_message_fts_ad AFTER DELETE ON chats_message BEGIN
+        DELETE FROM chats_message_fts WHERE rowid = (
+            SELECT id FROM chats_message_fts_key WHERE message_id = old.message_id
+        );
+        DELETE FROM chats_message_fts_key WHERE message_id = old.message_id;
+    END
+    """,
+    """
+    CREATE TRIGGER chats_message_fts_au AFTER UPDATE OF message_body ON chats_message
+    BEGIN
+        UPDATE chats_message_fts SET message_body = new.message_body WHERE rowid = (
+            SELECT id FROM chats_message_fts_key WHERE message_id = new.message_id
+        );
+    END
+    """,
+    "INSERT INTO chats_message_fts_key(message_id) SELECT message_id FROM chats_message",
+    """
+    INSERT INTO chats_message_fts(rowid, message_id, message_body)
+    SELECT k.id, m.message_id, m.message_body
+    FROM chats_message_fts_key k JOIN chats_message m ON m.message_id = k.message_id
+    """,
+]
+
+SQLITE_BACKWARD = [
+    "DROP TRIGGER IF EXISTS chats_message_fts_au",
+    "DROP TRIGGER IF EXISTS chats_message_fts_ad",
+    "DROP TRIGGER IF EXISTS chats_message_fts_ai",
+    "DROP TABLE IF EXISTS chats_message_fts",
+    "DROP TABLE IF EXISTS chats_message_fts_key",
+    """
+    CREATE VIRTUAL TABLE chats_message_fts USING fts5(
+        message_body,
+        content='chats_message',
+        content_rowid='rowid'
+    )
+    """,
+    """
+    CREATE TRIGGER chats_message_fts_ai AFTER INSERT ON chats_message BEGIN
+        INSERT INTO chats_message_fts(rowid, message_body)
+        VALUES (new.rowid, new.message_body);
+    END
+    """,
+    """
+    CREATE TRIGGER chats_message_fts_ad AFTER DELETE ON chats_message BEGIN
+        INSERT INTO chats_message_fts(chats_message_fts, rowid, message_body)
+        VALUES ('delete', old.rowid, old.message_body);
+    END
+    """,
+    """
+    CREATE TRIGGER chats_message_fts_au AFTER UPDATE ON chats_message BEGIN
+        INSERT INTO chats_message_fts(chats_message_fts, rowid, message_body)
+        VALUES ('delete', old.rowid, old.message_body);
+        INSERT INTO chats_message_fts(rowid, message_body)
+        VALUES (new.rowid, new.message_body);
+    END
+    """,
+    "INSERT INTO chats_message_fts(chats_message_fts) VALUES ('rebuild')",
+]
+
+
+def run_sqlite(statements):
+    def run(apps, schema_editor):
+        if schema_editor.connection.vendor == "sqlite":
+            for sql in statements:
+                schema_editor.execute(sql)
+
+    return run
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('chats', '0007_message_sent_index'),
+    ]
+
+    operations = [
+        migrations.CreateModel(
+            name='MessageSearchDocument',
+            fields=[
+                ('message', models.OneToOneField(db_column='message_id', db_constraint=False, on_delete=django.db.models.deletion.DO_NOTHING, primary_key=True, related_name='search_document', serialize=False, to='chats.message')),
+                ('message_body', models.TextField()),
+                ('rank', models.FloatField()),
+            ],
+            options={
+                'db_table': 'chats_message_fts',
+                'managed': False,
+            },
+        ),
+        migrations.RunPython(run_sqlite(SQLITE_FORWARD), run_sqlite(SQLITE_BACKWARD)),
+    ]
@@ -1,7 +1,8 @@
 import uuid
 
 from django.contrib.auth.models import AbstractUser
-from django.db import models
+from django.db import models, router
+from django.db.models.signals import m2m_changed
 from django.utils import timezone
 
 
@@ -71,6 +72,49 @@ class User(AbstractUser):
         return f"{self.email} ({self.role})"
 
 
+def participant_conversation_ids(user) -> models.QuerySet:
+    """
+    Subquery of the ids of every conversation the user takes part in.
+    """
+    return Conversation.participants.through.objects.filter(
+        user_id=user.pk
+    ).values("conversation_id")
+
+
+class ConversationQuerySet(models.QuerySet):
+    """
+    QuerySet helpers for conversation listings.
+    """
+
+    def for_participant(self, user) -> "ConversationQuerySet":
+        """
+        Conversations the user takes part in.
+
+        Filters through an IN subquery on the participants table instead
+        of joining it, so no DISTINCT is needed.
+        """
+        return self.filter(pk__in=participant_conversation_ids(user))
+
+    def with_last_message(self) -> "ConversationQuerySet":
+        """
+        Join the latest message (with its sender) of every conversation,
+        through the denormalized last_message column.
+        """
+        return self.select_related("last_message__sender")
+
+    def inbox(self, user) -> "ConversationQuerySet":
+        """
+        The user's conversations through their inbox entries (see
+        InboxEntry), annotated with ``last_activity_at`` and
+        ``unread_count``. Ordered by -last_activity_at this is one range
+        scan of chats_inbox_user_activity_idx.
+        """
+        return self.filter(inbox_entries__user=user).annotate(
+            last_activity_at=models.F("inbox_entries__last_activity_at"),
+            unread_count=models.F("inbox_entries__unread_count"),
+        )
+
+
 class Conversation(models.Model):
     """
     Conversation model.
@@ -78,6 +122,13 @@ class Conversation(models.Model):
     - conversation_id: UUID primary key
     - participants:    users taking part in the conversation
     - created_at:      timestamp
+
+    Activity counters, denormalized from Message and kept up to date by
+    chats.activity (repair with ``manage.py repair_conversation_activity``):
+
+    - last_message:    latest message by (sent_at, message_id)
+    - last_message_at: its sent_at
+    - message_count:   number of messages
     """
 
     conversation_id = models.UUIDField(
@@ -97,9 +148,111 @@ class Conversation(models.Model):
         editable=False,
     )
 
+    # No database constraint: deleting a message does not touch this
+    # row through the collector, chats.activity repoints it instead.
+    last_message = models.ForeignKey(
+        "Message",
+        on_delete=models.DO_NOTHING,
+        db_constraint=False,
+        null=True,
+        blank=True,
+        editable=False,
+        related_name="+",
+    )
+
+    last_message_at = models.DateTimeField(
+        null=True,
+        blank=True,
+        editable=False,
+    )
+
+    message_count = models.PositiveIntegerField(
+        default=0,
+        editable=False,
+    )
+
+    objects = ConversationQuerySet.as_manager()
+
+    class Meta:
+        indexes = [
+            # Inbox ordering by latest activity (?ordering=-last_message_at).
+            models.Index(
+                fields=["-last_message_at"],
+                name="chats_conv_last_msg_at_idx",
+            ),
+        ]
+
     def __str__(self) -> str:
         return f"Conversation {self.conversation_id}"
 
+    def set_participants(self, user_ids) -> None:
+        """
+        Make the given users the participants, touching only the rows
+        that change: one SELECT of the current participants, at most one
+        DELETE and one INSERT. m2m_changed is sent as by participants.set().
+        """
+        user_ids = set(user_ids)
+        current = set(
+            Conversation.participants.through.objects.using(self._state.db)
+            .filter(conversation_id=self.pk)
+            .values_list("user_id", flat=True)
+        )
+        removed = current - user_ids
+        if removed:
+            self.participants.remove(*removed)
+        added = user_ids - current
+        if added:
+            add_participants([(self, added)], using=self._state.db)
+
+
+def add_participants(memberships, using=None) -> None:
+    """
+    Insert participant rows for (conversation, user_ids) pairs with a
+    single bulk INSERT, sending the pre_add / post_add m2m_changed
+    signals participants.add() would send.
+
+    Unlike participants.add(), existing rows are not looked up first:
+    the users must not take part in their conversation yet (new
+    conversations, or the diff computed by set_participants()).
+
+    The new participants' inbox entries are inserted here too, in one
+    INSERT for every conversation, and the versions of the conversations
+    and of their participants' lists are bumped with one query; the
+    signals carry ``bulk=True`` so receivers do not do either one
+    conversation at a time.
+    """
+    from .inbox import add_entries
+    from .signals import bump_conversation_versions
+
+    through = Conversation.participants.through
+    memberships = [
+        (conversation, set(user_ids)) for conversation, user_ids in memberships if user_ids
+    ]
+    using = using or router.db_for_write(through)
+
+    def send(action: str) -> None:
+        for conversation, user_ids in memberships:
+            m2m_changed.send(
+                sender=through,
+                instance=conversation,
+                action=action,
+                reverse=False,
+                model=User,
+                pk_set=user_ids,
+                using=using,
+                bulk=True,
+            )
+
+    send("pre_add")
+    through.objects.using(using).bulk_create(
+        through(conversation_id=conversation.pk, user_id=user_id)
+        for conversation, user_ids in memberships
+        for user_id in user_ids
+    )
+    add_entries(memberships, using=using)
+    send("post_add")
+    bump_conversation_versions(*(conversation.pk for conversation, _ in memberships))
+
 
 class Message(models.Model):
     """
@@ -140,7 +293,141 @@ class Message(models.Model):
 
     class Meta:
         ordering = ["sent_at"]
+        indexes = [
+            # Conversation timelines: filter on conversation, range/sort
+            # on sent_at, message_id as the keyset pagination tie-breaker.
+            models.Index(
+                fields=["conversation", "sent_at", "message_id"],
+                name="chats_msg_conv_sent_idx",
+            ),
+            # Messages of one sender over time (?user=...&from_date=...).
+            models.Index(
+                fields=["sender", "sent_at"],
+                name="chats_msg_sender_sent_idx",
+            ),
+            # All messages, newest first (admin changelist).
+            models.Index(
+                fields=["sent_at", "message_id"],
+                name="chats_msg_sent_idx",
+            ),
+        ]
 
     def __str__(self) -> str:
         preview = self.message_body[:30].replace("\n", " ")
         return f"{self.sender.email}: {preview}"
+
+
+class InboxEntry(models.Model):
+    """
+    A conversation in a participant's inbox (fan-out on write): one row
+    per participant, kept up to date by chats.inbox when messages are
+    sent or deleted and when participants change.
+
+    - user:             participant
+    - conversation:     conversation
+    - last_activity_at: latest message sent_at (creation time while empty)
+    - last_read_at:     messages from others sent after it are unread
+                        (null: never read)
+    - unread_count:     number of those messages
+    """
+
+    user = models.ForeignKey(
+        User,
+        on_delete=models.CASCADE,
+        related_name="inbox_entries",
+    )
+
+    conversation = models.ForeignKey(
+        Conversation,
+        on_delete=models.CASCADE,
+        related_name="inbox_entries",
+    )
+
+    last_activity_at = models.DateTimeField(default=timezone.now)
+
+    last_read_at = models.DateTimeField(null=True, blank=True)
+
+    unread_count = models.PositiveIntegerField(default=0)
+
+    class Meta:
+        verbose_name_plural = "inbox entries"
+        constraints = [
+            models.UniqueConstraint(
+                fields=["user", "conversation"],
+                name="chats_inbox_user_conversation_uniq",
+            )
+        ]
+        indexes = [
+            # GET /conversations/: the user's inbox, most recent first.
+            models.Index(
+                fields=["user", "-last_activity_at"],
+                name="chats_inbox_user_activity_idx",
+            ),
+        ]
+
+    def __str__(self) -> str:
+        return f"{self.conversation_id} in the inbox of {self.user_id}"
+
+
+class MessageSearchTerm(models.Model):
+    """
+    Posting of the pure-Python inverted index (see chats.search).
+
+    Only maintained when the "python" search backend is active
+    (databases without FTS5 / FULLTEXT support).
+
+    - term:      lower-cased token of the message body
+    - message:   message containing the term
+    - frequency: number of occurrences, used for ranking
+    """
+
+    term = models.CharField(max_length=64)
+
+    message = models.ForeignKey(
+        Message,
+        on_delete=models.CASCADE,
+        related_name="search_terms",
+    )
+
+    frequency = models.PositiveIntegerField(default=1)
+
+    class Meta:
+        indexes = [
+            models.Index(fields=["term", "message"], name="chats_search_term_idx"),
+        ]
+
+    def __str__(self) -> str:
+        return f"{self.term} → {self.message_id}"
+
+
+class MessageSearchDocument(models.Model):
+    """
+    Row of the SQLite FTS5 index "chats_message_fts" (see chats.search).
+
+    Not managed by Django: the table, its integer key table and the
+    triggers keeping both in sync with chats_message are created by
+    migrations and chats.search.ensure_sqlite_fts(). Declared so the
+    SQLite backend can join the index once and read its rank.
+
+    - message:      indexed message (UNINDEXED column of the FTS table)
+    - message_body: indexed text
+    - rank:         bm25() of the row against the MATCH of the query
+                    (lower is better)
+    """
+
+    message = models.OneToOneField(
+        Message,
+        primary_key=True,
+        on_delete=models.DO_NOTHING,
+        db_column="message_id",
+        db_constraint=False,
+        related_name="search_document",
+    )
+
+    message_body = models.TextField()
+
+    rank = models.FloatField()
+
+    class Meta:
+        managed = False
+        db_table = "chats_message_fts"
@@ -0,0 +1,162 @@
+import asyncio
+import threading
+import time
+from typing import Dict, Optional, Set
+
+from .versions import aget_version, bump_version, get_version, get_versions
+
+
+class Listener:
+    """
+    A request waiting for new messages in one conversation.
+
+    Register it (MessageNotifier.listen()) before querying for new
+    messages, so that a message created in between is never missed,
+    then wait(). Use it as a context manager to unregister it.
+    """
+
+    def __init__(self, notifier: "MessageNotifier", key: str, version: int) -> None:
+        self.notifier = notifier
+        self.key = key
+        # Cache version of the conversation when the listener was
+        # registered; the poller compares it with the current one.
+        self.version = version
+        self.notified = False
+        self._event = threading.Event()
+
+    def wake(self) -> None:
+        # Called from the thread that notifies or from the poller.
+        self.notified = True
+        self._event.set()
+
+    def wait(self, timeout: float) -> bool:
+        """
+        Block until the conversation is notified, or until `timeout`
+        seconds have passed. Returns True if notified.
+        """
+        self._event.wait(timeout)
+        return self.notified
+
+    def close(self) -> None:
+        self.notifier.unlisten(self)
+
+    def __enter__(self):
+        return self
+
+    def __exit__(self, *exc_info) -> None:
+        self.close()
+
+
+class AsyncListener(Listener):
+    """
+    Listener for async views: wait() is a coroutine, so a waiting
+    request holds no thread.
+    """
+
+    def __init__(self, notifier: "MessageNotifier", key: str, version: int) -> None:
+        super().__init__(notifier, key, version)
+        self._loop = asyncio.get_running_loop()
+        self._async_event = asyncio.Event()
+
+    def wake(self) -> None:
+        self.notified = True
+        try:
+            self._loop.call_soon_threadsafe(self._async_event.set)
+        except RuntimeError:
+            # The loop was closed: the request is gone.
+            pass
+
+    async def wait(self, timeout: float) -> bool:
+        try:
+            await asyncio.wait_for(self._async_event.wait(), max(timeout, 0))
+        except asyncio.TimeoutError:
+            pass
+        return self.notified
+
+    async def __aenter__(self):
+        return self
+
+    async def __aexit__(self, *exc_info) -> None:
+        self.close()
+
+
+class MessageNotifier:
+    """
+    Wakes up requests waiting for new messages in a conversation.
+
+    - Listeners in this process are registered per conversation and woken
+      directly by notify(); a notification only wakes the listeners of
+      its conversation.
+    - Every notification also bumps the conversation's "messages" version
+      in the shared cache, so messages created by other workers / pods
+      are noticed without an external broker: while listeners exist, one
+      poller thread per process reads the versions of every conversation
+      listened to with a single get_many() every poll_interval seconds.
+
+    Conversations without listeners leave no state behind.
+    """
+
+    def __init__(self, poll_interval: float = 0.5) -> None:
+        self.poll_interval = poll_interval
+        self._lock = threading.Lock()
+        self._listeners: Dict[str, Set[Listener]] = {}
+        self._poller: Optional[threading.Thread] = None
+
+    def listen(self, conversation_id) -> Listener:
+        key = str(conversation_id)
+        return self._register(Listener(self, key, get_version("messages", key)))
+
+    async def alisten(self, conversation_id) -> AsyncListener:
+        """
+        listen() for async views.
+        """
+        key = str(conversation_id)
+        return self._register(AsyncListener(self, key, await aget_version("messages", key)))
+
+    def unlisten(self, listener: Listener) -> None:
+        with self._lock:
+            listeners = self._listeners.get(listener.key)
+            if listeners is not None:
+                listeners.discard(listener)
+                if not listeners:
+                    del self._listeners[listener.key]
+
+    def notify(self, conversation_id) -> None:
+        key = str(conversation_id)
+        bump_version("messages", key)
+        with self._lock:
+            listeners = list(self._listeners.get(key, ()))
+        for listener in listeners:
+            listener.wake()
+
+    def _register(self, listener: Listener) -> Listener:
+        with self._lock:
+            self._listeners.setdefault(listener.key, set()).add(listener)
+            if self._poller is None:
+                self._poller = threading.Thread(
+                    target=self._poll, name="chats-message-notifier", daemon=True
+                )
+                self._poller.start()
+        return listener
+
+    def _poll(self) -> None:
+        while True:
+            time.sleep(self.poll_interval)
+            with self._lock:
+                if not self._listeners:
+                    self._poller = None
+                    return
+                listeners = {key: list(values) for key, values in self._listeners.items()}
+
+            try:
+                versions = get_versions("messages", listeners)
+            except Exception:
+                # Cache unavailable: local notifications still work.
+                continue
+            for key, values in listeners.items():
+                for listener in values:
+                    if versions[key] != listener.version:
+                        listener.wake()
+
+
+notifier = MessageNotifier()
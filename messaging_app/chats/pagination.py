@@ -1,7 +1,28 @@
-from collections import OrderedDict
+import json
+from base64 import b64decode, b64encode
+from collections import OrderedDict, namedtuple
+from datetime import datetime
+from uuid import UUID
 
-from rest_framework.pagination import PageNumberPagination
+from django.core.paginator import InvalidPage, Page
+from django.db.models import Q
+from rest_framework.exceptions import NotFound
+from rest_framework.pagination import BasePagination, PageNumberPagination
 from rest_framework.response import Response
+from rest_framework.utils.urls import replace_query_param
+
+from .sideload import with_included
+
+
+def positive_int(value, cutoff=None) -> int:
+    """
+    Parse a strictly positive integer query parameter, capped at cutoff.
+    Raises ValueError otherwise.
+    """
+    number = int(value)
+    if number <= 0:
+        raise ValueError(value)
+    return min(number, cutoff) if cutoff else number
 
 
 class MessagePagination(PageNumberPagination):
@@ -13,6 +34,7 @@ class MessagePagination(PageNumberPagination):
     - total count (page.paginator.count)
     - next/previous links
     - results
+    - included, when the page side-loads related objects (chats.sideload)
     """
 
     page_size = 20
@@ -25,12 +47,248 @@ class MessagePagination(PageNumberPagination):
         The checker expects 'page.paginator.count' to appear in this file.
         """
         return Response(
-            OrderedDict(
-                [
-                    ("count", self.page.paginator.count),
-                    ("next", self.get_next_link()),
-                    ("previous", self.get_previous_link()),
-                    ("results", data),
-                ]
+            with_included(
+                OrderedDict(
+                    [
+                        ("count", self.page.paginator.count),
+                        ("next", self.get_next_link()),
+                        ("previous", self.get_previous_link()),
+                        ("results", data),
+                    ]
+                ),
+                data,
             )
         )
+
+
+class ConversationPagination(PageNumberPagination):
+    """
+    The default page number pagination (settings.REST_FRAMEWORK), plus
+    apaginate_queryset() for the async conversation list.
+    """
+
+    async def apaginate_queryset(self, queryset, request, view=None):
+        """
+        paginate_queryset() for async views, using the async ORM.
+        """
+        self.request = request
+        page_size = self.get_page_size(request)
+        if not page_size:
+            return None
+
+        paginator = self.django_paginator_class(queryset, page_size)
+        paginator.count = await queryset.acount()
+        page_number = self.get_page_number(request, paginator)
+        try:
+            number = paginator.validate_number(page_number)
+        except InvalidPage as exc:
+            msg = self.invalid_page_message.format(
+                page_number=page_number, message=str(exc)
+            )
+            raise NotFound(msg)
+
+        bottom = (number - 1) * page_size
+        rows = [row async for row in queryset[bottom:bottom + page_size]]
+        self.page = Page(rows, number, paginator)
+        return rows
+
+
+# Position of a message in the (sent_at, message_id) ordering.
+# "reverse" is set on cursors that walk backwards (previous links).
+Cursor = namedtuple("Cursor", ["sent_at", "message_id", "reverse"])
+
+
+class MessageCursorPagination(BasePagination):
+    """
+    Keyset pagination for messages, keyed on (sent_at, message_id).
+
+    Instead of OFFSET paging, each page is fetched with a
+    "WHERE (sent_at, message_id) > (last_sent_at, last_id)" condition,
+    so deep pages cost the same as the first one.
+
+    - ?cursor=<opaque>   → position taken from a next/previous link
+    - ?page_size=<n>     → page size (max 100)
+    - ?count=exact       → also compute the total count (skipped by default)
+
+    The response keeps the same shape as MessagePagination:
+    count / next / previous / results (+ included). "count" is null
+    unless requested.
+    """
+
+    page_size = 20
+    page_size_query_param = "page_size"
+    max_page_size = 100
+    cursor_query_param = "cursor"
+    count_query_param = "count"
+    invalid_cursor_message = "Invalid cursor"
+
+    def paginate_queryset(self, queryset, request, view=None):
+        page_queryset = self.page_queryset(queryset, request)
+        if self.count_requested(request):
+            self.count = queryset.order_by().count()
+        return self.set_page(list(page_queryset))
+
+    async def apaginate_queryset(self, queryset, request, view=None):
+        """
+        paginate_queryset() for async views, using the async ORM.
+        """
+        page_queryset = self.page_queryset(queryset, request)
+        if self.count_requested(request):
+            self.count = await queryset.order_by().acount()
+        return self.set_page([row async for row in page_queryset])
+
+    def page_queryset(self, queryset, request):
+        """
+        Lazy queryset of the requested page, plus one extra row
+        telling whether there is a further page.
+        """
+        self.request = request
+        self.base_url = request.build_absolute_uri()
+        self.page_size = self.get_page_size(request)
+        self.descending = self.is_descending(queryset)
+        self.count = None
+
+        self.cursor = self.decode_cursor(request)
+        self.reverse = bool(self.cursor and self.cursor.reverse)
+        descending = self.descending != self.reverse
+
+        if self.cursor is not None:
+            queryset = queryset.filter(
+                self.position_filter(self.cursor, descending)
+            )
+
+        prefix = "-" if descending else ""
+        queryset = queryset.order_by(f"{prefix}sent_at", f"{prefix}message_id")
+        return queryset[: self.page_size + 1]
+
+    def set_page(self, results):
+        has_more = len(results) > self.page_size
+        results = results[: self.page_size]
+
+        if self.reverse:
+            results.reverse()
+            self.has_previous = has_more
+            self.has_next = True
+        else:
+            self.has_previous = self.cursor is not None
+            self.has_next = has_more
+
+        self.page = results
+        return results
+
+    def get_paginated_response(self, data):
+        return Response(
+            with_included(
+                OrderedDict(
+                    [
+                        ("count", self.count),
+                        ("next", self.get_next_link()),
+                        ("previous", self.get_previous_link()),
+                        ("results", data),
+                    ]
+                ),
+                data,
+            )
+        )
+
+    def get_paginated_response_schema(self, schema):
+        return {
+            "type": "object",
+            "required": ["results"],
+            "properties": {
+                "count": {"type": "integer", "nullable": True},
+                "next": {"type": "string", "nullable": True, "format": "uri"},
+                "previous": {"type": "string", "nullable": True, "format": "uri"},
+                "results": schema,
+            },
+        }
+
+    # ---------- Helpers ----------
+
+    def count_requested(self, request) -> bool:
+        return request.query_params.get(self.count_query_param) == "exact"
+
+    def get_page_size(self, request) -> int:
+        if self.page_size_query_param:
+            try:
+                return positive_int(
+                    request.query_params[self.page_size_query_param],
+                    cutoff=self.max_page_size,
+                )
+            except (KeyError, ValueError):
+                pass
+        return self.page_size
+
+    @staticmethod
+    def is_descending(queryset) -> bool:
+        """
+        Follow the direction of the ordering applied by the viewset
+        (e.g. ?ordering=-sent_at), defaulting to oldest first.
+        """
+        ordering = queryset.query.order_by or queryset.model._meta.ordering
+        return bool(ordering) and str(ordering[0]).startswith("-")
+
+    @staticmethod
+    def position_filter(cursor: Cursor, descending: bool) -> Q:
+        lookup = "lt" if descending else "gt"
+        return Q(**{f"sent_at__{lookup}": cursor.sent_at}) | Q(
+            sent_at=cursor.sent_at,
+            **{f"message_id__{lookup}": cursor.message_id},
+        )
+
+    def get_next_link(self):
+        if not self.has_next or not self.page:
+            return None
+        last = self.page[-1]
+        return self.encode_cursor(Cursor(last.sent_at, last.message_id, False))
+
+    def get_previous_link(self):
+        if not self.has_previous or not self.page:
+            return None
+        first = self.page[0]
+        return self.encode_cursor(Cursor(first.sent_at, first.message_id, True))
+
+    def decode_cursor(self, request):
+        """
+        Turn the opaque ?cursor= value back into a Cursor, or None.
+        """
+        encoded = request.query_params.get(self.cursor_query_param)
+        if encoded is None:
+            return None
+
+        try:
+            return decode_cursor_token(encoded)
+        except ValueError:
+            raise NotFound(self.invalid_cursor_message)
+
+    def encode_cursor(self, cursor: Cursor) -> str:
+        return replace_query_param(
+            self.base_url, self.cursor_query_param, encode_cursor_token(cursor)
+        )
+
+
+def encode_cursor_token(cursor: Cursor) -> str:
+    """
+    Opaque token for a Cursor (base64 encoded JSON).
+    """
+    payload = {"t": cursor.sent_at.isoformat(), "id": str(cursor.message_id)}
+    if cursor.reverse:
+        payload["r"] = 1
+    return b64encode(
+        json.dumps(payload, separators=(",", ":")).encode("ascii")
+    ).decode("ascii")
+
+
+def decode_cursor_token(token: str) -> Cursor:
+    """
+    Inverse of encode_cursor_token(); raises ValueError on bad input.
+    """
+    try:
+        payload = json.loads(b64decode(token.encode("ascii")).decode("ascii"))
+        return Cursor(
+            sent_at=datetime.fromisoformat(payload["t"]),
+            message_id=UUID(payload["id"]),
+            reverse=bool(payload.get("r", False)),
+        )
+    except (TypeError, KeyError, AttributeError, UnicodeError) as exc:
+        raise ValueError("Invalid cursor") from exc
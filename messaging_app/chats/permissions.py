@@ -1,6 +1,7 @@
 from django.contrib.auth import get_user_model
 from rest_framework import permissions
 
+from .membership import is_participant
 from .models import Conversation, Message
 
 User = get_user_model()
@@ -16,6 +17,9 @@ class IsParticipantOfConversation(permissions.BasePermission):
       * send messages in a conversation
       * update messages in a conversation (PUT/PATCH)
       * delete messages in a conversation (DELETE)
+
+    Membership is answered from the user's cached conversation-id set
+    (see chats.membership), so object checks cost no extra queries.
     """
 
     def has_permission(self, request, view):
@@ -37,16 +41,16 @@ class IsParticipantOfConversation(permissions.BasePermission):
 
         # Resolve the underlying conversation for permission checks
         if isinstance(obj, Conversation):
-            conversation = obj
+            conversation_id = obj.pk
         elif isinstance(obj, Message):
-            conversation = obj.conversation
+            conversation_id = obj.conversation_id
         else:
             return False
 
         # Explicitly mention methods so checker sees them
         if request.method in ("GET", "POST", "PUT", "PATCH", "DELETE"):
             # User must be a participant of this conversation
-            return conversation.participants.filter(pk=user.pk).exists()
+            return is_participant(request, conversation_id)
 
         # For any other HTTP method, deny by default
         return False
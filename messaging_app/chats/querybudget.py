@@ -0,0 +1,233 @@
+"""
+Per-view SQL query budgets.
+
+chats.middleware.query_budget_middleware records, for every request, the
+view that served it, the number of queries, their total time and the
+fingerprints of repeated queries (the same SQL run again with other
+parameters: the signature of an N+1 loop). The stats are checked against
+settings.CHATS_QUERY_BUDGETS:
+
+    CHATS_QUERY_BUDGETS = {
+        "default": {"queries": 20},
+        "conversation-list": {"queries": 6, "duplicates": 0},
+        "POST conversation-list": {"queries": 14, "time_ms": 50},
+    }
+
+Keys are URL names (request.resolver_match.view_name), optionally
+prefixed with the HTTP method; the most specific one applies. Each budget
+may limit "queries", "time_ms" (total SQL time) and "duplicates" (extra
+executions of repeated fingerprints).
+
+settings.CHATS_QUERY_BUDGET_MODE decides what happens over budget: "log"
+(a warning on the chats.querybudget logger), "raise" (QueryBudgetExceeded,
+for development and tests) or "off" (the default: no instrumentation).
+
+Tests assert budgets with assert_within_budget(response).
+"""
+import logging
+import re
+import time
+from collections import Counter
+from contextlib import ExitStack, contextmanager
+from contextvars import ContextVar, Token
+from typing import Dict, List, Optional
+
+from django.conf import settings
+from django.db import connections
+
+logger = logging.getLogger(__name__)
+
+MODES = ("off", "log", "raise")
+
+# Budget keys and the QueryStats attribute each one limits.
+LIMITS = {
+    "queries": "count",
+    "time_ms": "time_ms",
+    "duplicates": "duplicates",
+}
+
+
+class QueryBudgetExceeded(Exception):
+    """
+    A request ran more (or slower, or more repeated) queries than its
+    view's budget allows.
+    """
+
+
+_in_list = re.compile(r"IN \((?:%s, )*%s\)")
+_spaces = re.compile(r"\s+")
+
+
+def fingerprint(sql: str) -> str:
+    """
+    SQL with its parameters left out and IN lists of any length
+    collapsed, so repeated queries compare equal.
+    """
+    return _in_list.sub("IN (...)", _spaces.sub(" ", sql).strip())
+
+
+class QueryStats:
+    """
+    Queries run by one request, on every database alias.
+    """
+
+    def __init__(self) -> None:
+        self.view_name: Optional[str] = None
+        self.method: Optional[str] = None
+        self.count = 0
+        self.time_ms = 0.0
+        self.fingerprints: Counter = Counter()
+
+    def __call__(self, execute, sql, params, many, context):
+        # Database execute wrapper (connection.execute_wrapper()).
+        start = time.perf_counter()
+        try:
+            return execute(sql, params, many, context)
+        finally:
+            self.time_ms += (time.perf_counter() - start) * 1000
+            self.count += 1
+            self.fingerprints[fingerprint(sql)] += 1
+
+    @property
+    def duplicates(self) -> int:
+        return sum(n - 1 for n in self.fingerprints.values() if n > 1)
+
+    def repeated(self) -> Dict[str, int]:
+        """
+        Fingerprints run more than once, most repeated first.
+        """
+        return {sql: n for sql, n in self.fingerprints.most_common() if n > 1}
+
+    def as_dict(self) -> dict:
+        return {
+            "view": self.view_name,
+            "method": self.method,
+            "queries": self.count,
+            "time_ms": round(self.time_ms, 3),
+            "duplicates": self.duplicates,
+            "repeated": self.repeated(),
+        }
+
+
+@contextmanager
+def record_queries():
+    """
+    Record the queries run in the block, on every database alias, into
+    the QueryStats it yields. Execute wrappers are per thread.
+    """
+    stats = QueryStats()
+    with ExitStack() as stack:
+        for connection in connections.all():
+            stack.enter_context(connection.execute_wrapper(stats))
+        yield stats
+
+
+# Stats of the async request being served; sync_to_async() copies it into
+# the thread running the request's queries.
+_recording: ContextVar[Optional[QueryStats]] = ContextVar(
+    "chats_query_stats", default=None
+)
+
+
+def _record_current(execute, sql, params, many, context):
+    stats = _recording.get()
+    if stats is None:
+        return execute(sql, params, many, context)
+    return stats(execute, sql, params, many, context)
+
+
+def install_recorder() -> None:
+    """
+    Install the wrapper recording into the stats of begin_recording() on
+    the connections of the calling thread (once per connection).
+    """
+    for connection in connections.all():
+        if _record_current not in connection.execute_wrappers:
+            connection.execute_wrappers.append(_record_current)
+
+
+def begin_recording(stats: QueryStats) -> Token:
+    """
+    Record the queries of the current context (and of the sync code it
+    calls through sync_to_async) into stats. Unlike record_queries() this
+    follows an async request across threads; the threads running its
+    queries need install_recorder().
+    """
+    return _recording.set(stats)
+
+
+def end_recording(token: Token) -> None:
+    _recording.reset(token)
+
+
+# ---------- Budgets ----------
+
+def get_mode() -> str:
+    return getattr(settings, "CHATS_QUERY_BUDGET_MODE", "off")
+
+
+def get_budget(view_name: Optional[str], method: Optional[str] = None) -> Optional[dict]:
+    budgets = getattr(settings, "CHATS_QUERY_BUDGETS", {})
+    for key in (f"{method} {view_name}", view_name, "default"):
+        if key in budgets:
+            return budgets[key]
+    return None
+
+
+def over_budget(stats: QueryStats) -> List[str]:
+    """
+    Descriptions of every limit of the view's budget the stats exceed.
+    """
+    budget = get_budget(stats.view_name, stats.method)
+    if not budget:
+        return []
+    problems = []
+    for key, attribute in LIMITS.items():
+        limit = budget.get(key)
+        value = getattr(stats, attribute)
+        if limit is not None and value > limit:
+            problems.append(f"{key} {value:g} > {limit:g}")
+    return problems
+
+
+def check_budget(stats: QueryStats, mode: Optional[str] = None) -> None:
+    """
+    Log or raise, depending on the mode, when the stats exceed the
+    budget of their view.
+    """
+    mode = mode or get_mode()
+    problems = over_budget(stats)
+    if not problems or mode == "off":
+        return
+
+    message = f"{stats.method} {stats.view_name} over query budget: " + ", ".join(
+        problems
+    )
+    repeated = stats.repeated()
+    if repeated:
+        message += "\nRepeated queries:\n" + "\n".join(
+            f"  {n} x {sql}" for sql, n in repeated.items()
+        )
+    if mode == "raise":
+        raise QueryBudgetExceeded(message)
+    logger.warning(message, extra={"query_stats": stats.as_dict()})
+
+
+def assert_within_budget(response) -> QueryStats:
+    """
+    Test helper: fail when the request behind a test client response
+    went over its view's budget. Returns the request's stats.
+    """
+    stats = getattr(response, "query_stats", None)
+    if stats is None:
+        raise AssertionError(
+            "No query stats on the response; is query_budget_middleware "
+            "installed and CHATS_QUERY_BUDGET_MODE not 'off'?"
+        )
+    if get_budget(stats.view_name, stats.method) is None:
+        raise AssertionError(f"No query budget for {stats.method} {stats.view_name}.")
+    try:
+        check_budget(stats, mode="raise")
+    except QueryBudgetExceeded as e:
+        raise AssertionError(str(e)) from None
+    return stats
@@ -0,0 +1,101 @@
+"""
+Read-replica database routing.
+
+Replicas are declared in settings.DATABASE_REPLICAS (aliases of
+DATABASES, built from DATABASE_REPLICA_URLS). During a request
+(see chats.middleware.replica_routing_middleware):
+
+- safe-method requests (GET, HEAD, OPTIONS) read from one replica,
+  picked at random for the whole request
+- other requests use the primary ("default") for reads and writes
+- as soon as a request writes, its remaining reads go to the primary,
+  and so do the client's requests for the next
+  DATABASE_REPLICA_PIN_SECONDS seconds (replication lag), e.g. the list
+  call right after send-message
+
+Outside requests (management commands, shells) everything uses the
+primary.
+"""
+import random
+from contextvars import ContextVar
+from typing import List, Optional
+
+from django.conf import settings
+from django.db import DEFAULT_DB_ALIAS
+
+# Models that must never be read from a lagging replica.
+PRIMARY_ONLY_APPS = {"sessions"}
+
+
+class RoutingState:
+    """
+    Routing decisions of the current request.
+    """
+
+    __slots__ = ("replica", "wrote")
+
+    def __init__(self, replica: Optional[str]) -> None:
+        # None means reads use the primary.
+        self.replica = replica
+        self.wrote = False
+
+    def pin_to_primary(self) -> None:
+        self.replica = None
+
+
+_state: ContextVar[Optional[RoutingState]] = ContextVar("chats_db_routing", default=None)
+
+
+def get_replicas() -> List[str]:
+    return list(getattr(settings, "DATABASE_REPLICAS", []))
+
+
+def begin_routing(read_only: bool):
+    """
+    Start routing a request. read_only requests read from a replica.
+    Returns the token to pass to end_routing().
+    """
+    replicas = get_replicas()
+    replica = random.choice(replicas) if read_only and replicas else None
+    return _state.set(RoutingState(replica))
+
+
+def end_routing(token) -> RoutingState:
+    state = _state.get()
+    _state.reset(token)
+    return state
+
+
+def use_primary() -> None:
+    """
+    Send the rest of the current request's reads to the primary,
+    for views that must not see replication lag.
+    """
+    state = _state.get()
+    if state is not None:
+        state.pin_to_primary()
+
+
+class ReplicaRouter:
+    """
+    Send reads to the request's replica and every write to the primary.
+    """
+
+    def db_for_read(self, model, **hints):
+        state = _state.get()
+        if state is None:
+            return None
+        if state.replica is None or model._meta.app_label in PRIMARY_ONLY_APPS:
+            return DEFAULT_DB_ALIAS
+        return state.replica
+
+    def db_for_write(self, model, **hints):
+        state = _state.get()
+        if state is not None:
+            state.wrote = True
+            state.pin_to_primary()
+        return DEFAULT_DB_ALIAS
+
+    def allow_relation(self, obj1, obj2, **hints):
+        # Replicas hold the same data as the primary.
+        return True
@@ -0,0 +1,354 @@
+"""
+Full-text search over Message.message_body.
+
+Three interchangeable backends share one interface:
+
+- SQLiteFTS5Backend:    FTS5 table "chats_message_fts" keyed on the
+                        explicit integer ids of "chats_message_fts_key",
+                        kept in sync by triggers on chats_message.
+- MySQLFullTextBackend: FULLTEXT index on chats_message.message_body
+                        (Docker / USE_DOCKER_DB profile).
+- InvertedIndexBackend: pure-Python tokenizer writing MessageSearchTerm
+                        rows, maintained by signals on message save.
+
+Each backend restricts a Message queryset to the messages matching a query
+and annotates a "search_rank" (higher is better), so results stay scoped to
+the queryset the view already built (conversations the user takes part in).
+"""
+import logging
+import re
+from collections import Counter
+from typing import Iterable, List, Set
+
+from django.conf import settings
+from django.db import DEFAULT_DB_ALIAS, connections, transaction
+from django.db.models import (
+    Count,
+    F,
+    FloatField,
+    IntegerField,
+    Lookup,
+    OuterRef,
+    Subquery,
+    Sum,
+    Value,
+)
+from django.db.models.expressions import RawSQL
+from django.db.models.functions import Coalesce
+
+from .models import Message, MessageSearchDocument, MessageSearchTerm
+
+logger = logging.getLogger(__name__)
+
+TOKEN_RE = re.compile(r"\w+", re.UNICODE)
+
+# Terms longer than this are truncated (MessageSearchTerm.term max_length).
+MAX_TERM_LENGTH = 64
+
+FTS_TABLE = "chats_message_fts"
+FTS_KEY_TABLE = "chats_message_fts_key"
+
+# Triggers keeping the FTS5 index in sync with chats_message (covers
+# save(), bulk_create() and deletes). Also created by migration 0008;
+# SQLite drops them with the table, so a migration remaking chats_message
+# (AlterField, ...) removes them and ensure_sqlite_fts() puts them back.
+SQLITE_TRIGGERS = {
+    "chats_message_fts_ai": f"""
+        CREATE TRIGGER IF NOT EXISTS chats_message_fts_ai AFTER INSERT ON chats_message
+        BEGIN
+            INSERT INTO {FTS_KEY_TABLE}(message_id) VALUES (new.message_id);
+            INSERT INTO {FTS_TABLE}(rowid, message_id, message_body)
+            SELECT id, message_id, new.message_body FROM {FTS_KEY_TABLE}
+            WHERE message_id = new.message_id;
+        END
+    """,
+    "chats_message_fts_ad": f"""
+        CREATE TRIGGER IF NOT EXISTS chats_message_fts_ad AFTER DELETE ON chats_message
+        BEGIN
+            DELETE FROM {FTS_TABLE} WHERE rowid = (
+                SELECT id FROM {FTS_KEY_TABLE} WHERE message_id = old.message_id
+            );
+            DELETE FROM {FTS_KEY_TABLE} WHERE message_id = old.message_id;
+        END
+    """,
+    "chats_message_fts_au": f"""
+        CREATE TRIGGER IF NOT EXISTS chats_message_fts_au
+        AFTER UPDATE OF message_body ON chats_message
+        BEGIN
+            UPDATE {FTS_TABLE} SET message_body = new.message_body WHERE rowid = (
+                SELECT id FROM {FTS_KEY_TABLE} WHERE message_id = new.message_id
+            );
+        END
+    """,
+}
+
+SQLITE_REBUILD = [
+    f"DELETE FROM {FTS_TABLE}",
+    f"DELETE FROM {FTS_KEY_TABLE}",
+    f"INSERT INTO {FTS_KEY_TABLE}(message_id) SELECT message_id FROM chats_message",
+    f"""
+    INSERT INTO {FTS_TABLE}(rowid, message_id, message_body)
+    SELECT k.id, m.message_id, m.message_body
+    FROM {FTS_KEY_TABLE} k JOIN chats_message m ON m.message_id = k.message_id
+    """,
+]
+
+
+def tokenize(text: str) -> List[str]:
+    """
+    Split text into lower-cased word tokens.
+    """
+    return [token.lower()[:MAX_TERM_LENGTH] for token in TOKEN_RE.findall(text or "")]
+
+
+class BaseSearchBackend:
+    name = "base"
+
+    def filter(self, queryset, terms: List[str]):
+        """
+        Restrict queryset to messages containing every term.
+        """
+        raise NotImplementedError
+
+    def annotate_rank(self, queryset, terms: List[str]):
+        """
+        Annotate "search_rank" on a queryset returned by filter().
+        """
+        raise NotImplementedError
+
+    def search(self, queryset, query: str, ranked: bool = True):
+        """
+        Restrict queryset to messages matching every term of the query,
+        annotated with "search_rank" when ranked. A query without terms
+        matches nothing.
+        """
+        terms = tokenize(query)
+        if not terms:
+            queryset = queryset.none()
+            if ranked:
+                # Keep the annotation callers order by.
+                queryset = queryset.annotate(search_rank=Value(0.0, output_field=FloatField()))
+            return queryset
+        queryset = self.filter(queryset, terms)
+        if ranked:
+            queryset = self.annotate_rank(queryset, terms)
+        return queryset
+
+    def index_messages(self, messages: Iterable[Message], created: bool = False) -> None:
+        """
+        Called after messages are created or edited.
+        Backends maintained by the database itself do nothing.
+        """
+
+    def rebuild(self) -> None:
+        """
+        Rebuild the index from the chats_message table.
+        """
+
+
+class Match(Lookup):
+    """
+    <column> MATCH <query> of an FTS5 table.
+    """
+
+    lookup_name = "match"
+
+    def as_sql(self, compiler, connection):
+        lhs, lhs_params = self.process_lhs(compiler, connection)
+        rhs, rhs_params = self.process_rhs(compiler, connection)
+        return f"{lhs} MATCH {rhs}", [*lhs_params, *rhs_params]
+
+
+MessageSearchDocument._meta.get_field("message_body").register_lookup(Match)
+
+
+class SQLiteFTS5Backend(BaseSearchBackend):
+    name = "sqlite_fts5"
+
+    @staticmethod
+    def match_expression(terms: List[str]) -> str:
+        # Quote every token so user input is never parsed as FTS5 syntax;
+        # space-separated phrases are combined with AND.
+        return " ".join('"%s"' % term.replace('"', '""') for term in terms)
+
+    def filter(self, queryset, terms: List[str]):
+        # Joins the index once; SQLite scans the MATCH first and looks
+        # the messages up by primary key.
+        return queryset.filter(
+            search_document__message_body__match=self.match_expression(terms)
+        )
+
+    def annotate_rank(self, queryset, terms: List[str]):
+        # FTS5 rank is bm25(), where lower is better. Read from the join
+        # added by filter(), so the MATCH still runs once per query.
+        return queryset.annotate(search_rank=-F("search_document__rank"))
+
+    def rebuild(self) -> None:
+        with connections[Message.objects.db].cursor() as cursor:
+            for sql in SQLITE_REBUILD:
+                cursor.execute(sql)
+
+
+class MySQLFullTextBackend(BaseSearchBackend):
+    name = "mysql_fulltext"
+
+    def filter(self, queryset, terms: List[str]):
+        return queryset.filter(
+            message_id__in=RawSQL(
+                "SELECT message_id FROM chats_message "
+                "WHERE MATCH (message_body) AGAINST (%s IN BOOLEAN MODE)",
+                [" ".join(f"+{term}" for term in terms)],
+            )
+        )
+
+    def annotate_rank(self, queryset, terms: List[str]):
+        return queryset.annotate(
+            search_rank=RawSQL(
+                "MATCH (`chats_message`.`message_body`) "
+                "AGAINST (%s IN NATURAL LANGUAGE MODE)",
+                [" ".join(terms)],
+                output_field=FloatField(),
+            )
+        )
+
+    def rebuild(self) -> None:
+        with connections[Message.objects.db].cursor() as cursor:
+            cursor.execute("OPTIMIZE TABLE chats_message")
+
+
+class InvertedIndexBackend(BaseSearchBackend):
+    name = "python"
+
+    def filter(self, queryset, terms: List[str]):
+        terms = set(terms)
+        postings = (
+            MessageSearchTerm.objects.filter(term__in=terms)
+            .values("message_id")
+            .annotate(matched=Count("term"))
+            .filter(matched=len(terms))
+            .values("message_id")
+        )
+        return queryset.filter(message_id__in=postings)
+
+    def annotate_rank(self, queryset, terms: List[str]):
+        score = (
+            MessageSearchTerm.objects.filter(
+                message_id=OuterRef("pk"),
+                term__in=set(terms),
+            )
+            .values("message_id")
+            .annotate(score=Sum("frequency"))
+            .values("score")
+        )
+        return queryset.annotate(
+            search_rank=Coalesce(Subquery(score), 0, output_field=IntegerField())
+        )
+
+    def index_messages(self, messages: Iterable[Message], created: bool = False) -> None:
+        messages = list(messages)
+        if not created:
+            MessageSearchTerm.objects.filter(message__in=messages).delete()
+        MessageSearchTerm.objects.bulk_create(
+            [
+                MessageSearchTerm(
+                    message_id=message.pk,
+                    term=term,
+                    frequency=frequency,
+                )
+                for message in messages
+                for term, frequency in Counter(tokenize(message.message_body)).items()
+            ],
+            batch_size=1000,
+        )
+
+    def rebuild(self, chunk_size: int = 2000) -> None:
+        MessageSearchTerm.objects.all().delete()
+        batch = []
+        for message in Message.objects.only("message_id", "message_body").iterator(
+            chunk_size=chunk_size
+        ):
+            batch.append(message)
+            if len(batch) >= chunk_size:
+                self.index_messages(batch, created=True)
+                batch = []
+        if batch:
+            self.index_messages(batch, created=True)
+
+
+BACKENDS = {
+    backend.name: backend
+    for backend in (SQLiteFTS5Backend, MySQLFullTextBackend, InvertedIndexBackend)
+}
+
+
+def sqlite_fts_objects(connection) -> Set[str]:
+    """
+    Names of the FTS5 index tables and triggers present in the database.
+    """
+    with connection.cursor() as cursor:
+        cursor.execute(
+            "SELECT name FROM sqlite_master WHERE type IN ('table', 'trigger') "
+            "AND name IN (%s, %s, %s, %s, %s)",
+            [FTS_TABLE, FTS_KEY_TABLE, *SQLITE_TRIGGERS],
+        )
+        return {name for (name,) in cursor.fetchall()}
+
+
+def ensure_sqlite_fts(connection) -> bool:
+    """
+    Whether the FTS5 index is installed, recreating its triggers first
+    when some are missing. The index missed every write made without
+    them, so it is rebuilt as well.
+    """
+    present = sqlite_fts_objects(connection)
+    if not {FTS_TABLE, FTS_KEY_TABLE} <= present:
+        return False
+    missing = [name for name in SQLITE_TRIGGERS if name not in present]
+    if missing:
+        logger.warning(
+            "Full-text index triggers %s are missing; recreating them and "
+            "rebuilding %s.",
+            ", ".join(missing),
+            FTS_TABLE,
+        )
+        with transaction.atomic(using=connection.alias), connection.cursor() as cursor:
+            for sql in (*SQLITE_TRIGGERS.values(), *SQLITE_REBUILD):
+                cursor.execute(sql)
+    return True
+
+
+def ensure_search_index(using: str = DEFAULT_DB_ALIAS, **kwargs) -> None:
+    """
+    post_migrate handler: put back the triggers a migration remaking
+    chats_message dropped.
+    """
+    connection = connections[using]
+    if connection.vendor == "sqlite":
+        ensure_sqlite_fts(connection)
+    _auto_backends.pop(using, None)
+
+
+_auto_backends = {}
+
+
+def get_search_backend(using: str = None) -> BaseSearchBackend:
+    """
+    Backend selected by settings.CHATS_SEARCH_BACKEND.
+
+    "auto" (default) picks FTS5 on SQLite, FULLTEXT on MySQL and the
+    pure-Python inverted index everywhere else.
+    """
+    name = getattr(settings, "CHATS_SEARCH_BACKEND", "auto")
+    if name != "auto":
+        return BACKENDS[name]()
+
+    connection = connections[using or Message.objects.db]
+    if connection.alias not in _auto_backends:
+        if connection.vendor == "sqlite" and ensure_sqlite_fts(connection):
+            backend = SQLiteFTS5Backend
+        elif connection.vendor == "mysql":
+            backend = MySQLFullTextBackend
+        else:
+            backend = InvertedIndexBackend
+        _auto_backends[connection.alias] = backend
+    return _auto_backends[connection.alias]()
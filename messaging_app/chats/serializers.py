@@ -1,12 +1,71 @@
 from typing import Any, Dict, List, Optional
 from uuid import UUID
 
+from django.db import models, transaction
 from rest_framework import serializers
 
-from .models import User, Conversation, Message
+from .binary import uses_native_values
+from .fieldsets import Relation, Shape
+from .models import User, Conversation, Message, add_participants
+from .sideload import SideloadListSerializer
 
 
-class UserSerializer(serializers.ModelSerializer):
+# ---------- Native values (see chats.binary) ----------
+
+# Shared field instance so timestamps are formatted exactly like
+# ModelSerializer's DateTimeField (timezone conversion, "Z" suffix, ...).
+_datetime_field = serializers.DateTimeField()
+
+
+def _same(value):
+    return value
+
+
+# (UUID, datetime) formatters: DRF's text formats, or the values
+# themselves for renderers that encode them natively.
+_TEXT_FORMATS = (str, _datetime_field.to_representation)
+_NATIVE_FORMATS = (_same, _same)
+
+
+def value_formats():
+    """
+    The (UUID, datetime) formatters of the response being built.
+    """
+    return _NATIVE_FORMATS if uses_native_values() else _TEXT_FORMATS
+
+
+def _uuid(value):
+    return value if uses_native_values() else str(value)
+
+
+def _timestamp(value):
+    return value if uses_native_values() else _datetime_field.to_representation(value)
+
+
+class NativeUUIDField(serializers.UUIDField):
+    def to_representation(self, value):
+        return value if uses_native_values() else super().to_representation(value)
+
+
+class NativeDateTimeField(serializers.DateTimeField):
+    def to_representation(self, value):
+        return value if uses_native_values() else super().to_representation(value)
+
+
+class NativeValuesModelSerializer(serializers.ModelSerializer):
+    """
+    ModelSerializer whose UUID and datetime model fields are left
+    unformatted for renderers encoding them natively.
+    """
+
+    serializer_field_mapping = {
+        **serializers.ModelSerializer.serializer_field_mapping,
+        models.UUIDField: NativeUUIDField,
+        models.DateTimeField: NativeDateTimeField,
+    }
+
+
+class UserSerializer(NativeValuesModelSerializer):
     """
     Serializer for the custom User model.
     Adds a read-only display_name field using CharField.
@@ -33,7 +92,7 @@ class UserSerializer(serializers.ModelSerializer):
         read_only_fields = ("user_id", "created_at", "display_name")
 
 
-class MessageSerializer(serializers.ModelSerializer):
+class MessageSerializer(NativeValuesModelSerializer):
     """
     Serializer for Message objects.
     Includes nested sender information.
@@ -52,19 +111,189 @@ class MessageSerializer(serializers.ModelSerializer):
         )
         read_only_fields = ("message_id", "sender", "sent_at")
 
+    def get_extra_kwargs(self) -> Dict[str, Any]:
+        # A message stays in the conversation it was sent to: moving it
+        # would leave the activity counters and inboxes of both stale.
+        extra_kwargs = super().get_extra_kwargs()
+        if self.instance is not None:
+            extra_kwargs["conversation"] = {
+                **extra_kwargs.get("conversation", {}),
+                "read_only": True,
+            }
+        return extra_kwargs
+
+
+# ---------- Fast read-only serializers ----------
+
+
+class UserReadSerializer(serializers.BaseSerializer):
+    """
+    Read-only twin of UserSerializer for list/retrieve responses.
+
+    Builds the dict directly from model attributes instead of going
+    through the ModelSerializer field machinery; the rendered JSON is
+    identical to UserSerializer's.
+    """
+
+    def to_representation(self, user: User) -> Dict[str, Any]:
+        uuid, timestamp = value_formats()
+        return {
+            "user_id": uuid(user.user_id),
+            "email": user.email,
+            "first_name": user.first_name,
+            "last_name": user.last_name,
+            "phone_number": user.phone_number,
+            "role": user.role,
+            "created_at": timestamp(user.created_at),
+            "display_name": user.get_full_name(),
+        }
+
+
+class MessageReadSerializer(serializers.BaseSerializer):
+    """
+    Read-only twin of MessageSerializer for list/retrieve responses.
+
+    Expects the sender to be loaded with select_related("sender").
+    The rendered JSON is identical to MessageSerializer's.
+    """
+
+    def to_representation(self, message: Message) -> Dict[str, Any]:
+        uuid, timestamp = value_formats()
+        return {
+            "message_id": uuid(message.message_id),
+            "sender": user_representation(message.sender),
+            # PrimaryKeyRelatedField returns the raw pk as well.
+            "conversation": message.conversation_id,
+            "message_body": message.message_body,
+            "sent_at": timestamp(message.sent_at),
+        }
+
+
+user_representation = UserReadSerializer().to_representation
+message_representation = MessageReadSerializer().to_representation
+
+
+class CompactMessageListSerializer(SideloadListSerializer):
+    """
+    Page of messages in the compact format of ?include=users (see
+    chats.sideload): messages reference their sender by sender_id and
+    each sender is rendered once, in included["users"].
+
+    Expects the senders to be loaded with select_related("sender").
+    """
+
+    def __init__(self, *args, **kwargs) -> None:
+        kwargs.setdefault("child", MessageReadSerializer())
+        super().__init__(*args, **kwargs)
+
+    def to_representation(self, messages) -> List[Dict[str, Any]]:
+        uuid, timestamp = value_formats()
+        users: Dict[Any, Dict[str, Any]] = {}
+        results = []
+        for message in messages:
+            sender_id = uuid(message.sender_id)
+            if sender_id not in users:
+                users[sender_id] = user_representation(message.sender)
+            results.append(
+                {
+                    "message_id": uuid(message.message_id),
+                    "sender_id": sender_id,
+                    "conversation": message.conversation_id,
+                    "message_body": message.message_body,
+                    "sent_at": timestamp(message.sent_at),
+                }
+            )
+        self.included = {"users": users}
+        return results
+
 
-class ConversationSerializer(serializers.ModelSerializer):
+# ---------- Sparse fieldsets (see chats.fieldsets) ----------
+
+# Same values as the read serializers above, field by field, with the
+# columns each one reads.
+USER_SHAPE = Shape(
+    {
+        "user_id": (("user_id",), lambda user: _uuid(user.user_id)),
+        "email": (("email",), lambda user: user.email),
+        "first_name": (("first_name",), lambda user: user.first_name),
+        "last_name": (("last_name",), lambda user: user.last_name),
+        "phone_number": (("phone_number",), lambda user: user.phone_number),
+        "role": (("role",), lambda user: user.role),
+        "created_at": (("created_at",), lambda user: _timestamp(user.created_at)),
+        "display_name": (("first_name", "last_name"), lambda user: user.get_full_name()),
+    },
+    required=("user_id",),
+)
+
+MESSAGE_SHAPE = Shape(
+    {
+        "message_id": (("message_id",), lambda message: _uuid(message.message_id)),
+        "sender": Relation(
+            USER_SHAPE, lambda message: _uuid(message.sender_id), column="sender"
+        ),
+        "conversation": (("conversation",), lambda message: message.conversation_id),
+        "message_body": (("message_body",), lambda message: message.message_body),
+        "sent_at": (("sent_at",), lambda message: _timestamp(message.sent_at)),
+    },
+    # Keyset pagination and the participant check read these.
+    required=("message_id", "sent_at", "conversation"),
+)
+
+
+class BulkMessageItemSerializer(serializers.Serializer):
+    """
+    One message of a bulk import.
+
+    - sender: UUID of the sending user (defaults to the authenticated user)
+    - message_body: text body of the message
+    - sent_at: original timestamp (defaults to now)
+    """
+
+    sender = serializers.UUIDField(required=False)
+    message_body = serializers.CharField()
+    sent_at = serializers.DateTimeField(required=False)
+
+
+class BulkMessageCreateSerializer(serializers.Serializer):
+    """
+    Payload of POST /conversations/{conversation_id}/messages/bulk/.
+    """
+
+    MAX_MESSAGES = 5000
+
+    messages = BulkMessageItemSerializer(
+        many=True,
+        allow_empty=False,
+        max_length=MAX_MESSAGES,
+    )
+
+
+def check_users_exist(user_ids) -> None:
+    """
+    Raise a ValidationError naming every id that does not belong to a
+    user, with a single query.
+    """
+    found = set(User.objects.filter(user_id__in=user_ids).values_list("user_id", flat=True))
+    missing = [str(user_id) for user_id in user_ids if user_id not in found]
+    if missing:
+        raise serializers.ValidationError(
+            [f"{user_id} is not a known user." for user_id in missing]
+        )
+
+
+class ConversationSerializer(NativeValuesModelSerializer):
     """
     Serializer for Conversation objects.
 
     - participants: nested list of users (read-only).
-    - messages: nested list of messages (read-only).
     - participant_ids: write-only list of user UUIDs used to create/update participants.
     - last_message: computed field using SerializerMethodField.
+
+    The message history is not embedded; it is served by the paginated
+    /conversations/{conversation_id}/messages/ route.
     """
 
-    participants = UserSerializer(many=True, read_only=True)
-    messages = MessageSerializer(many=True, read_only=True)
+    participants = UserReadSerializer(many=True, read_only=True)
 
     participant_ids = serializers.ListField(
         child=serializers.UUIDField(),
@@ -81,14 +310,12 @@ class ConversationSerializer(serializers.ModelSerializer):
             "conversation_id",
             "participants",
             "participant_ids",
-            "messages",
             "last_message",
             "created_at",
         )
         read_only_fields = (
             "conversation_id",
             "participants",
-            "messages",
             "last_message",
             "created_at",
         )
@@ -97,12 +324,15 @@ class ConversationSerializer(serializers.ModelSerializer):
 
     def validate_participant_ids(self, value: List[UUID]) -> List[UUID]:
         """
-        Ensure that at least one participant is provided when creating a conversation.
+        Ensure that at least one participant is provided, and that every
+        id belongs to a user (checked with a single query).
         """
         if not value:
             raise serializers.ValidationError(
                 "At least one participant_id must be provided."
             )
+        value = list(dict.fromkeys(value))
+        check_users_exist(value)
         return value
 
     # ---------- Computed fields ----------
@@ -110,36 +340,31 @@ class ConversationSerializer(serializers.ModelSerializer):
     def get_last_message(self, obj: Conversation) -> Optional[Dict[str, Any]]:
         """
         Return the most recent message in this conversation, if any.
+
+        Reads the denormalized Conversation.last_message, joined by
+        Conversation.objects.with_last_message() in listings.
         """
-        last = obj.messages.order_by("-sent_at").first()
+        last = obj.last_message
         if not last:
             return None
-        return MessageSerializer(last).data
+        return message_representation(last)
 
     # ---------- Create / Update ----------
 
     def create(self, validated_data: Dict[str, Any]) -> Conversation:
         """
         - Creates the conversation
-        - Adds participants from participant_ids
-        - Ensures the authenticated user is also a participant
+        - Adds participants from participant_ids and the authenticated
+          user, with a single INSERT into the participants table
         """
-        participant_ids: List[UUID] = validated_data.pop("participant_ids", [])
-        conversation = Conversation.objects.create(**validated_data)
-
-        if participant_ids:
-            users = User.objects.filter(user_id__in=participant_ids)
-            if not users.exists():
-                raise serializers.ValidationError(
-                    "No valid users found for the given participant_ids."
-                )
-            conversation.participants.add(*users)
-
-        # Ensure the current authenticated user is also a participant
+        participant_ids = set(validated_data.pop("participant_ids", []))
         request = self.context.get("request")
         if request and request.user.is_authenticated:
-            conversation.participants.add(request.user)
+            participant_ids.add(request.user.pk)
 
+        with transaction.atomic(savepoint=False):
+            conversation = Conversation.objects.create(**validated_data)
+            add_participants([(conversation, participant_ids)])
         return conversation
 
     def update(self, instance: Conversation, validated_data: Dict[str, Any]) -> Conversation:
@@ -147,14 +372,121 @@ class ConversationSerializer(serializers.ModelSerializer):
             "participant_ids", None
         )
 
-        instance = super().update(instance, validated_data)
-
-        if participant_ids is not None:
-            users = User.objects.filter(user_id__in=participant_ids)
-            if not users.exists():
-                raise serializers.ValidationError(
-                    "No valid users found for the given participant_ids."
-                )
-            instance.participants.set(users)
+        with transaction.atomic(savepoint=False):
+            # Only save the fields given: a full save() would write back
+            # stale activity counters (see chats.activity).
+            for attr, value in validated_data.items():
+                setattr(instance, attr, value)
+            if validated_data:
+                instance.save(update_fields=list(validated_data))
+            if participant_ids is not None:
+                instance.set_participants(participant_ids)
 
         return instance
+
+
+class ConversationSummarySerializer(ConversationSerializer):
+    """
+    Lightweight, read-only representation used by the conversation list.
+
+    - participants, last_message: as in ConversationSerializer.
+    - message_count: the denormalized counter of the conversation.
+    - unread_count: the user's inbox entry, annotated by
+      Conversation.objects.inbox(user).
+    """
+
+    message_count = serializers.IntegerField(read_only=True, default=0)
+    unread_count = serializers.IntegerField(read_only=True, default=0)
+
+    class Meta(ConversationSerializer.Meta):
+        fields = (
+            "conversation_id",
+            "participants",
+            "last_message",
+            "message_count",
+            "unread_count",
+            "created_at",
+        )
+        read_only_fields = fields
+
+
+def _last_message_id(conversation: Conversation) -> Optional[str]:
+    return conversation.last_message_id and _uuid(conversation.last_message_id)
+
+
+CONVERSATION_SHAPE = Shape(
+    {
+        "conversation_id": (
+            ("conversation_id",),
+            lambda conversation: _uuid(conversation.conversation_id),
+        ),
+        "participants": Relation(
+            USER_SHAPE,
+            lambda conversation: [_uuid(user.pk) for user in conversation.participants.all()],
+            many=True,
+        ),
+        "last_message": Relation(MESSAGE_SHAPE, _last_message_id, column="last_message"),
+        "created_at": (
+            ("created_at",),
+            lambda conversation: _timestamp(conversation.created_at),
+        ),
+    },
+    required=("conversation_id",),
+)
+
+# The conversation list; unread_count is annotated by
+# Conversation.objects.inbox(user).
+CONVERSATION_SUMMARY_SHAPE = Shape(
+    {
+        **{
+            name: CONVERSATION_SHAPE.fields[name]
+            for name in ("conversation_id", "participants", "last_message")
+        },
+        "message_count": (
+            ("message_count",),
+            lambda conversation: conversation.message_count,
+        ),
+        "unread_count": ((), lambda conversation: getattr(conversation, "unread_count", 0)),
+        "created_at": CONVERSATION_SHAPE.fields["created_at"],
+    },
+    required=("conversation_id",),
+)
+
+
+class BulkConversationItemSerializer(serializers.Serializer):
+    """
+    One conversation of a bulk creation: its participants besides the
+    authenticated user.
+    """
+
+    participant_ids = serializers.ListField(
+        child=serializers.UUIDField(),
+        allow_empty=False,
+    )
+
+
+class BulkConversationCreateSerializer(serializers.Serializer):
+    """
+    Payload of POST /conversations/bulk/.
+
+    Every participant id of every conversation is checked with a single
+    query.
+    """
+
+    MAX_CONVERSATIONS = 1000
+
+    conversations = BulkConversationItemSerializer(
+        many=True,
+        allow_empty=False,
+        max_length=MAX_CONVERSATIONS,
+    )
+
+    def validate_conversations(self, value: List[Dict[str, Any]]) -> List[Dict[str, Any]]:
+        user_ids = dict.fromkeys(
+            user_id for item in value for user_id in item["participant_ids"]
+        )
+        try:
+            check_users_exist(list(user_ids))
+        except serializers.ValidationError as e:
+            raise serializers.ValidationError({"participant_ids": e.detail})
+        return value
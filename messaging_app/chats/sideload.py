@@ -0,0 +1,99 @@
+"""
+Side-loaded related objects: ?include=users.
+
+A page of messages nests the sender in every message, so a 100-message
+page of a two-person conversation renders the same two users 100 times.
+With ?include=users list responses switch to a compact format: each
+message carries a sender_id reference and the response gains
+
+    "included": {"users": {"<user_id>": {...}, ...}}
+
+with every referenced user rendered once. The map is built in the same
+pass over the page as the results, from the senders already loaded with
+the page (select_related), so it costs no extra query.
+"""
+from typing import Any, Dict, Optional
+
+from rest_framework import serializers
+from rest_framework.exceptions import ValidationError
+
+from .fieldsets import EXPAND_PARAM, FIELDS_PARAM
+
+INCLUDE_PARAM = "include"
+
+# Collections that can be side-loaded.
+INCLUDABLE = ("users",)
+
+
+class SideloadListSerializer(serializers.ListSerializer):
+    """
+    ListSerializer rendering references instead of nested objects.
+
+    Subclasses implement to_representation() and collect the referenced
+    objects, each rendered once, in self.included (collection -> id ->
+    representation).
+    """
+
+    included: Dict[str, Dict[str, Any]]
+
+
+def included_of(data) -> Optional[Dict[str, Dict[str, Any]]]:
+    """
+    The side-loaded objects of serializer.data, None when the data was
+    not produced by a SideloadListSerializer.
+    """
+    serializer = getattr(data, "serializer", None)
+    return getattr(serializer, "included", None)
+
+
+def with_included(payload: Dict[str, Any], data) -> Dict[str, Any]:
+    """
+    Add the side-loaded objects of data, if any, to a response payload
+    whose "results" are data.
+    """
+    included = included_of(data)
+    if included is not None:
+        payload["included"] = included
+    return payload
+
+
+class SideloadMixin:
+    """
+    ViewSet mixin: the list actions of sideload_actions honour
+    ?include=users, serializing pages with sideload_serializer_class.
+
+    The compact format has its own fixed shape, so it cannot be combined
+    with ?fields= / ?expand=.
+    """
+
+    sideload_actions = ()
+    sideload_serializer_class = None
+
+    def get_sideloads(self) -> frozenset:
+        """
+        The requested collections, validated; empty when none or when the
+        action does not side-load.
+        """
+        value = self.request.query_params.get(INCLUDE_PARAM)
+        if self.action not in self.sideload_actions or value is None:
+            return frozenset()
+        sideloads = frozenset(part.strip() for part in value.split(",") if part.strip())
+        errors = [
+            f"Cannot include {name}. Choose from: {', '.join(INCLUDABLE)}."
+            for name in sorted(sideloads - set(INCLUDABLE))
+        ]
+        if errors:
+            raise ValidationError({INCLUDE_PARAM: errors})
+        params = self.request.query_params
+        if sideloads and (FIELDS_PARAM in params or EXPAND_PARAM in params):
+            raise ValidationError(
+                {INCLUDE_PARAM: [f"Cannot be combined with {FIELDS_PARAM} or {EXPAND_PARAM}."]}
+            )
+        return sideloads
+
+    def get_serializer(self, *args, **kwargs):
+        if kwargs.get("many") and self.get_sideloads():
+            kwargs.pop("many")
+            kwargs.setdefault("context", self.get_serializer_context())
+            return self.sideload_serializer_class(*args, **kwargs)
+        return super().get_serializer(*args, **kwargs)
@@ -0,0 +1,275 @@
+from django.db import transaction
+from django.db.models.signals import m2m_changed, post_delete, post_save, pre_delete
+from django.dispatch import Signal, receiver
+
+from . import inbox
+from .activity import record_deleted_message, record_messages, refresh_activity
+from .auth import invalidate_user
+from .membership import invalidate_membership
+from .models import Conversation, Message, User
+from .notifications import notifier
+from .search import get_search_backend
+from .versions import bump_version
+
+# Sent after Message.objects.bulk_create() in the bulk import path,
+# which does not send post_save.
+# Arguments: conversation_id, messages (list of created Message objects).
+messages_bulk_created = Signal()
+
+
+@receiver(m2m_changed, sender=Conversation.participants.through)
+def on_participants_change(
+    sender, instance, action: str, reverse: bool, pk_set, **kwargs
+) -> None:
+    """
+    Keep caches in sync with participants.
+
+    - forward side (conversation.participants.add/remove/clear)
+    - reverse side (user.conversations.add/remove/clear)
+
+    Affected users get their cached conversation-id set dropped and their
+    conversation-list version bumped; affected conversations get their
+    version bumped, and so does the conversation list of every other
+    participant, which embeds the participants.
+    """
+    if action not in ("post_add", "post_remove", "pre_clear"):
+        return
+
+    if reverse:
+        user_ids = {instance.pk}
+        if action == "pre_clear":
+            conversation_ids = set(instance.conversations.values_list("pk", flat=True))
+        else:
+            conversation_ids = set(pk_set or ())
+    else:
+        conversation_ids = {instance.pk}
+        if action == "pre_clear":
+            user_ids = set(instance.participants.values_list("pk", flat=True))
+        else:
+            user_ids = set(pk_set or ())
+
+    if action != "pre_clear" and not pk_set:
+        return
+
+    invalidate_membership(*user_ids)
+    # Removed users are no longer found by bump_conversation_versions().
+    bump_version("user", *user_ids)
+    # add_participants() (bulk=True) bumps its conversations in one go.
+    if not kwargs.get("bulk"):
+        bump_conversation_versions(*conversation_ids)
+
+
+@receiver(pre_delete, sender=Conversation)
+def on_conversation_delete(sender, instance: Conversation, **kwargs) -> None:
+    """
+    Deleting a conversation removes its participant rows without
+    sending m2m_changed, so invalidate its participants here.
+    """
+    user_ids = list(instance.participants.values_list("pk", flat=True))
+    invalidate_membership(*user_ids)
+    bump_version("user", *user_ids)
+
+
+@receiver(pre_delete, sender=User)
+def on_user_delete(sender, instance: User, **kwargs) -> None:
+    invalidate_membership(instance.pk)
+    bump_conversation_versions(*instance.conversations.values_list("pk", flat=True))
+    # The user's messages are deleted with them; their conversations'
+    # activity is recomputed once afterwards (refresh_activity_on_user_delete).
+    instance._activity_conversation_ids = list(
+        Message.objects.filter(sender=instance)
+        .order_by()
+        .values_list("conversation_id", flat=True)
+        .distinct()
+    )
+
+
+@receiver(post_delete, sender=User)
+def refresh_activity_on_user_delete(sender, instance: User, **kwargs) -> None:
+    conversation_ids = getattr(instance, "_activity_conversation_ids", None)
+    if conversation_ids:
+        refresh_activity(conversation_ids, using=kwargs.get("using"))
+        inbox.refresh_inbox(conversation_ids, using=kwargs.get("using"))
+
+
+@receiver(post_save, sender=Message)
+def index_message_on_save(sender, instance: Message, **kwargs) -> None:
+    """
+    Keep the search index in sync with message bodies.
+    Database-maintained indexes (FTS5 triggers, FULLTEXT) ignore this.
+    """
+    get_search_backend(kwargs.get("using")).index_messages(
+        [instance], created=kwargs.get("created", False)
+    )
+
+
+@receiver(messages_bulk_created, sender=Message)
+def index_messages_on_bulk_create(sender, messages, **kwargs) -> None:
+    get_search_backend().index_messages(messages, created=True)
+
+
+@receiver(post_save, sender=Message)
+def record_activity_on_save(
+    sender, instance: Message, created: bool, **kwargs
+) -> None:
+    """
+    Keep Conversation.last_message / last_message_at / message_count
+    in sync with new messages.
+    """
+    if created:
+        record_messages(instance.conversation_id, [instance], using=kwargs.get("using"))
+
+
+@receiver(messages_bulk_created, sender=Message)
+def record_activity_on_bulk_create(sender, conversation_id, messages, **kwargs) -> None:
+    record_messages(conversation_id, messages)
+
+
+@receiver(post_delete, sender=Message)
+def record_activity_on_delete(sender, instance: Message, **kwargs) -> None:
+    # Conversations go away with their messages; user deletions are
+    # recomputed in one go by refresh_activity_on_user_delete.
+    if isinstance(kwargs.get("origin"), (Conversation, User)):
+        return
+    record_deleted_message(instance, using=kwargs.get("using"))
+
+
+# ---------- Inboxes (chats.inbox) ----------
+
+@receiver(m2m_changed, sender=Conversation.participants.through)
+def update_inbox_on_participants_change(
+    sender, instance, action: str, reverse: bool, pk_set, **kwargs
+) -> None:
+    """
+    Add and remove inbox entries with participants. add_participants()
+    (bulk=True) writes the entries itself.
+    """
+    using = kwargs.get("using")
+    if action == "post_add" and pk_set and not kwargs.get("bulk"):
+        if reverse:
+            conversations = Conversation.objects.using(using).filter(pk__in=pk_set)
+            inbox.add_entries(
+                [(conversation, {instance.pk}) for conversation in conversations],
+                using=using,
+            )
+        else:
+            inbox.add_entries([(instance, pk_set)], using=using)
+    elif action == "post_remove" and pk_set:
+        if reverse:
+            inbox.remove_entries(pk_set, [instance.pk], using=using)
+        else:
+            inbox.remove_entries([instance.pk], pk_set, using=using)
+    elif action == "pre_clear":
+        if reverse:
+            inbox.remove_entries(user_ids=[instance.pk], using=using)
+        else:
+            inbox.remove_entries(conversation_ids=[instance.pk], using=using)
+
+
+@receiver(post_save, sender=Message)
+def update_inbox_on_save(sender, instance: Message, created: bool, **kwargs) -> None:
+    if created:
+        inbox.record_messages(
+            instance.conversation_id, [instance], using=kwargs.get("using")
+        )
+
+
+@receiver(messages_bulk_created, sender=Message)
+def update_inbox_on_bulk_create(sender, conversation_id, messages, **kwargs) -> None:
+    inbox.record_messages(conversation_id, messages)
+
+
+@receiver(post_delete, sender=Message)
+def update_inbox_on_delete(sender, instance: Message, **kwargs) -> None:
+    # Registered after the activity receivers, which it relies on.
+    if isinstance(kwargs.get("origin"), (Conversation, User)):
+        return
+    inbox.record_deleted_message(instance, using=kwargs.get("using"))
+
+
+def bump_conversation_versions(*conversation_ids) -> None:
+    """
+    Bump the versions of conversations and the conversation-list
+    versions of their participants, with one query and two cache writes.
+    """
+    if not conversation_ids:
+        return
+    bump_version("conversation", *conversation_ids)
+    bump_version(
+        "user",
+        *Conversation.participants.through.objects.filter(
+            conversation_id__in=conversation_ids
+        )
+        .values_list("user_id", flat=True)
+        .distinct(),
+    )
+
+
+@receiver(post_save, sender=Message)
+def bump_versions_on_message_edit(
+    sender, instance: Message, created: bool, **kwargs
+) -> None:
+    """
+    New messages already change the (max sent_at, count) aggregates used
+    as validators; edits do not, so they bump the versions instead.
+    """
+    if not created:
+        bump_conversation_versions(instance.conversation_id)
+
+
+@receiver(post_delete, sender=Message)
+def bump_versions_on_message_delete(sender, instance: Message, **kwargs) -> None:
+    # Cascades from a deleted conversation or user are handled by their
+    # own pre_delete receivers.
+    if isinstance(kwargs.get("origin"), (Conversation, User)):
+        return
+    bump_conversation_versions(instance.conversation_id)
+
+
+@receiver(post_save, sender=User)
+@receiver(post_delete, sender=User)
+def invalidate_cached_user(sender, instance: User, **kwargs) -> None:
+    """
+    Drop the row cached for JWT authentication (chats.auth) on every
+    save: profile edits, deactivation, password changes.
+    """
+    invalidate_user(instance.pk)
+
+
+# User fields embedded in conversation and message payloads.
+PUBLIC_USER_FIELDS = frozenset(
+    ("email", "first_name", "last_name", "phone_number", "role")
+)
+
+
+@receiver(post_save, sender=User)
+def bump_versions_on_profile_change(
+    sender, instance: User, created: bool, update_fields=None, **kwargs
+) -> None:
+    """
+    Senders and participants are embedded in cached pages, so a profile
+    change invalidates the conversations the user takes part in.
+    Saves limited to other fields (e.g. last_login) are ignored.
+    """
+    if created:
+        return
+    if update_fields is not None and not PUBLIC_USER_FIELDS & set(update_fields):
+        return
+    bump_conversation_versions(*instance.conversations.values_list("pk", flat=True))
+
+
+@receiver(post_save, sender=Message)
+def notify_waiters_on_message_create(
+    sender, instance: Message, created: bool, **kwargs
+) -> None:
+    """
+    Wake long-poll requests once the new message is visible to them.
+    """
+    if created:
+        conversation_id = instance.conversation_id
+        transaction.on_commit(lambda: notifier.notify(conversation_id))
+
+
+@receiver(messages_bulk_created, sender=Message)
+def notify_waiters_on_bulk_create(sender, conversation_id, **kwargs) -> None:
+    transaction.on_commit(lambda: notifier.notify(conversation_id))
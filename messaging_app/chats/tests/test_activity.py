@@ -0,0 +1,147 @@
+from datetime import timedelta
+from io import StringIO
+
+from django.core.management import call_command
+from django.test import TestCase
+from django.utils import timezone
+from rest_framework.test import APIClient
+
+from chats.cache import get_cache
+from chats.models import Conversation, Message, User
+
+
+class ConversationActivityTestCase(TestCase):
+    def setUp(self) -> None:
+        get_cache().clear()
+        self.client = APIClient()
+        self.user = User.objects.create_user(
+            username="alice",
+            email="alice@example.com",
+            password="password123",
+        )
+        self.other = User.objects.create_user(
+            username="bob",
+            email="bob@example.com",
+            password="password123",
+        )
+        self.client.force_authenticate(self.user)
+
+        self.conversation = Conversation.objects.create()
+        self.conversation.participants.add(self.user, self.other)
+        self.start = timezone.now() - timedelta(days=1)
+
+    def send(self, sender: User, minutes: int) -> Message:
+        return Message.objects.create(
+            sender=sender,
+            conversation=self.conversation,
+            message_body=f"at {minutes}",
+            sent_at=self.start + timedelta(minutes=minutes),
+        )
+
+    def assertActivity(self, last, count: int) -> None:
+        self.conversation.refresh_from_db()
+        self.assertEqual(self.conversation.message_count, count)
+        self.assertEqual(self.conversation.last_message_id, last and last.pk)
+        self.assertEqual(self.conversation.last_message_at, last and last.sent_at)
+
+    def test_new_messages_update_the_counters(self):
+        latest = self.send(self.user, 2)
+        self.send(self.other, 1)  # imported out of order
+
+        self.assertActivity(latest, 2)
+
+    def test_send_message_endpoint_updates_the_counters(self):
+        response = self.client.post(
+            f"/api/conversations/{self.conversation.conversation_id}/send-message/",
+            {"message_body": "hello"},
+            format="json",
+        )
+
+        self.assertEqual(response.status_code, 201)
+        self.assertActivity(Message.objects.get(), 1)
+
+    def test_bulk_import_updates_the_counters(self):
+        self.send(self.user, 0)
+        payload = {
+            "messages": [
+                {
+                    "message_body": f"m{i}",
+                    "sent_at": (self.start + timedelta(minutes=i)).isoformat(),
+                }
+                for i in range(1, 6)
+            ]
+        }
+
+        response = self.client.post(
+            f"/api/conversations/{self.conversation.conversation_id}/messages/bulk/",
+            payload,
+            format="json",
+        )
+
+        self.assertEqual(response.status_code, 201)
+        self.assertActivity(Message.objects.get(message_body="m5"), 6)
+
+    def test_deleting_the_last_message_moves_it_back(self):
+        first = self.send(self.user, 0)
+        second = self.send(self.other, 1)
+        last = self.send(self.other, 2)
+
+        second.delete()
+        self.assertActivity(last, 2)
+
+        last.delete()
+        self.assertActivity(first, 1)
+
+        first.delete()
+        self.assertActivity(None, 0)
+
+    def test_messages_cannot_be_moved_to_another_conversation(self):
+        message = self.send(self.user, 1)
+        other = Conversation.objects.create()
+        other.participants.add(self.user)
+
+        for method in ("patch", "put"):
+            with self.subTest(method=method):
+                response = getattr(self.client, method)(
+                    f"/api/messages/{message.pk}/",
+                    {"conversation": str(other.pk), "message_body": "edited"},
+                    format="json",
+                )
+
+                self.assertEqual(response.status_code, 200)
+                self.assertEqual(response.data["conversation"], self.conversation.pk)
+        self.assertActivity(message, 1)
+        other.refresh_from_db()
+        self.assertEqual(other.message_count, 0)
+
+    def test_deleting_a_user_recomputes_their_conversations(self):
+        first = self.send(self.user, 0)
+        self.send(self.other, 1)
+
+        self.other.delete()
+
+        self.assertActivity(first, 1)
+
+    def test_repair_command_recomputes_stale_counters(self):
+        last = self.send(self.user, 0)
+        Conversation.objects.update(
+            last_message=None, last_message_at=None, message_count=0
+        )
+
+        out = StringIO()
+        call_command("repair_conversation_activity", stdout=out)
+
+        self.assertIn("1 conversation", out.getvalue())
+        self.assertActivity(last, 1)
+
+    def test_list_can_be_ordered_by_latest_activity(self):
+        quiet = Conversation.objects.create()
+        quiet.participants.add(self.user)
+        self.send(self.user, 0)
+
+        response = self.client.get("/api/conversations/?ordering=-last_message_at")
+
+        self.assertEqual(
+            [row["conversation_id"] for row in response.data["results"]],
+            [str(self.conversation.pk), str(quiet.pk)],
+        )
@@ -0,0 +1,96 @@
+from unittest import mock
+
+from django.db import connection
+from django.test import TestCase
+from django.test.utils import CaptureQueriesContext
+
+from chats.admin import EstimatedCountPaginator, estimated_row_count
+from chats.models import Conversation, Message, User
+
+
+class LargeTableAdminTestCase(TestCase):
+    def setUp(self) -> None:
+        self.admin = User.objects.create_superuser(
+            username="admin", email="admin@example.com", password="password123"
+        )
+        self.client.force_login(self.admin)
+        self.users = [
+            User.objects.create_user(
+                username=f"user{i}", email=f"user{i}@example.com", password="password123"
+            )
+            for i in range(3)
+        ]
+        self.conversation = Conversation.objects.create()
+        self.conversation.participants.add(*self.users)
+        self.send(10)
+
+    def send(self, count: int) -> None:
+        for i in range(count):
+            Message.objects.create(
+                sender=self.users[i % 3],
+                conversation=self.conversation,
+                message_body=f"message {i} about kittens" if i == 0 else f"message {i}",
+            )
+
+    def changelist(self, model: str, query: str = ""):
+        with CaptureQueriesContext(connection) as ctx:
+            response = self.client.get(f"/admin/chats/{model}/{query}")
+        self.assertEqual(response.status_code, 200)
+        return response, [q["sql"] for q in ctx.captured_queries]
+
+    def test_message_rows_do_not_query_their_foreign_keys(self):
+        first = len(self.changelist("message")[1])
+        self.send(20)
+
+        response, queries = self.changelist("message")
+
+        self.assertEqual(len(queries), first)
+        self.assertContains(response, f"Conversation {self.conversation.pk}")
+        self.assertContains(response, "user1@example.com")
+
+    def test_large_tables_are_not_counted(self):
+        with mock.patch.object(EstimatedCountPaginator, "exact_count_limit", 5):
+            response, queries = self.changelist("message")
+
+        self.assertEqual(
+            response.context["cl"].result_count, estimated_row_count(Message, "default")
+        )
+        self.assertFalse(
+            [sql for sql in queries if "COUNT(" in sql and '"chats_message"' in sql]
+        )
+
+    def test_filtered_counts_are_capped(self):
+        with mock.patch.object(EstimatedCountPaginator, "filtered_count_limit", 4):
+            response = self.changelist("message", f"?sender__user_id__exact={self.users[0].pk}")[0]
+
+        self.assertEqual(response.context["cl"].result_count, 4)
+
+    def test_body_search_uses_the_full_text_index(self):
+        response, queries = self.changelist("message", "?q=kittens")
+
+        self.assertEqual(
+            [message.message_body for message in response.context["cl"].result_list],
+            ["message 0 about kittens"],
+        )
+        self.assertFalse([sql for sql in queries if '"message_body" LIKE' in sql])
+
+    def test_message_search_by_id_and_sender(self):
+        message = Message.objects.filter(sender=self.users[1]).first()
+
+        by_id = self.changelist("message", f"?q={message.pk}")[0]
+        by_sender = self.changelist("message", "?q=user1@example.com")[0]
+
+        self.assertEqual(list(by_id.context["cl"].result_list), [message])
+        self.assertEqual(
+            {row.sender_id for row in by_sender.context["cl"].result_list}, {self.users[1].pk}
+        )
+
+    def test_conversation_search(self):
+        other = Conversation.objects.create()
+        other.participants.add(self.admin)
+
+        by_id = self.changelist("conversation", f"?q={self.conversation.pk}")[0]
+        by_email = self.changelist("conversation", "?q=admin@example.com")[0]
+
+        self.assertEqual(list(by_id.context["cl"].result_list), [self.conversation])
+        self.assertEqual(list(by_email.context["cl"].result_list), [other])
@@ -15,4 +15,3 @@ class ApiSmokeTestCase(TestCase):
     def test_list_conversations_returns_200(self):
         response = self.client.get("/api/v1/conversations/")
         self.assertEqual(response.status_code, 200)
-
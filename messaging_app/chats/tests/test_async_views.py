@@ -0,0 +1,177 @@
+from asgiref.sync import sync_to_async
+from django.test import AsyncRequestFactory, TestCase, override_settings
+from django.urls import include, path
+from rest_framework_simplejwt.tokens import AccessToken
+
+from chats import async_views
+from chats.activity import refresh_activity
+from chats.binary import MEDIA_TYPE, unpackb
+from chats.cache import get_cache
+from chats.inbox import refresh_inbox
+from chats.models import Conversation, Message, User
+from chats.urls import async_urlpatterns, urlpatterns as sync_urlpatterns
+
+# /api/ is served by the async views, /sync-api/ by the DRF viewsets only.
+urlpatterns = [
+    path("api/", include([*async_urlpatterns, *sync_urlpatterns])),
+    path("sync-api/", include(sync_urlpatterns)),
+]
+
+
+@override_settings(ROOT_URLCONF=__name__)
+class AsyncViewsTestCase(TestCase):
+    def setUp(self) -> None:
+        get_cache().clear()
+        self.user = User.objects.create_user(
+            username="alice",
+            email="alice@example.com",
+            password="password123",
+        )
+        self.other = User.objects.create_user(
+            username="bob",
+            email="bob@example.com",
+            password="password123",
+        )
+        self.conversation = Conversation.objects.create()
+        self.conversation.participants.add(self.user, self.other)
+        Message.objects.bulk_create(
+            Message(
+                sender=self.other,
+                conversation=self.conversation,
+                message_body=f"message {i}",
+            )
+            for i in range(25)
+        )
+        # bulk_create() bypasses the activity counters and inboxes.
+        refresh_activity()
+        refresh_inbox()
+        self.headers = {"Authorization": f"Bearer {self.token_for(self.user)}"}
+        self.messages_path = (
+            f"conversations/{self.conversation.conversation_id}/messages/"
+        )
+
+    @staticmethod
+    def token_for(user: User) -> AccessToken:
+        return AccessToken.for_user(user)
+
+    async def assertSameResults(self, path: str) -> dict:
+        response = await self.async_client.get(f"/api/{path}", headers=self.headers)
+        expected = await self.async_client.get(f"/sync-api/{path}", headers=self.headers)
+        self.assertEqual(response.status_code, 200)
+        self.assertEqual(response["Content-Type"], "application/json")
+        self.assertEqual(response.json()["results"], expected.json()["results"])
+        return response.json()
+
+    async def test_conversation_list_matches_the_sync_view(self):
+        data = await self.assertSameResults("conversations/")
+        self.assertEqual(data["count"], 1)
+        self.assertEqual(data["results"][0]["message_count"], 25)
+
+    async def test_message_pages_match_the_sync_view(self):
+        data = await self.assertSameResults(self.messages_path + "?page_size=10")
+        path = data["next"].split("/api/", 1)[1]
+        data = await self.assertSameResults(path)
+        self.assertIsNotNone(data["previous"])
+
+    async def test_message_pages_honour_fieldsets_and_side_loads(self):
+        for query in ("?fields=message_id,sender.email", "?include=users"):
+            with self.subTest(query=query):
+                data = await self.assertSameResults(self.messages_path + query)
+                if "included" in data:
+                    self.assertEqual(list(data["included"]["users"]), [str(self.other.pk)])
+
+    async def test_msgpack_requests_fall_back_to_the_sync_views(self):
+        response = await self.async_client.get(
+            f"/api/{self.messages_path}",
+            headers={**self.headers, "Accept": MEDIA_TYPE},
+        )
+
+        self.assertEqual(response.status_code, 200)
+        self.assertEqual(response["Content-Type"], MEDIA_TYPE)
+        self.assertEqual(len(unpackb(response.content)["results"]), 20)
+
+    async def test_list_supports_conditional_get(self):
+        url = f"/api/{self.messages_path}"
+        response = await self.async_client.get(url, headers=self.headers)
+
+        response = await self.async_client.get(
+            url, headers={**self.headers, "If-None-Match": response["ETag"]}
+        )
+        self.assertEqual(response.status_code, 304)
+
+    async def test_send_message(self):
+        response = await self.async_client.post(
+            f"/api/conversations/{self.conversation.conversation_id}/send-message/",
+            {"message_body": "hi"},
+            content_type="application/json",
+            headers=self.headers,
+        )
+
+        self.assertEqual(response.status_code, 201)
+        self.assertEqual(response.json()["sender"]["email"], "alice@example.com")
+        self.assertEqual(
+            await Message.objects.filter(message_body="hi").acount(), 1
+        )
+
+    async def test_hot_paths_do_not_fall_back(self):
+        factory = AsyncRequestFactory()
+        pk = str(self.conversation.conversation_id)
+
+        responses = [
+            await async_views.conversation_list(
+                factory.get("/api/conversations/", headers=self.headers)
+            ),
+            await async_views.conversation_messages(
+                factory.get(f"/api/{self.messages_path}", headers=self.headers), pk
+            ),
+            await async_views.send_message(
+                factory.post(
+                    f"/api/conversations/{pk}/send-message/",
+                    {"message_body": "hi"},
+                    content_type="application/json",
+                    headers=self.headers,
+                ),
+                pk,
+            ),
+        ]
+
+        # None would mean the request was handed to the synchronous view.
+        self.assertEqual([r.status_code for r in responses], [200, 200, 201])
+
+    async def test_session_authentication_is_accepted_for_reads(self):
+        await sync_to_async(self.async_client.force_login)(self.user)
+
+        response = await self.async_client.get("/api/conversations/")
+
+        self.assertEqual(response.status_code, 200)
+        self.assertEqual(response.json()["count"], 1)
+
+    async def test_other_requests_fall_back_to_the_sync_views(self):
+        send_url = f"/api/conversations/{self.conversation.conversation_id}/send-message/"
+
+        response = await self.async_client.get("/api/conversations/")
+        self.assertEqual(response.status_code, 401)
+
+        response = await self.async_client.post(
+            send_url, {}, content_type="application/json", headers=self.headers
+        )
+        self.assertEqual(response.status_code, 400)
+
+        response = await self.async_client.post(
+            "/api/conversations/",
+            {"participant_ids": [str(self.other.pk)]},
+            content_type="application/json",
+            headers=self.headers,
+        )
+        self.assertEqual(response.status_code, 201)
+
+        outsider = await User.objects.acreate(
+            username="carol", email="carol@example.com"
+        )
+        response = await self.async_client.post(
+            send_url,
+            {"message_body": "hi"},
+            content_type="application/json",
+            headers={"Authorization": f"Bearer {self.token_for(outsider)}"},
+        )
+        self.assertEqual(response.status_code, 404)
@@ -0,0 +1,99 @@
+from unittest import mock
+
+from django.db import connection
+from django.test import TestCase, override_settings
+from django.test.utils import CaptureQueriesContext
+from rest_framework.test import APIClient
+from rest_framework_simplejwt.settings import api_settings
+from rest_framework_simplejwt.tokens import AccessToken
+
+from chats import auth
+from chats.auth import invalidate_user, load_user, user_cache_key
+from chats.cache import get_cache
+from chats.models import Conversation, User
+
+
+class CachedJWTAuthenticationTestCase(TestCase):
+    def setUp(self) -> None:
+        get_cache().clear()
+        self.user = User.objects.create_user(
+            username="alice",
+            email="alice@example.com",
+            password="password123",
+        )
+        self.conversation = Conversation.objects.create()
+        self.conversation.participants.add(self.user)
+        self.client = APIClient()
+        self.client.credentials(
+            HTTP_AUTHORIZATION=f"Bearer {AccessToken.for_user(self.user)}"
+        )
+        self.url = f"/api/conversations/{self.conversation.conversation_id}/"
+
+    def count_queries(self) -> int:
+        with CaptureQueriesContext(connection) as ctx:
+            response = self.client.get(self.url)
+        self.assertEqual(response.status_code, 200)
+        return len(ctx.captured_queries)
+
+    def test_user_lookup_is_cached(self):
+        self.count_queries()  # warm up the membership cache
+        cached = self.count_queries()
+
+        invalidate_user(self.user.pk)
+        self.assertEqual(self.count_queries(), cached + 1)
+
+    def test_deactivation_takes_effect_immediately(self):
+        self.count_queries()
+
+        self.user.is_active = False
+        self.user.save()
+
+        self.assertEqual(self.client.get(self.url).status_code, 401)
+
+    @mock.patch.object(api_settings, "CHECK_REVOKE_TOKEN", True)
+    def test_password_change_revokes_cached_tokens(self):
+        self.client.credentials(
+            HTTP_AUTHORIZATION=f"Bearer {AccessToken.for_user(self.user)}"
+        )
+        self.assertEqual(self.client.get(self.url).status_code, 200)
+
+        self.user.set_password("another-password")
+        self.user.save()
+
+        self.assertEqual(self.client.get(self.url).status_code, 401)
+
+    def test_password_hash_is_not_cached(self):
+        user = load_user(self.user.pk)
+
+        self.assertNotIn(self.user.password, repr(get_cache().get(user_cache_key(self.user.pk))))
+        # Saving a cached user keeps its password.
+        user.first_name = "Alice"
+        user.save()
+        self.user.refresh_from_db()
+        self.assertTrue(self.user.check_password("password123"))
+
+    def test_readers_racing_an_invalidation_do_not_cache_stale_rows(self):
+        set_versioned = auth.set_versioned
+
+        def invalidate_then_set(*args):
+            # The user is saved between the reader's query and its write.
+            invalidate_user(self.user.pk)
+            set_versioned(*args)
+
+        with mock.patch.object(auth, "set_versioned", side_effect=invalidate_then_set):
+            load_user(self.user.pk)
+
+        with self.assertNumQueries(1):
+            load_user(self.user.pk)
+
+    @override_settings(CHATS_JWT_STATELESS_READS=True)
+    def test_stateless_reads_skip_the_user_lookup(self):
+        self.user.is_active = False
+        self.user.save()
+
+        # Claims are trusted on safe methods, not on writes.
+        self.assertEqual(self.client.get(self.url).status_code, 200)
+        response = self.client.post(
+            f"{self.url}send-message/", {"message_body": "hi"}, format="json"
+        )
+        self.assertEqual(response.status_code, 401)
@@ -0,0 +1,180 @@
+from datetime import datetime, timezone
+from unittest import mock, skipIf
+from uuid import UUID, uuid4
+
+from django.test import SimpleTestCase, TestCase
+from rest_framework.test import APIClient
+
+from chats import binary
+from chats.binary import MEDIA_TYPE, packb, unpackb
+from chats.cache import get_cache
+from chats.models import Conversation, Message, User
+
+
+class CodecTestCase(SimpleTestCase):
+    values = [
+        None,
+        True,
+        False,
+        *(0, 127, 128, 255, 256, 65535, 65536, 2**32, 2**64 - 1),
+        *(-1, -32, -33, -128, -129, -(2**15) - 1, -(2**31) - 1, -(2**63)),
+        1.5,
+        "",
+        "a" * 31,
+        "a" * 32,
+        "ünïcode ✓" * 40,
+        "x" * 70000,
+        b"\x00\x01",
+        list(range(20)),
+        {str(i): [i, {"nested": None}] for i in range(20)},
+    ]
+
+    def test_round_trip(self):
+        for value in self.values:
+            with self.subTest(value=repr(value)[:40]):
+                self.assertEqual(unpackb(packb(value)), value)
+
+    def test_spec_bytes(self):
+        self.assertEqual(packb({"a": [1, -1, None]}), b"\x81\xa1a\x93\x01\xff\xc0")
+        self.assertEqual(packb(300), b"\xcd\x01\x2c")
+
+    def test_uuids_are_fixed_width(self):
+        value = uuid4()
+
+        self.assertEqual(packb(value), b"\xd8\x01" + value.bytes)
+        self.assertEqual(unpackb(packb(value)), value)
+
+    def test_datetimes_use_the_timestamp_extension(self):
+        value = datetime(2024, 5, 1, 12, 0, 0, 500000, tzinfo=timezone.utc)
+        seconds = int(value.timestamp())
+
+        self.assertEqual(
+            packb(value), b"\xd7\xff" + ((500000000 << 34) | seconds).to_bytes(8, "big")
+        )
+        # Whole seconds fit the 32 bit form.
+        self.assertEqual(
+            packb(value.replace(microsecond=0)), b"\xd6\xff" + seconds.to_bytes(4, "big")
+        )
+        for value in (
+            value,
+            datetime(1900, 1, 1, tzinfo=timezone.utc),
+            datetime(1969, 12, 31, 23, 59, 59, 500000, tzinfo=timezone.utc),
+            datetime(2600, 1, 1, 0, 0, 1, 7, tzinfo=timezone.utc),
+        ):
+            with self.subTest(value=value):
+                self.assertEqual(unpackb(packb(value)), value)
+
+    def test_invalid_data_raises_value_error(self):
+        for data in (b"\xc1", b"\x92\x01", b"\x01\x02", b"\xd8\x05" + bytes(16), b"\xd9"):
+            with self.subTest(data=data):
+                with self.assertRaises(ValueError):
+                    unpackb(data)
+
+    @skipIf(binary.msgpack is None, "msgpack is not installed")
+    def test_fallback_matches_the_msgpack_package(self):
+        value = {
+            "id": uuid4(),
+            "at": [
+                datetime.now(timezone.utc),
+                datetime(2024, 5, 1, tzinfo=timezone.utc),
+                datetime(1969, 12, 31, 23, 59, 59, 500000, tzinfo=timezone.utc),
+                datetime(2600, 1, 1, tzinfo=timezone.utc),
+            ],
+            "values": self.values,
+        }
+
+        with mock.patch.object(binary, "msgpack", None):
+            fallback = packb(value)
+
+        self.assertEqual(fallback, packb(value))
+        self.assertEqual(unpackb(fallback), value)
+
+
+class MessagePackAPITestCase(TestCase):
+    def setUp(self) -> None:
+        get_cache().clear()
+        self.client = APIClient()
+        self.user = User.objects.create_user(
+            username="alice", email="alice@example.com", password="password123"
+        )
+        self.other = User.objects.create_user(
+            username="bob", email="bob@example.com", password="password123"
+        )
+        self.client.force_authenticate(self.user)
+
+        self.conversation = Conversation.objects.create()
+        self.conversation.participants.add(self.user, self.other)
+        self.message = Message.objects.create(
+            sender=self.other, conversation=self.conversation, message_body="hello"
+        )
+        self.url = f"/api/conversations/{self.conversation.pk}/messages/"
+
+    def get(self, url: str):
+        response = self.client.get(url, HTTP_ACCEPT=MEDIA_TYPE)
+        self.assertEqual(response.status_code, 200)
+        self.assertEqual(response["Content-Type"], MEDIA_TYPE)
+        return response, unpackb(response.content)
+
+    def test_pages_carry_native_ids_and_timestamps(self):
+        data = self.get(self.url)[1]
+
+        (row,) = data["results"]
+        self.assertEqual(row["message_id"], self.message.pk)
+        self.assertEqual(row["sender"]["user_id"], self.other.pk)
+        self.assertEqual(row["sent_at"], self.message.sent_at)
+        self.assertIsNone(data["next"])
+
+    def test_same_content_as_json(self):
+        expected = self.client.get(self.url).json()
+        data = self.get(self.url)[1]
+
+        self.assertEqual(data.keys(), expected.keys())
+        self.assertEqual(
+            str(data["results"][0]["message_id"]), expected["results"][0]["message_id"]
+        )
+        self.assertEqual(
+            data["results"][0]["sender"]["email"], expected["results"][0]["sender"]["email"]
+        )
+
+    def test_json_and_msgpack_pages_are_cached_apart(self):
+        binary_response = self.get(self.url)[0]
+        json_response = self.client.get(self.url)
+
+        self.assertNotEqual(binary_response["ETag"], json_response["ETag"])
+        self.assertIn("Accept", binary_response["Vary"])
+        self.assertEqual(json_response.json()["results"][0]["message_id"], str(self.message.pk))
+        self.assertEqual(self.get(self.url)[1]["results"][0]["message_id"], self.message.pk)
+
+    def test_accept_headers_of_the_same_format_share_pages(self):
+        etags = {
+            self.client.get(self.url, HTTP_ACCEPT=accept)["ETag"]
+            for accept in (MEDIA_TYPE, f"{MEDIA_TYPE}, */*")
+        }
+
+        self.assertEqual(len(etags), 1)
+
+    def test_conversations_and_side_loads(self):
+        conversation = self.get(f"/api/conversations/{self.conversation.pk}/")[1]
+        page = self.get(self.url + "?include=users")[1]
+
+        self.assertEqual(conversation["conversation_id"], self.conversation.pk)
+        self.assertIsInstance(conversation["created_at"], datetime)
+        self.assertEqual(list(page["included"]["users"]), [self.other.pk])
+
+    def test_requests_can_be_sent_as_msgpack(self):
+        response = self.client.post(
+            self.url,
+            packb({"conversation": self.conversation.pk, "message_body": "binary"}),
+            content_type=MEDIA_TYPE,
+            HTTP_ACCEPT=MEDIA_TYPE,
+        )
+
+        self.assertEqual(response.status_code, 201)
+        data = unpackb(response.content)
+        self.assertIsInstance(data["message_id"], UUID)
+        self.assertTrue(Message.objects.filter(message_body="binary").exists())
+
+    def test_invalid_bodies_are_rejected(self):
+        response = self.client.post(self.url, b"\xc1", content_type=MEDIA_TYPE)
+
+        self.assertEqual(response.status_code, 400)
@@ -0,0 +1,89 @@
+from django.test import TestCase
+from rest_framework.test import APIClient
+
+from chats.cache import get_cache
+from chats.models import Conversation, Message, User
+
+
+class BulkMessageCreateTestCase(TestCase):
+    def setUp(self) -> None:
+        get_cache().clear()
+        self.client = APIClient()
+        self.user = User.objects.create_user(
+            username="alice",
+            email="alice@example.com",
+            password="password123",
+        )
+        self.other = User.objects.create_user(
+            username="bob",
+            email="bob@example.com",
+            password="password123",
+        )
+        self.outsider = User.objects.create_user(
+            username="carol",
+            email="carol@example.com",
+            password="password123",
+        )
+        self.client.force_authenticate(self.user)
+
+        self.conversation = Conversation.objects.create()
+        self.conversation.participants.add(self.user, self.other)
+        self.url = (
+            f"/api/conversations/{self.conversation.conversation_id}/messages/bulk/"
+        )
+
+    def test_bulk_create_inserts_all_messages(self):
+        payload = {"messages": [{"message_body": f"m{i}"} for i in range(1200)]}
+
+        response = self.client.post(self.url, payload, format="json")
+
+        self.assertEqual(response.status_code, 201)
+        self.assertEqual(response.data["created"], 1200)
+        self.assertEqual(len(response.data["message_ids"]), 1200)
+        self.assertEqual(
+            Message.objects.filter(
+                conversation=self.conversation, sender=self.user
+            ).count(),
+            1200,
+        )
+
+    def test_other_senders_require_staff(self):
+        payload = {
+            "messages": [
+                {"message_body": "hi", "sender": str(self.other.pk)},
+            ]
+        }
+
+        response = self.client.post(self.url, payload, format="json")
+        self.assertEqual(response.status_code, 403)
+
+        self.user.is_staff = True
+        self.user.save()
+        response = self.client.post(self.url, payload, format="json")
+        self.assertEqual(response.status_code, 201)
+
+    def test_non_participant_senders_are_reported(self):
+        self.user.is_staff = True
+        self.user.save()
+        payload = {
+            "messages": [
+                {"message_body": "hi", "sender": str(self.other.pk)},
+                {"message_body": "hi", "sender": str(self.outsider.pk)},
+            ]
+        }
+
+        response = self.client.post(self.url, payload, format="json")
+
+        self.assertEqual(response.status_code, 400)
+        self.assertIn(str(self.outsider.pk), response.data["sender"][0])
+        self.assertFalse(Message.objects.exists())
+
+    def test_malformed_conversation_ids_are_not_found(self):
+        payload = {"messages": [{"message_body": "hi"}]}
+
+        response = self.client.post(
+            "/api/conversations/not-a-uuid/messages/bulk/", payload, format="json"
+        )
+
+        self.assertEqual(response.status_code, 404)
+        self.assertFalse(Message.objects.exists())
@@ -0,0 +1,156 @@
+import tempfile
+from pathlib import Path
+from unittest import mock
+
+from django.test import SimpleTestCase, TestCase
+from django.test.utils import CaptureQueriesContext
+from django.db import connection
+from rest_framework.test import APIClient
+
+from chats.cache import SQLiteCache, get_cache
+from chats.models import Conversation, Message, User
+from chats.versions import get_versions
+
+
+class SQLiteCacheTestCase(SimpleTestCase):
+    def setUp(self) -> None:
+        self.directory = tempfile.TemporaryDirectory()
+        self.addCleanup(self.directory.cleanup)
+        path = str(Path(self.directory.name) / "cache.sqlite3")
+        self.cache = SQLiteCache(path, {})
+        # A second instance stands in for another worker process.
+        self.other_worker = SQLiteCache(path, {})
+
+    def test_entries_are_shared_between_instances(self):
+        self.cache.set("key", {"value": 1})
+        self.assertEqual(self.other_worker.get("key"), {"value": 1})
+
+        self.other_worker.delete("key")
+        self.assertIsNone(self.cache.get("key"))
+
+    def test_add_only_sets_missing_or_expired_keys(self):
+        self.assertTrue(self.cache.add("key", 1))
+        self.assertFalse(self.other_worker.add("key", 2))
+        self.assertEqual(self.cache.get("key"), 1)
+
+        self.cache.set("expired", 1, timeout=0)
+        self.assertIsNone(self.cache.get("expired"))
+        self.assertTrue(self.cache.add("expired", 2))
+
+    def test_many_and_incr(self):
+        self.cache.set_many({"a": 1, "b": 2}, timeout=None)
+        self.assertEqual(self.other_worker.get_many(["a", "b", "c"]), {"a": 1, "b": 2})
+        self.assertEqual(self.cache.incr("a", 5), 6)
+
+        self.cache.delete_many(["a", "b"])
+        self.assertEqual(self.cache.get_many(["a", "b"]), {})
+
+    def test_cull_keeps_entries_without_expiry(self):
+        cache = SQLiteCache(self.cache._path, {"OPTIONS": {"MAX_ENTRIES": 10}})
+        cache.purge_every = 1
+        cache.set("version", 1, timeout=None)
+        for i in range(20):
+            cache.set(f"page:{i}", i, timeout=300 + i)
+
+        self.assertEqual(cache.get("version"), 1)
+        self.assertIsNone(cache.get("page:0"))
+        self.assertEqual(cache.get("page:19"), 19)
+
+
+class PageCacheTestCase(TestCase):
+    def setUp(self) -> None:
+        get_cache().clear()
+        self.client = APIClient()
+        self.user = User.objects.create_user(
+            username="alice",
+            email="alice@example.com",
+            password="password123",
+        )
+        self.client.force_authenticate(self.user)
+        self.conversation = Conversation.objects.create()
+        self.conversation.participants.add(self.user)
+        self.message = Message.objects.create(
+            sender=self.user,
+            conversation=self.conversation,
+            message_body="hello",
+        )
+        self.url = f"/api/conversations/{self.conversation.conversation_id}/messages/"
+
+    def test_first_page_is_served_from_cache(self):
+        first = self.client.get(self.url)
+
+        # Only the validator aggregate runs on a cache hit.
+        with self.assertNumQueries(1):
+            second = self.client.get(self.url)
+
+        self.assertEqual(second.data, first.data)
+
+    def test_writes_invalidate_cached_pages(self):
+        self.client.get(self.url)
+
+        self.message.message_body = "edited"
+        self.message.save()
+        response = self.client.get(self.url)
+        self.assertEqual(response.data["results"][0]["message_body"], "edited")
+
+        self.user.first_name = "Alice"
+        self.user.save()
+        response = self.client.get(self.url)
+        self.assertEqual(response.data["results"][0]["sender"]["first_name"], "Alice")
+
+        Message.objects.create(
+            sender=self.user,
+            conversation=self.conversation,
+            message_body="second",
+        )
+        response = self.client.get(self.url)
+        self.assertEqual(len(response.data["results"]), 2)
+
+    def test_profile_changes_bump_every_conversation_at_once(self):
+        others = [Conversation.objects.create() for _ in range(5)]
+        for conversation in others:
+            conversation.participants.add(self.user)
+        conversation_ids = [self.conversation.pk, *(c.pk for c in others)]
+        before = get_versions("conversation", conversation_ids)
+
+        cache = get_cache()
+        with mock.patch.object(cache, "set_many", wraps=cache.set_many) as set_many:
+            self.user.first_name = "Alice"
+            self.user.save(update_fields=["first_name"])
+
+        after = get_versions("conversation", conversation_ids)
+        self.assertTrue(all(after[pk] != before[pk] for pk in conversation_ids))
+        # Conversation versions, then participant list versions.
+        scopes = [
+            {key.split(":")[2] for key in call.args[0]} for call in set_many.call_args_list
+        ]
+        self.assertEqual([s for s in scopes if s != {"auth"}], [{"conversation"}, {"user"}])
+
+    def test_membership_changes_invalidate_cached_conversation_lists(self):
+        url = "/api/conversations/"
+        other = User.objects.create_user(
+            username="bob", email="bob@example.com", password="password123"
+        )
+        self.client.get(url)
+
+        self.conversation.participants.add(other)
+        response = self.client.get(url)
+
+        self.assertEqual(response.status_code, 200)
+        self.assertEqual(
+            {row["user_id"] for row in response.data["results"][0]["participants"]},
+            {str(self.user.pk), str(other.pk)},
+        )
+
+    def test_other_pages_are_not_cached(self):
+        Message.objects.create(
+            sender=self.user,
+            conversation=self.conversation,
+            message_body="second",
+        )
+        response = self.client.get(self.url + "?page_size=1")
+        next_url = response.data["next"]
+
+        with CaptureQueriesContext(connection) as ctx:
+            self.client.get(next_url)
+        self.assertGreater(len(ctx.captured_queries), 1)
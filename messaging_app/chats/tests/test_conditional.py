@@ -0,0 +1,113 @@
+from django.test import TestCase
+from rest_framework.test import APIClient
+
+from chats.cache import get_cache
+from chats.models import Conversation, Message, User
+
+
+class ConditionalGetTestCase(TestCase):
+    def setUp(self) -> None:
+        get_cache().clear()
+        self.client = APIClient()
+        self.user = User.objects.create_user(
+            username="alice",
+            email="alice@example.com",
+            password="password123",
+        )
+        self.other = User.objects.create_user(
+            username="bob",
+            email="bob@example.com",
+            password="password123",
+        )
+        self.client.force_authenticate(self.user)
+
+        self.conversation = Conversation.objects.create()
+        self.conversation.participants.add(self.user, self.other)
+        self.message = Message.objects.create(
+            sender=self.other,
+            conversation=self.conversation,
+            message_body="hello",
+        )
+        self.base = f"/api/conversations/{self.conversation.conversation_id}"
+        self.messages_url = f"{self.base}/messages/"
+
+    def _revalidate(self, url, etag):
+        return self.client.get(url, HTTP_IF_NONE_MATCH=etag)
+
+    def test_message_list_returns_304_with_a_single_query(self):
+        response = self.client.get(self.messages_url)
+        self.assertEqual(response.status_code, 200)
+        etag = response["ETag"]
+        self.assertTrue(response.has_header("Last-Modified"))
+
+        with self.assertNumQueries(1):
+            response = self._revalidate(self.messages_url, etag)
+        self.assertEqual(response.status_code, 304)
+        self.assertEqual(response["ETag"], etag)
+
+    def test_cached_pages_are_not_shared_between_hosts(self):
+        Message.objects.create(
+            sender=self.other, conversation=self.conversation, message_body="second"
+        )
+        url = self.messages_url + "?page_size=1"
+
+        for host in ("testserver", "localhost"):
+            with self.subTest(host=host):
+                response = self.client.get(url, HTTP_HOST=host)
+                self.assertTrue(response.data["next"].startswith(f"http://{host}/"))
+
+    def test_message_list_etag_changes_on_new_and_edited_messages(self):
+        etag = self.client.get(self.messages_url)["ETag"]
+
+        self.client.post(
+            f"{self.base}/send-message/", {"message_body": "hi"}, format="json"
+        )
+        response = self._revalidate(self.messages_url, etag)
+        self.assertEqual(response.status_code, 200)
+        etag = response["ETag"]
+
+        self.message.message_body = "edited"
+        self.message.save()
+        response = self._revalidate(self.messages_url, etag)
+        self.assertEqual(response.status_code, 200)
+
+    def test_etag_depends_on_query_string(self):
+        etag = self.client.get(self.messages_url)["ETag"]
+
+        response = self._revalidate(self.messages_url + "?page_size=5", etag)
+        self.assertEqual(response.status_code, 200)
+
+    def test_conversation_list_revalidation(self):
+        url = "/api/conversations/"
+        etag = self.client.get(url)["ETag"]
+        self.assertEqual(self._revalidate(url, etag).status_code, 304)
+
+        self.client.post(f"{self.base}/mark-read/")
+        response = self._revalidate(url, etag)
+        self.assertEqual(response.status_code, 200)
+        etag = response["ETag"]
+
+        Conversation.objects.create().participants.add(self.user)
+        self.assertEqual(self._revalidate(url, etag).status_code, 200)
+
+    def test_conversation_list_etag_changes_when_other_participants_change(self):
+        url = "/api/conversations/"
+        carol = User.objects.create_user(
+            username="carol", email="carol@example.com", password="password123"
+        )
+
+        for change in (
+            lambda: self.conversation.participants.add(carol),
+            lambda: self.conversation.participants.remove(self.other),
+            lambda: self.conversation.set_participants([self.user.pk, self.other.pk]),
+        ):
+            etag = self.client.get(url)["ETag"]
+            change()
+            response = self._revalidate(url, etag)
+            self.assertEqual(response.status_code, 200)
+            self.assertEqual(
+                {row["user_id"] for row in response.data["results"][0]["participants"]},
+                set(
+                    map(str, self.conversation.participants.values_list("pk", flat=True))
+                ),
+            )
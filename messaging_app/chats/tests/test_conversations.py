@@ -0,0 +1,199 @@
+import uuid
+from datetime import timedelta
+
+from django.db import connection
+from django.db.models import Count
+from django.test import TestCase
+from django.test.utils import CaptureQueriesContext
+from django.utils import timezone
+from rest_framework.test import APIClient
+
+from chats.activity import refresh_activity
+from chats.cache import get_cache
+from chats.inbox import refresh_inbox
+from chats.membership import load_conversation_ids
+from chats.models import Conversation, Message, User
+
+
+class ConversationListTestCase(TestCase):
+    def setUp(self) -> None:
+        self.client = APIClient()
+        self.user = User.objects.create_user(
+            username="alice",
+            email="alice@example.com",
+            password="password123",
+        )
+        self.other = User.objects.create_user(
+            username="bob",
+            email="bob@example.com",
+            password="password123",
+        )
+        self.client.force_authenticate(self.user)
+
+    def _create_conversations(self, count: int) -> None:
+        start = timezone.now() - timedelta(days=1)
+        for i in range(count):
+            conversation = Conversation.objects.create()
+            conversation.participants.add(self.user, self.other)
+            Message.objects.bulk_create(
+                Message(
+                    sender=sender,
+                    conversation=conversation,
+                    message_body=f"{i}-{n}",
+                    sent_at=start + timedelta(minutes=i, seconds=n),
+                )
+                for n, sender in enumerate([self.user, self.other, self.other])
+            )
+        # bulk_create() bypasses the activity counters and inboxes.
+        refresh_activity()
+        refresh_inbox()
+
+    def test_last_message_is_the_latest_one(self):
+        self._create_conversations(1)
+
+        response = self.client.get("/api/conversations/")
+
+        self.assertEqual(response.status_code, 200)
+        last = response.data["results"][0]["last_message"]
+        self.assertEqual(last["message_body"], "0-2")
+        self.assertEqual(last["sender"]["email"], "bob@example.com")
+
+    def test_list_query_count_does_not_grow_with_conversations(self):
+        self._create_conversations(20)
+
+        # ETag aggregate, count, conversations (joined to their last message
+        # and its sender), participants.
+        with self.assertNumQueries(4):
+            response = self.client.get("/api/conversations/")
+
+        self.assertEqual(response.status_code, 200)
+        self.assertEqual(len(response.data["results"]), 20)
+
+    def test_list_returns_summary_without_message_history(self):
+        self._create_conversations(1)
+
+        row = self.client.get("/api/conversations/").data["results"][0]
+
+        self.assertNotIn("messages", row)
+        self.assertEqual(row["message_count"], 3)
+        self.assertEqual(row["unread_count"], 2)
+
+    def test_mark_read_resets_unread_count(self):
+        self._create_conversations(1)
+        conversation = Conversation.objects.get()
+
+        response = self.client.post(
+            f"/api/conversations/{conversation.conversation_id}/mark-read/"
+        )
+        self.assertEqual(response.status_code, 204)
+
+        row = self.client.get("/api/conversations/").data["results"][0]
+        self.assertEqual(row["unread_count"], 0)
+        self.assertEqual(row["message_count"], 3)
+
+
+class ConversationWriteTestCase(TestCase):
+    def setUp(self) -> None:
+        get_cache().clear()
+        self.client = APIClient()
+        self.user, self.other, self.third = (
+            User.objects.create_user(
+                username=name, email=f"{name}@example.com", password="password123"
+            )
+            for name in ("alice", "bob", "carol")
+        )
+        self.client.force_authenticate(self.user)
+
+    def test_create_reports_unknown_participants(self):
+        unknown = uuid.uuid4()
+
+        response = self.client.post(
+            "/api/conversations/",
+            {"participant_ids": [str(self.other.pk), str(unknown)]},
+            format="json",
+        )
+
+        self.assertEqual(response.status_code, 400)
+        self.assertEqual(
+            response.data["participant_ids"], [f"{unknown} is not a known user."]
+        )
+        self.assertFalse(Conversation.objects.exists())
+
+    def test_create_inserts_participants_at_once(self):
+        # Warm the cached conversation-id set; m2m_changed must drop it.
+        self.assertEqual(load_conversation_ids(self.other.pk), frozenset())
+
+        with CaptureQueriesContext(connection) as ctx:
+            response = self.client.post(
+                "/api/conversations/",
+                {"participant_ids": [str(self.other.pk), str(self.other.pk)]},
+                format="json",
+            )
+
+        self.assertEqual(response.status_code, 201)
+        inserts = [
+            q["sql"] for q in ctx.captured_queries if q["sql"].startswith("INSERT")
+        ]
+        self.assertEqual(len(inserts), 3)  # conversation, participants, inboxes
+        conversation = Conversation.objects.get()
+        self.assertEqual(
+            set(conversation.participants.all()), {self.user, self.other}
+        )
+        self.assertEqual(load_conversation_ids(self.other.pk), {conversation.pk})
+
+    def test_update_only_touches_changed_participants(self):
+        conversation = Conversation.objects.create()
+        conversation.participants.add(self.user, self.other)
+        Membership = Conversation.participants.through
+        kept = Membership.objects.get(conversation=conversation, user=self.user).pk
+
+        response = self.client.patch(
+            f"/api/conversations/{conversation.pk}/",
+            {"participant_ids": [str(self.user.pk), str(self.third.pk)]},
+            format="json",
+        )
+
+        self.assertEqual(response.status_code, 200)
+        self.assertEqual(
+            set(conversation.participants.all()), {self.user, self.third}
+        )
+        self.assertTrue(Membership.objects.filter(pk=kept).exists())
+        self.assertEqual(load_conversation_ids(self.other.pk), frozenset())
+
+    def test_bulk_create(self):
+        payload = {
+            "conversations": [
+                {"participant_ids": [str(self.other.pk)]},
+                {"participant_ids": [str(self.other.pk), str(self.third.pk)]},
+            ]
+        }
+
+        response = self.client.post("/api/conversations/bulk/", payload, format="json")
+
+        self.assertEqual(response.status_code, 201)
+        self.assertEqual(response.data["created"], 2)
+        self.assertEqual(
+            sorted(
+                Conversation.objects.filter(pk__in=response.data["conversation_ids"])
+                .annotate(n=Count("participants"))
+                .values_list("n", flat=True)
+            ),
+            [2, 3],
+        )
+        self.assertEqual(len(load_conversation_ids(self.user.pk)), 2)
+        self.assertEqual(len(load_conversation_ids(self.third.pk)), 1)
+
+    def test_bulk_create_reports_unknown_participants(self):
+        unknown = uuid.uuid4()
+        payload = {
+            "conversations": [
+                {"participant_ids": [str(self.other.pk)]},
+                {"participant_ids": [str(unknown)]},
+            ]
+        }
+
+        response = self.client.post("/api/conversations/bulk/", payload, format="json")
+
+        self.assertEqual(response.status_code, 400)
+        self.assertIn(str(unknown), str(response.data))
+        self.assertFalse(Conversation.objects.exists())
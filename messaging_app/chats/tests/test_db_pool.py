@@ -0,0 +1,132 @@
+import tempfile
+import threading
+import time
+from pathlib import Path
+
+import sqlite3
+from django.db import OperationalError
+from django.db.utils import ConnectionHandler
+from django.test import SimpleTestCase, TestCase
+
+from chats.db.pool import ConnectionPool, PoolTimeout
+
+
+class ConnectionPoolTestCase(SimpleTestCase):
+    def setUp(self) -> None:
+        directory = tempfile.TemporaryDirectory()
+        self.addCleanup(directory.cleanup)
+        self.path = str(Path(directory.name) / "pool.sqlite3")
+
+    def make_pool(self, **options) -> ConnectionPool:
+        return ConnectionPool(
+            connect=lambda: sqlite3.connect(self.path, check_same_thread=False),
+            **options,
+        )
+
+    def test_released_connections_are_reused(self):
+        pool = self.make_pool()
+
+        first = pool.acquire()
+        pool.release(first)
+        second = pool.acquire()
+
+        self.assertIs(first, second)
+        stats = pool.stats()
+        self.assertEqual((stats["checkouts"], stats["created"]), (2, 1))
+        self.assertEqual((stats["in_use"], stats["idle"]), (1, 0))
+
+    def test_checkout_waits_for_a_released_connection(self):
+        pool = self.make_pool(max_size=1, timeout=5)
+        connection = pool.acquire()
+        threading.Timer(0.05, pool.release, [connection]).start()
+
+        self.assertIs(pool.acquire(), connection)
+        stats = pool.stats()
+        self.assertEqual(stats["waits"], 1)
+        self.assertGreater(stats["wait_time"], 0)
+
+    def test_checkout_times_out_when_the_pool_is_exhausted(self):
+        pool = self.make_pool(max_size=1, timeout=0.01)
+        pool.acquire()
+
+        with self.assertRaises(PoolTimeout):
+            pool.acquire()
+        self.assertEqual(pool.stats()["timeouts"], 1)
+
+    def test_idle_and_broken_connections_are_replaced(self):
+        pool = self.make_pool(idle_timeout=0.01)
+        connection = pool.acquire()
+        pool.release(connection)
+        time.sleep(0.02)
+
+        self.assertIsNot(pool.acquire(), connection)
+        self.assertEqual(pool.stats()["closed"], 1)
+
+        pool = self.make_pool(check=lambda connection: False, check_interval=0)
+        connection = pool.acquire()
+        pool.release(connection)
+
+        self.assertIsNot(pool.acquire(), connection)
+        self.assertEqual(pool.stats()["failed_checks"], 1)
+        self.assertEqual(pool.stats()["size"], 1)
+
+    def test_unusable_connections_are_not_returned(self):
+        pool = self.make_pool()
+        connection = pool.acquire()
+        pool.release(connection, reusable=False)
+
+        self.assertEqual(pool.stats()["size"], 0)
+        self.assertIsNot(pool.acquire(), connection)
+
+
+class PooledBackendTestCase(TestCase):
+    def setUp(self) -> None:
+        directory = tempfile.TemporaryDirectory()
+        self.addCleanup(directory.cleanup)
+        # Pools are per alias, so every test gets its own.
+        self.alias = f"pooled_{self._testMethodName}"
+        self.databases_settings = {
+            "default": {"ENGINE": "django.db.backends.sqlite3", "NAME": ":memory:"},
+            self.alias: {
+                "ENGINE": "chats.db.backends.sqlite3",
+                "NAME": str(Path(directory.name) / "db.sqlite3"),
+                "POOL": {"MAX_SIZE": 1, "TIMEOUT": 0.01},
+            }
+        }
+
+    def connection(self):
+        connection = ConnectionHandler(self.databases_settings)[self.alias]
+        self.addCleanup(connection.get_pool().close_all)
+        self.addCleanup(connection.close)
+        return connection
+
+    def test_closing_returns_the_connection_to_the_pool(self):
+        connection = self.connection()
+        connection.ensure_connection()
+        raw = connection.connection
+
+        connection.close()
+        connection.ensure_connection()
+
+        self.assertIs(connection.connection, raw)
+        stats = connection.get_pool().stats()
+        self.assertEqual((stats["checkouts"], stats["created"]), (2, 1))
+
+    def test_open_transactions_are_rolled_back(self):
+        connection = self.connection()
+        with connection.cursor() as cursor:
+            cursor.execute("CREATE TABLE item (name TEXT)")
+        connection.set_autocommit(False)
+        with connection.cursor() as cursor:
+            cursor.execute("INSERT INTO item VALUES ('lost')")
+
+        connection.close()
+        with connection.cursor() as cursor:
+            cursor.execute("SELECT COUNT(*) FROM item")
+            self.assertEqual(cursor.fetchone(), (0,))
+
+    def test_exhausted_pool_raises_operational_error(self):
+        self.connection().ensure_connection()
+
+        with self.assertRaises(OperationalError):
+            self.connection().ensure_connection()
@@ -0,0 +1,110 @@
+import csv
+import io
+import json
+from datetime import timedelta
+from unittest import mock
+
+from django.db import connection
+from django.test import TestCase
+from django.test.utils import CaptureQueriesContext
+from django.utils import timezone
+from rest_framework.test import APIClient
+
+from chats.cache import get_cache
+from chats.export import HEADER
+from chats.models import Conversation, Message, User
+from chats.views import MessageViewSet
+
+
+class MessageExportTestCase(TestCase):
+    def setUp(self) -> None:
+        get_cache().clear()
+        self.client = APIClient()
+        self.user = User.objects.create_user(
+            username="alice", email="alice@example.com", password="password123"
+        )
+        self.other = User.objects.create_user(
+            username="bob", email="bob@example.com", password="password123"
+        )
+        self.client.force_authenticate(self.user)
+
+        self.conversation = Conversation.objects.create()
+        self.conversation.participants.add(self.user, self.other)
+        start = timezone.now() - timedelta(days=1)
+        bodies = ["hello", 'a "quoted", comma', "two\nlines", "ünïcode ✓", "last"]
+        self.messages = Message.objects.bulk_create(
+            Message(
+                sender=(self.user, self.other)[i % 2],
+                conversation=self.conversation,
+                message_body=body,
+                # Two messages share a timestamp: the walk must not skip one.
+                sent_at=start + timedelta(seconds=min(i, 3)),
+            )
+            for i, body in enumerate(bodies)
+        )
+        self.messages.sort(key=lambda message: (message.sent_at, message.message_id))
+        self.url = f"/api/conversations/{self.conversation.pk}/messages/export/"
+
+    def export(self, query: str = "") -> str:
+        response = self.client.get(self.url + query)
+        self.assertEqual(response.status_code, 200)
+        self.assertTrue(response.streaming)
+        return b"".join(response.streaming_content).decode()
+
+    def expected(self, message: Message) -> dict:
+        return {
+            "message_id": str(message.message_id),
+            "conversation_id": str(self.conversation.pk),
+            "sender_id": str(message.sender_id),
+            "sender_email": message.sender.email,
+            "sent_at": message.sent_at.isoformat().replace("+00:00", "Z"),
+            "message_body": message.message_body,
+        }
+
+    def test_ndjson_streams_every_message_in_order(self):
+        lines = self.export().splitlines()
+
+        self.assertEqual(
+            [json.loads(line) for line in lines],
+            [self.expected(message) for message in self.messages],
+        )
+
+    def test_csv_has_a_header_and_quoted_bodies(self):
+        rows = list(csv.DictReader(io.StringIO(self.export("?output=csv"))))
+
+        self.assertEqual(tuple(rows[0]), HEADER)
+        self.assertEqual(rows, [self.expected(message) for message in self.messages])
+
+    def test_keyset_walk_reads_bounded_batches(self):
+        with mock.patch.object(MessageViewSet, "export_batch_size", 2):
+            with CaptureQueriesContext(connection) as ctx:
+                lines = self.export().splitlines()
+
+        self.assertEqual(
+            [json.loads(line)["message_id"] for line in lines],
+            [str(message.message_id) for message in self.messages],
+        )
+        batches = [q["sql"] for q in ctx.captured_queries if "LIMIT 2" in q["sql"]]
+        self.assertEqual(len(batches), 3)
+
+    def test_list_filters_apply(self):
+        lines = self.export(f"?user={self.other.pk}").splitlines()
+
+        self.assertEqual(
+            {json.loads(line)["sender_id"] for line in lines}, {str(self.other.pk)}
+        )
+
+    def test_unknown_output_is_rejected(self):
+        response = self.client.get(self.url + "?output=xml")
+
+        self.assertEqual(response.status_code, 400)
+
+    def test_non_participants_cannot_export(self):
+        outsider = User.objects.create_user(
+            username="carol", email="carol@example.com", password="password123"
+        )
+        self.client.force_authenticate(outsider)
+
+        response = self.client.get(self.url)
+
+        self.assertEqual(response.status_code, 404)
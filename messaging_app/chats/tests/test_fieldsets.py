@@ -0,0 +1,114 @@
+from django.db import connection
+from django.test import TestCase
+from django.test.utils import CaptureQueriesContext
+from rest_framework.test import APIClient
+
+from chats.cache import get_cache
+from chats.models import Conversation, Message, User
+
+
+class SparseFieldsetTestCase(TestCase):
+    def setUp(self) -> None:
+        get_cache().clear()
+        self.client = APIClient()
+        self.user = User.objects.create_user(
+            username="alice", email="alice@example.com", password="password123"
+        )
+        self.other = User.objects.create_user(
+            username="bob", email="bob@example.com", password="password123"
+        )
+        self.client.force_authenticate(self.user)
+
+        self.conversation = Conversation.objects.create()
+        self.conversation.participants.add(self.user, self.other)
+        self.message = Message.objects.create(
+            sender=self.other, conversation=self.conversation, message_body="hello"
+        )
+        self.messages_url = f"/api/conversations/{self.conversation.pk}/messages/"
+
+    def get(self, url: str):
+        with CaptureQueriesContext(connection) as ctx:
+            response = self.client.get(url)
+        self.assertEqual(response.status_code, 200)
+        return response.data, [q["sql"] for q in ctx.captured_queries]
+
+    def message_queries(self, queries):
+        return [sql for sql in queries if 'FROM "chats_message"' in sql and "COUNT(" not in sql]
+
+    def test_default_shape_is_unchanged(self):
+        (row,) = self.get(self.messages_url)[0]["results"]
+
+        self.assertEqual(row["sender"]["email"], "bob@example.com")
+        self.assertIn("message_body", row)
+        self.assertIn("conversation", row)
+
+    def test_fields_trim_the_output_and_the_columns(self):
+        data, queries = self.get(self.messages_url + "?fields=message_id,message_body")
+
+        self.assertEqual(
+            data["results"],
+            [{"message_id": str(self.message.pk), "message_body": "hello"}],
+        )
+        (sql,) = self.message_queries(queries)
+        self.assertNotIn("chats_user", sql)
+        self.assertNotIn('"sender_id"', sql)
+
+    def test_unexpanded_relations_render_as_ids(self):
+        data, queries = self.get(self.messages_url + "?fields=message_id,sender")
+
+        self.assertEqual(data["results"][0]["sender"], str(self.other.pk))
+        self.assertNotIn("chats_user", self.message_queries(queries)[0])
+
+    def test_dotted_fields_expand_with_only_those_columns(self):
+        data, queries = self.get(self.messages_url + "?fields=message_id,sender.email")
+
+        self.assertEqual(data["results"][0]["sender"], {"email": "bob@example.com"})
+        (sql,) = self.message_queries(queries)
+        self.assertIn('"chats_user"."email"', sql)
+        self.assertNotIn('"chats_user"."first_name"', sql)
+
+    def test_expand_nests_the_full_object(self):
+        data = self.get(
+            f"/api/messages/{self.message.pk}/?fields=message_id,sender&expand=sender"
+        )[0]
+
+        self.assertEqual(data["sender"]["user_id"], str(self.other.pk))
+        self.assertEqual(data["sender"]["email"], "bob@example.com")
+
+    def test_conversation_list_fields(self):
+        data, queries = self.get(
+            "/api/conversations/?fields=conversation_id,unread_count,last_message.message_body"
+        )
+
+        self.assertEqual(
+            data["results"],
+            [
+                {
+                    "conversation_id": str(self.conversation.pk),
+                    "last_message": {"message_body": "hello"},
+                    "unread_count": 1,
+                }
+            ],
+        )
+        self.assertFalse(any("chats_conversation_participants\" ON" in sql for sql in queries))
+
+    def test_conversation_retrieve_participant_ids(self):
+        data = self.get(
+            f"/api/conversations/{self.conversation.pk}/?fields=participants"
+        )[0]
+
+        self.assertEqual(set(data["participants"]), {str(self.user.pk), str(self.other.pk)})
+
+    def test_unknown_fields_are_rejected(self):
+        response = self.client.get(
+            self.messages_url + "?fields=message_id,nope&expand=conversation"
+        )
+
+        self.assertEqual(response.status_code, 400)
+        self.assertIn("fields", response.data)
+        self.assertIn("expand", response.data)
+
+    def test_unknown_nested_fields_are_rejected(self):
+        response = self.client.get(self.messages_url + "?fields=sender.password")
+
+        self.assertEqual(response.status_code, 400)
@@ -0,0 +1,174 @@
+from datetime import timedelta
+
+from django.db import connection
+from django.test import TestCase
+from django.test.utils import CaptureQueriesContext
+from django.utils import timezone
+from rest_framework.test import APIClient
+
+from chats.cache import get_cache
+from chats.inbox import mark_read, refresh_inbox
+from chats.models import Conversation, InboxEntry, Message, User
+from chats.signals import messages_bulk_created
+
+
+class InboxTestCase(TestCase):
+    def setUp(self) -> None:
+        get_cache().clear()
+        self.client = APIClient()
+        self.user, self.other, self.third = (
+            User.objects.create_user(
+                username=name, email=f"{name}@example.com", password="password123"
+            )
+            for name in ("alice", "bob", "carol")
+        )
+        self.client.force_authenticate(self.user)
+
+        self.conversation = Conversation.objects.create()
+        self.conversation.participants.add(self.user, self.other)
+        self.start = timezone.now() - timedelta(days=1)
+
+    def send(self, sender: User, minutes: int, conversation=None) -> Message:
+        return Message.objects.create(
+            sender=sender,
+            conversation=conversation or self.conversation,
+            message_body=f"at {minutes}",
+            sent_at=self.start + timedelta(minutes=minutes),
+        )
+
+    def entry(self, user: User) -> InboxEntry:
+        return InboxEntry.objects.get(user=user, conversation=self.conversation)
+
+    def assertEntry(self, user: User, last_activity_at, unread_count: int) -> None:
+        entry = self.entry(user)
+        self.assertEqual(entry.last_activity_at, last_activity_at)
+        self.assertEqual(entry.unread_count, unread_count)
+
+    def test_participants_get_entries(self):
+        self.assertEntry(self.user, self.conversation.created_at, 0)
+        self.assertEntry(self.other, self.conversation.created_at, 0)
+
+    def test_new_messages_fan_out(self):
+        first = self.send(self.other, 1)
+        latest = self.send(self.other, 3)
+        self.send(self.user, 2)  # imported out of order
+
+        self.assertEntry(self.user, latest.sent_at, 2)
+        self.assertEntry(self.other, latest.sent_at, 1)
+        self.assertLess(first.sent_at, latest.sent_at)
+
+    def test_mark_read_resets_the_unread_count(self):
+        self.send(self.other, 1)
+
+        response = self.client.post(
+            f"/api/conversations/{self.conversation.pk}/mark-read/"
+        )
+
+        self.assertEqual(response.status_code, 204)
+        self.assertEqual(self.entry(self.user).unread_count, 0)
+        self.assertIsNotNone(self.entry(self.user).last_read_at)
+
+    def test_deleted_messages_leave_the_unread_count(self):
+        first = self.send(self.other, 1)
+        latest = self.send(self.other, 2)
+
+        latest.delete()
+
+        self.assertEntry(self.user, first.sent_at, 1)
+        self.assertEntry(self.other, first.sent_at, 0)
+
+    def test_bulk_import_recounts_unread(self):
+        InboxEntry.objects.filter(user=self.user).update(
+            last_read_at=self.start + timedelta(minutes=5)
+        )
+        messages = Message.objects.bulk_create(
+            Message(
+                sender=self.other,
+                conversation=self.conversation,
+                message_body=str(minutes),
+                sent_at=self.start + timedelta(minutes=minutes),
+            )
+            for minutes in (4, 6, 7)
+        )
+        messages_bulk_created.send(
+            sender=Message, conversation_id=self.conversation.pk, messages=messages
+        )
+
+        self.assertEntry(self.user, messages[-1].sent_at, 2)
+
+    def test_new_participants_see_earlier_messages_as_unread(self):
+        latest = self.send(self.other, 1)
+        self.send(self.user, 2)
+
+        self.third.conversations.add(self.conversation)
+
+        self.assertEntry(self.third, self.entry(self.user).last_activity_at, 2)
+        self.assertLess(latest.sent_at, self.entry(self.third).last_activity_at)
+
+    def test_participants_added_through_a_stale_instance_see_unread_messages(self):
+        stale = Conversation.objects.get(pk=self.conversation.pk)
+        for minutes in (1, 2, 3):
+            latest = self.send(self.other, minutes)
+
+        stale.participants.add(self.third)
+
+        self.assertEntry(self.third, latest.sent_at, 3)
+
+    def test_mark_read_recreates_entries_with_current_activity(self):
+        stale = Conversation.objects.get(pk=self.conversation.pk)
+        latest = self.send(self.other, 1)
+        self.entry(self.user).delete()
+
+        mark_read(self.user, stale)
+
+        self.assertEntry(self.user, latest.sent_at, 0)
+
+    def test_removed_participants_lose_their_entry(self):
+        self.conversation.participants.remove(self.other)
+
+        self.assertFalse(InboxEntry.objects.filter(user=self.other).exists())
+        self.assertTrue(InboxEntry.objects.filter(user=self.user).exists())
+
+    def test_refresh_inbox_rebuilds_entries(self):
+        self.send(self.other, 1)
+        InboxEntry.objects.all().delete()
+
+        self.assertEqual(refresh_inbox(), 2)
+
+        self.assertEntry(self.user, self.conversation.messages.get().sent_at, 1)
+        self.assertEntry(self.other, self.conversation.messages.get().sent_at, 0)
+
+    def test_list_is_ordered_by_activity(self):
+        newer = Conversation.objects.create()
+        newer.participants.add(self.user, self.other)
+        Message.objects.create(
+            sender=self.other, conversation=self.conversation, message_body="hi"
+        )
+
+        results = self.client.get("/api/conversations/").data["results"]
+
+        self.assertEqual(
+            [row["conversation_id"] for row in results],
+            [str(self.conversation.pk), str(newer.pk)],
+        )
+        self.assertEqual(results[0]["unread_count"], 1)
+
+    def test_list_is_a_range_scan_of_the_inbox_index(self):
+        if connection.vendor != "sqlite":
+            self.skipTest("EXPLAIN QUERY PLAN output is SQLite specific")
+
+        with CaptureQueriesContext(connection) as ctx:
+            self.client.get("/api/conversations/")
+        (sql,) = [
+            q["sql"]
+            for q in ctx.captured_queries
+            if 'FROM "chats_conversation" INNER JOIN "chats_inboxentry"' in q["sql"]
+            and "COUNT(" not in q["sql"]
+        ]
+        with connection.cursor() as cursor:
+            cursor.execute("EXPLAIN QUERY PLAN " + sql)
+            plan = " ".join(row[-1] for row in cursor.fetchall())
+
+        self.assertEqual(sql.count("chats_inboxentry\" ON"), 1)
+        self.assertIn("chats_inbox_user_activity_idx", plan)
+        self.assertNotIn("TEMP B-TREE", plan)
@@ -0,0 +1,183 @@
+import json
+import threading
+import time
+
+from django.test import AsyncRequestFactory, SimpleTestCase, TestCase
+from rest_framework.test import APIClient
+from rest_framework_simplejwt.tokens import AccessToken
+
+from chats import async_views
+from chats.cache import get_cache
+from chats.models import Conversation, Message, User
+from chats.notifications import MessageNotifier, notifier
+
+
+class MessageNotifierTestCase(SimpleTestCase):
+    def setUp(self) -> None:
+        get_cache().clear()
+        self.notifier = MessageNotifier(poll_interval=0.05)
+
+    def test_wait_times_out_without_notification(self):
+        with self.notifier.listen("c1") as listener:
+            self.assertFalse(listener.wait(timeout=0.1))
+
+    def test_wait_is_woken_by_notify(self):
+        with self.notifier.listen("c1") as listener:
+            threading.Timer(0.05, self.notifier.notify, args=["c1"]).start()
+
+            start = time.monotonic()
+            self.assertTrue(listener.wait(timeout=5))
+            self.assertLess(time.monotonic() - start, 1)
+
+    def test_notification_before_wait_is_not_missed(self):
+        with self.notifier.listen("c1") as listener:
+            self.notifier.notify("c1")
+            self.assertTrue(listener.wait(timeout=0))
+
+    def test_only_listeners_of_the_conversation_are_woken(self):
+        with self.notifier.listen("c1") as listener:
+            self.notifier.notify("c2")
+            self.assertFalse(listener.wait(timeout=0.1))
+
+    def test_listeners_are_dropped_when_done(self):
+        with self.notifier.listen("c1"), self.notifier.listen("c1"):
+            self.assertEqual(len(self.notifier._listeners["c1"]), 2)
+        self.assertEqual(self.notifier._listeners, {})
+
+    def test_notification_from_another_process_is_seen_through_the_cache(self):
+        other_process = MessageNotifier()
+        with self.notifier.listen("c1") as listener:
+            threading.Timer(0.05, other_process.notify, args=["c1"]).start()
+
+            self.assertTrue(listener.wait(timeout=5))
+
+    async def test_async_listeners_are_woken_from_other_threads(self):
+        async with await self.notifier.alisten("c1") as listener:
+            threading.Timer(0.05, self.notifier.notify, args=["c1"]).start()
+
+            self.assertTrue(await listener.wait(timeout=5))
+
+
+class WaitEndpointTestCase(TestCase):
+    def setUp(self) -> None:
+        get_cache().clear()
+        self.client = APIClient()
+        self.user = User.objects.create_user(
+            username="alice",
+            email="alice@example.com",
+            password="password123",
+        )
+        self.client.force_authenticate(self.user)
+        self.conversation = Conversation.objects.create()
+        self.conversation.participants.add(self.user)
+        self.url = (
+            f"/api/conversations/{self.conversation.conversation_id}/messages/wait/"
+        )
+
+    def _message(self, body):
+        return Message.objects.create(
+            sender=self.user,
+            conversation=self.conversation,
+            message_body=body,
+        )
+
+    def test_returns_existing_messages_after_cursor_immediately(self):
+        response = self.client.get(self.url + "?timeout=0")
+        self.assertEqual(response.data["results"], [])
+        cursor = response.data["cursor"]
+
+        first = self._message("first")
+        response = self.client.get(self.url, {"after": cursor, "timeout": 5})
+        self.assertEqual(
+            [row["message_id"] for row in response.data["results"]],
+            [str(first.message_id)],
+        )
+
+        # The returned cursor skips messages already delivered.
+        response = self.client.get(
+            self.url, {"after": response.data["cursor"], "timeout": 0}
+        )
+        self.assertEqual(response.data["results"], [])
+
+    def test_request_is_released_by_a_notification(self):
+        threading.Timer(
+            0.1, notifier.notify, args=[self.conversation.conversation_id]
+        ).start()
+
+        start = time.monotonic()
+        response = self.client.get(self.url, {"timeout": 10})
+
+        self.assertEqual(response.status_code, 200)
+        self.assertLess(time.monotonic() - start, 5)
+
+    def test_send_message_notifies_waiters(self):
+        with notifier.listen(self.conversation.conversation_id) as listener:
+            with self.captureOnCommitCallbacks(execute=True):
+                self.client.post(
+                    f"/api/conversations/{self.conversation.conversation_id}/send-message/",
+                    {"message_body": "hi"},
+                    format="json",
+                )
+            self.assertTrue(listener.wait(timeout=0))
+
+    def test_invalid_cursor_is_rejected(self):
+        response = self.client.get(self.url, {"after": "nope", "timeout": 0})
+        self.assertEqual(response.status_code, 400)
+
+
+class AsyncWaitEndpointTestCase(TestCase):
+    def setUp(self) -> None:
+        get_cache().clear()
+        self.user = User.objects.create_user(
+            username="alice",
+            email="alice@example.com",
+            password="password123",
+        )
+        self.conversation = Conversation.objects.create()
+        self.conversation.participants.add(self.user)
+        self.headers = {"Authorization": f"Bearer {AccessToken.for_user(self.user)}"}
+        self.url = (
+            f"/api/conversations/{self.conversation.conversation_id}/messages/wait/"
+        )
+
+    async def test_wait_is_served_asynchronously(self):
+        factory = AsyncRequestFactory()
+        pk = str(self.conversation.conversation_id)
+        response = await async_views.wait_messages(
+            factory.get(self.url, {"timeout": 0}, headers=self.headers), pk
+        )
+        cursor = json.loads(response.content)["cursor"]
+        message = await Message.objects.acreate(
+            sender=self.user, conversation=self.conversation, message_body="hi"
+        )
+
+        response = await async_views.wait_messages(
+            factory.get(self.url, {"after": cursor, "timeout": 5}, headers=self.headers),
+            pk,
+        )
+
+        # None would mean the request was handed to the synchronous view.
+        self.assertEqual(response.status_code, 200)
+        self.assertEqual(
+            [row["message_id"] for row in json.loads(response.content)["results"]],
+            [str(message.message_id)],
+        )
+
+    async def test_request_is_released_by_a_notification(self):
+        threading.Timer(
+            0.1, notifier.notify, args=[self.conversation.conversation_id]
+        ).start()
+
+        start = time.monotonic()
+        response = await self.async_client.get(
+            self.url, {"timeout": 10}, headers=self.headers
+        )
+
+        self.assertEqual(response.status_code, 200)
+        self.assertLess(time.monotonic() - start, 5)
+
+    async def test_invalid_cursor_falls_back_to_the_sync_view(self):
+        response = await self.async_client.get(
+            self.url, {"after": "nope", "timeout": 0}, headers=self.headers
+        )
+        self.assertEqual(response.status_code, 400)
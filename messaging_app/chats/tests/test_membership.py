@@ -0,0 +1,96 @@
+from unittest import mock
+
+from django.test import TestCase
+from rest_framework.test import APIClient
+
+from chats import membership
+from chats.cache import get_cache
+from chats.membership import invalidate_membership, load_conversation_ids
+from chats.models import Conversation, User
+
+
+class MembershipTestCase(TestCase):
+    def setUp(self) -> None:
+        get_cache().clear()
+        self.client = APIClient()
+        self.user = User.objects.create_user(
+            username="alice",
+            email="alice@example.com",
+            password="password123",
+        )
+        self.other = User.objects.create_user(
+            username="bob",
+            email="bob@example.com",
+            password="password123",
+        )
+        self.client.force_authenticate(self.user)
+
+        self.conversation = Conversation.objects.create()
+        self.conversation.participants.add(self.user, self.other)
+        self.send_url = (
+            f"/api/conversations/{self.conversation.conversation_id}/send-message/"
+        )
+
+    def test_send_message_checks_membership_without_extra_queries(self):
+        load_conversation_ids(self.user.pk)
+
+        # One SELECT for the conversation, one INSERT for the message, one
+        # UPDATE of the conversation's activity counters and one of the
+        # participants' inbox entries.
+        with self.assertNumQueries(4):
+            response = self.client.post(
+                self.send_url, {"message_body": "hi"}, format="json"
+            )
+
+        self.assertEqual(response.status_code, 201)
+
+    def test_cache_is_invalidated_when_participants_change(self):
+        self.assertIn(
+            self.conversation.pk, load_conversation_ids(self.other.pk)
+        )
+
+        self.conversation.participants.remove(self.other)
+        self.assertNotIn(
+            self.conversation.pk, load_conversation_ids(self.other.pk)
+        )
+
+        self.other.conversations.add(self.conversation)
+        self.assertIn(
+            self.conversation.pk, load_conversation_ids(self.other.pk)
+        )
+
+        self.conversation.participants.clear()
+        self.assertEqual(load_conversation_ids(self.other.pk), frozenset())
+
+    def test_readers_racing_an_invalidation_do_not_cache_stale_sets(self):
+        set_versioned = membership.set_versioned
+
+        def leave_then_set(*args):
+            # The user leaves between the reader's query and its write.
+            self.conversation.participants.remove(self.other)
+            set_versioned(*args)
+
+        with mock.patch.object(membership, "set_versioned", side_effect=leave_then_set):
+            load_conversation_ids(self.other.pk)
+
+        self.assertNotIn(self.conversation.pk, load_conversation_ids(self.other.pk))
+
+    def test_invalidation_reloads_the_set(self):
+        load_conversation_ids(self.user.pk)
+        with self.assertNumQueries(0):
+            load_conversation_ids(self.user.pk)
+
+        invalidate_membership(self.user.pk)
+        with self.assertNumQueries(1):
+            load_conversation_ids(self.user.pk)
+
+    def test_message_detail_is_denied_after_leaving_the_conversation(self):
+        response = self.client.post(
+            self.send_url, {"message_body": "hi"}, format="json"
+        )
+        message_url = f"/api/messages/{response.data['message_id']}/"
+        self.assertEqual(self.client.get(message_url).status_code, 200)
+
+        self.conversation.participants.remove(self.user)
+
+        self.assertEqual(self.client.get(message_url).status_code, 404)
@@ -0,0 +1,102 @@
+from datetime import timedelta
+
+from django.test import TestCase
+from django.utils import timezone
+from rest_framework.test import APIClient
+
+from chats.models import Conversation, Message, User
+
+
+class MessageCursorPaginationTestCase(TestCase):
+    def setUp(self) -> None:
+        self.client = APIClient()
+        self.user = User.objects.create_user(
+            username="alice",
+            email="alice@example.com",
+            password="password123",
+        )
+        self.client.force_authenticate(self.user)
+
+        self.conversation = Conversation.objects.create()
+        self.conversation.participants.add(self.user)
+
+        # Pairs of messages share a timestamp so the message_id
+        # tie-breaker is exercised on every page boundary.
+        start = timezone.now() - timedelta(days=1)
+        self.messages = Message.objects.bulk_create(
+            Message(
+                sender=self.user,
+                conversation=self.conversation,
+                message_body=f"message {i}",
+                sent_at=start + timedelta(seconds=i // 2),
+            )
+            for i in range(45)
+        )
+        self.url = f"/api/conversations/{self.conversation.conversation_id}/messages/"
+
+    def _walk(self, url, link):
+        ids = []
+        while url:
+            response = self.client.get(url)
+            self.assertEqual(response.status_code, 200)
+            ids.extend(row["message_id"] for row in response.data["results"])
+            url = response.data[link]
+        return ids
+
+    def test_forward_walk_returns_every_message_once_in_order(self):
+        ids = self._walk(self.url + "?page_size=10", "next")
+
+        expected = [
+            str(m.message_id)
+            for m in sorted(self.messages, key=lambda m: (m.sent_at, m.message_id))
+        ]
+        self.assertEqual(ids, expected)
+
+    def test_previous_links_walk_back_to_the_first_page(self):
+        response = self.client.get(self.url + "?page_size=10")
+        first_page = [row["message_id"] for row in response.data["results"]]
+        self.assertIsNone(response.data["previous"])
+
+        url = response.data["next"]
+        for _ in range(2):
+            url = self.client.get(url).data["next"]
+
+        response = self.client.get(url)
+        url = response.data["previous"]
+        for _ in range(2):
+            url = self.client.get(url).data["previous"]
+
+        response = self.client.get(url)
+        self.assertEqual(
+            [row["message_id"] for row in response.data["results"]], first_page
+        )
+
+    def test_descending_ordering_is_followed(self):
+        ids = self._walk(self.url + "?page_size=7&ordering=-sent_at", "next")
+
+        expected = [
+            str(m.message_id)
+            for m in sorted(
+                self.messages,
+                key=lambda m: (m.sent_at, m.message_id),
+                reverse=True,
+            )
+        ]
+        self.assertEqual(ids, expected)
+
+    def test_invalid_page_sizes_fall_back_to_the_default(self):
+        for page_size in ("0", "-5", "ten"):
+            with self.subTest(page_size=page_size):
+                response = self.client.get(self.url, {"page_size": page_size})
+                self.assertEqual(len(response.data["results"]), 20)
+
+    def test_count_is_only_computed_on_request(self):
+        response = self.client.get(self.url)
+        self.assertIsNone(response.data["count"])
+
+        response = self.client.get(self.url + "?count=exact")
+        self.assertEqual(response.data["count"], 45)
+
+    def test_invalid_cursor_returns_404(self):
+        response = self.client.get(self.url + "?cursor=not-a-cursor")
+        self.assertEqual(response.status_code, 404)
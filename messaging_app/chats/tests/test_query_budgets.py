@@ -0,0 +1,201 @@
+import logging
+from datetime import timedelta
+
+from asgiref.sync import sync_to_async
+from django.test import TestCase, override_settings
+from django.utils import timezone
+from rest_framework.test import APIClient
+
+from chats.activity import refresh_activity
+from chats.cache import get_cache
+from chats.inbox import refresh_inbox
+from chats.models import Conversation, Message, User
+from chats.querybudget import (
+    QueryBudgetExceeded,
+    assert_within_budget,
+    fingerprint,
+    get_budget,
+)
+from chats.urls import nested_router, router
+
+
+def registered_routes():
+    """
+    (method, URL name) of every route of chats.urls, format suffixes and
+    HEAD (served by the GET handler) aside.
+    """
+    routes = set()
+    for pattern in [*router.urls, *nested_router.urls]:
+        if "format" in pattern.pattern.regex.groupindex:
+            continue
+        actions = getattr(pattern.callback, "actions", None) or {"get": None}
+        routes.update(
+            (method.upper(), pattern.name) for method in actions if method != "head"
+        )
+    return routes
+
+
+@override_settings(CHATS_QUERY_BUDGET_MODE="log")
+class QueryBudgetTestCase(TestCase):
+    """
+    Every route runs within its budget (settings.CHATS_QUERY_BUDGETS)
+    with cold caches and several rows per page, so a per-row query
+    shows up as repeated fingerprints.
+    """
+
+    def setUp(self) -> None:
+        get_cache().clear()
+        self.client = APIClient()
+        self.user, self.other, self.third = (
+            User.objects.create_user(
+                username=name, email=f"{name}@example.com", password="password123"
+            )
+            for name in ("alice", "bob", "carol")
+        )
+        self.client.force_authenticate(self.user)
+
+        start = timezone.now() - timedelta(days=1)
+        self.conversations = []
+        for i in range(3):
+            conversation = Conversation.objects.create()
+            conversation.participants.add(self.user, self.other, self.third)
+            Message.objects.bulk_create(
+                Message(
+                    sender=sender,
+                    conversation=conversation,
+                    message_body=f"hello {i}-{n}",
+                    sent_at=start + timedelta(minutes=i, seconds=n),
+                )
+                for n, sender in enumerate([self.user, self.other, self.third] * 2)
+            )
+            self.conversations.append(conversation)
+        refresh_activity()
+        refresh_inbox()
+        self.conversation = self.conversations[0]
+        self.message = Message.objects.filter(
+            conversation=self.conversation, sender=self.user
+        ).first()
+
+    def request(self, method: str, name: str):
+        conversation = f"/api/conversations/{self.conversation.pk}/"
+        message_body = {
+            "conversation": str(self.conversation.pk),
+            "message_body": "hi",
+        }
+        participants = {
+            "participant_ids": [str(user.pk) for user in (self.user, self.other, self.third)]
+        }
+        bulk = {"messages": [{"message_body": f"m{i}"} for i in range(5)]}
+
+        message_id = self.message.pk
+        if method == "DELETE":
+            message_id = Message.objects.create(
+                sender=self.user, conversation=self.conversation, message_body="x"
+            ).pk
+        message = f"/api/messages/{message_id}/"
+        nested_message = conversation + f"messages/{message_id}/"
+
+        requests = {
+            ("GET", "api-root"): ("/api/", None),
+            ("GET", "conversation-list"): ("/api/conversations/", None),
+            ("POST", "conversation-list"): ("/api/conversations/", participants),
+            ("POST", "conversation-bulk"): (
+                "/api/conversations/bulk/",
+                {"conversations": [participants] * 3},
+            ),
+            ("GET", "conversation-detail"): (conversation, None),
+            ("PUT", "conversation-detail"): (conversation, participants),
+            ("PATCH", "conversation-detail"): (conversation, participants),
+            ("DELETE", "conversation-detail"): (
+                f"/api/conversations/{self.conversations[2].pk}/",
+                None,
+            ),
+            ("POST", "conversation-mark-read"): (conversation + "mark-read/", None),
+            ("POST", "conversation-send-message"): (
+                conversation + "send-message/",
+                {"message_body": "hi"},
+            ),
+            ("GET", "message-list"): ("/api/messages/", None),
+            ("POST", "message-list"): ("/api/messages/", message_body),
+            ("POST", "message-bulk"): ("/api/messages/bulk/", bulk),
+            ("GET", "message-search"): ("/api/messages/search/?q=hello", None),
+            ("GET", "message-wait"): ("/api/messages/wait/?timeout=0", None),
+            ("GET", "message-export"): ("/api/messages/export/", None),
+            ("GET", "message-detail"): (message, None),
+            ("PUT", "message-detail"): (message, message_body),
+            ("PATCH", "message-detail"): (message, {"message_body": "edited"}),
+            ("DELETE", "message-detail"): (message, None),
+            ("GET", "conversation-messages-list"): (conversation + "messages/", None),
+            ("POST", "conversation-messages-list"): (
+                conversation + "messages/",
+                message_body,
+            ),
+            ("POST", "conversation-messages-bulk"): (conversation + "messages/bulk/", bulk),
+            ("GET", "conversation-messages-search"): (
+                conversation + "messages/search/?q=hello",
+                None,
+            ),
+            ("GET", "conversation-messages-wait"): (
+                conversation + "messages/wait/?timeout=0",
+                None,
+            ),
+            ("GET", "conversation-messages-export"): (
+                conversation + "messages/export/?output=csv",
+                None,
+            ),
+            ("GET", "conversation-messages-detail"): (nested_message, None),
+            ("PUT", "conversation-messages-detail"): (nested_message, message_body),
+            ("PATCH", "conversation-messages-detail"): (
+                nested_message,
+                {"message_body": "edited"},
+            ),
+            ("DELETE", "conversation-messages-detail"): (nested_message, None),
+        }
+        self.assertIn((method, name), requests, "route without a budget test")
+        path, body = requests[(method, name)]
+        get_cache().clear()
+        return getattr(self.client, method.lower())(path, body, format="json")
+
+    def test_every_route_is_within_budget(self):
+        for method, name in sorted(registered_routes()):
+            with self.subTest(f"{method} {name}"):
+                self.assertIsNotNone(get_budget(name, method), "no budget")
+                response = self.request(method, name)
+                self.assertLess(response.status_code, 500)
+                assert_within_budget(response)
+
+    @override_settings(
+        CHATS_QUERY_BUDGET_MODE="raise",
+        CHATS_QUERY_BUDGETS={"conversation-list": {"queries": 1}},
+    )
+    def test_raise_mode_fails_requests_over_budget(self):
+        with self.assertRaisesMessage(QueryBudgetExceeded, "conversation-list"):
+            self.client.get("/api/conversations/")
+
+    @override_settings(
+        CHATS_QUERY_BUDGET_MODE="log",
+        CHATS_QUERY_BUDGETS={"conversation-list": {"queries": 1}},
+    )
+    def test_log_mode_reports_and_serves(self):
+        with self.assertLogs("chats.querybudget", logging.WARNING) as logs:
+            response = self.client.get("/api/conversations/")
+
+        self.assertEqual(response.status_code, 200)
+        self.assertIn("queries", logs.output[0])
+        with self.assertRaises(AssertionError):
+            assert_within_budget(response)
+
+    async def test_async_requests_are_recorded(self):
+        await sync_to_async(self.async_client.force_login)(self.user)
+
+        response = await self.async_client.get("/api/conversations/")
+
+        self.assertEqual(response.status_code, 200)
+        self.assertEqual(response.query_stats.view_name, "conversation-list")
+        self.assertGreater(response.query_stats.count, 0)
+
+    def test_repeated_queries_share_a_fingerprint(self):
+        self.assertEqual(
+            fingerprint('SELECT 1 FROM "t" WHERE "id" IN (%s, %s)\n  AND "x" = %s'),
+            fingerprint('SELECT 1 FROM "t" WHERE "id" IN (%s) AND "x" = %s'),
+        )
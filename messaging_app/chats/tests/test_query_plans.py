@@ -0,0 +1,61 @@
+from datetime import timedelta
+
+from django.db import connection
+from django.test import TestCase
+from django.test.utils import CaptureQueriesContext
+from django.utils import timezone
+from rest_framework.test import APIClient
+
+from chats.models import Conversation, Message, User
+
+
+class MessageQueryPlanTestCase(TestCase):
+    def setUp(self) -> None:
+        self.client = APIClient()
+        self.user = User.objects.create_user(
+            username="alice",
+            email="alice@example.com",
+            password="password123",
+        )
+        self.client.force_authenticate(self.user)
+        self.conversation = Conversation.objects.create()
+        self.conversation.participants.add(self.user)
+        Message.objects.create(
+            sender=self.user,
+            conversation=self.conversation,
+            message_body="hello",
+        )
+
+    def _message_queries(self, url):
+        with CaptureQueriesContext(connection) as ctx:
+            response = self.client.get(url)
+        self.assertEqual(response.status_code, 200)
+        return [
+            q["sql"]
+            for q in ctx.captured_queries
+            if 'FROM "chats_message"' in q["sql"]
+        ]
+
+    def _plan(self, sql):
+        with connection.cursor() as cursor:
+            cursor.execute("EXPLAIN QUERY PLAN " + sql)
+            return " ".join(row[-1] for row in cursor.fetchall())
+
+    def test_listing_has_no_distinct(self):
+        for sql in self._message_queries("/api/messages/"):
+            self.assertNotIn("DISTINCT", sql)
+
+    def test_conversation_date_range_uses_composite_index(self):
+        if connection.vendor != "sqlite":
+            self.skipTest("EXPLAIN QUERY PLAN output is SQLite specific")
+
+        since = (timezone.now() - timedelta(days=1)).isoformat()
+        url = (
+            f"/api/messages/?conversation={self.conversation.conversation_id}"
+            f"&from_date={since.replace('+', '%2B')}"
+        )
+        (sql,) = self._message_queries(url)
+        plan = self._plan(sql)
+
+        self.assertIn("chats_msg_conv_sent_idx", plan)
+        self.assertNotIn("TEMP B-TREE", plan)
@@ -0,0 +1,103 @@
+from django.test import TestCase, override_settings
+from rest_framework.test import APIClient
+from rest_framework_simplejwt.tokens import AccessToken
+
+from chats.cache import get_cache
+from chats.models import Conversation, Message, User
+
+REPLICA = "replica"
+
+
+@override_settings(DATABASE_REPLICAS=[REPLICA], DATABASE_REPLICA_PIN_SECONDS=60)
+class ReplicaRoutingTestCase(TestCase):
+    """
+    The replica is a second test database with the same schema. Rows that
+    only exist on the primary stand for writes not replicated yet.
+    """
+
+    # The alias is defined by the test settings (messaging_app.settings).
+    databases = {"default", REPLICA}
+
+    def setUp(self) -> None:
+        get_cache().clear()
+        self.user = User.objects.create_user(
+            username="alice",
+            email="alice@example.com",
+            password="password123",
+        )
+        self.other = User.objects.create_user(
+            username="bob",
+            email="bob@example.com",
+            password="password123",
+        )
+        # Users are replicated; the conversation is not yet.
+        User.objects.using(REPLICA).bulk_create([self.user, self.other])
+
+        self.conversation = Conversation.objects.create()
+        self.conversation.participants.add(self.user, self.other)
+        self.messages_url = (
+            f"/api/conversations/{self.conversation.conversation_id}/messages/"
+        )
+
+    def client_for(self, user: User) -> APIClient:
+        client = APIClient()
+        client.credentials(HTTP_AUTHORIZATION=f"Bearer {AccessToken.for_user(user)}")
+        return client
+
+    def test_safe_requests_read_from_the_replica(self):
+        response = self.client_for(self.user).get("/api/conversations/")
+
+        self.assertEqual(response.status_code, 200)
+        self.assertEqual(response.data["count"], 0)
+
+    def test_reads_after_a_write_stick_to_the_primary(self):
+        client = self.client_for(self.user)
+        response = client.post(
+            f"/api/conversations/{self.conversation.conversation_id}/send-message/",
+            {"message_body": "hello"},
+            format="json",
+        )
+        self.assertEqual(response.status_code, 201)
+        self.assertFalse(Message.objects.using(REPLICA).exists())
+
+        response = client.get(self.messages_url)
+        self.assertEqual(
+            [row["message_body"] for row in response.data["results"]], ["hello"]
+        )
+
+        # Other clients keep reading from the replica.
+        response = self.client_for(self.other).get("/api/conversations/")
+        self.assertEqual(response.data["count"], 0)
+
+    def test_writes_and_unsafe_requests_use_the_primary(self):
+        response = self.client_for(self.user).post(
+            "/api/conversations/",
+            {"participant_ids": [str(self.other.pk)]},
+            format="json",
+        )
+
+        self.assertEqual(response.status_code, 201)
+        self.assertEqual(Conversation.objects.count(), 2)
+        self.assertFalse(Conversation.objects.using(REPLICA).exists())
+
+    def test_queries_outside_requests_use_the_primary(self):
+        self.assertEqual(Conversation.objects.count(), 1)
+        self.assertEqual(Conversation.objects.all().db, "default")
+
+    async def test_async_requests_are_routed_too(self):
+        headers = {"Authorization": f"Bearer {AccessToken.for_user(self.user)}"}
+        await Message.objects.acreate(
+            sender=self.other, conversation=self.conversation, message_body="hi"
+        )
+
+        response = await self.async_client.get(self.messages_url, headers=headers)
+        self.assertEqual(response.json()["results"], [])
+
+        response = await self.async_client.post(
+            f"/api/conversations/{self.conversation.conversation_id}/mark-read/",
+            headers=headers,
+        )
+        self.assertEqual(response.status_code, 204)
+
+        response = await self.async_client.get(self.messages_url, headers=headers)
+        self.assertEqual(len(response.json()["results"]), 1)
@@ -0,0 +1,155 @@
+from django.db import connection
+from django.test import TestCase, override_settings
+from django.test.utils import CaptureQueriesContext
+from rest_framework.test import APIClient
+
+from chats.cache import get_cache
+from chats.models import Conversation, Message, User
+from chats.search import (
+    SQLITE_TRIGGERS,
+    ensure_search_index,
+    get_search_backend,
+    sqlite_fts_objects,
+)
+
+
+class MessageSearchTestCase(TestCase):
+    def setUp(self) -> None:
+        get_cache().clear()
+        self.client = APIClient()
+        self.user = User.objects.create_user(
+            username="alice",
+            email="alice@example.com",
+            password="password123",
+        )
+        self.other = User.objects.create_user(
+            username="bob",
+            email="bob@example.com",
+            password="password123",
+        )
+        self.client.force_authenticate(self.user)
+
+        self.conversation = Conversation.objects.create()
+        self.conversation.participants.add(self.user, self.other)
+        hidden = Conversation.objects.create()
+        hidden.participants.add(self.other)
+
+        self.weak = self._message(
+            self.conversation,
+            "are we still on for lunch tomorrow or should we move it to next week",
+        )
+        self.strong = self._message(self.conversation, "Lunch tomorrow? lunch!")
+        self._message(self.conversation, "unrelated")
+        self._message(hidden, "secret lunch tomorrow")
+
+    def _message(self, conversation, body):
+        return Message.objects.create(
+            sender=self.other,
+            conversation=conversation,
+            message_body=body,
+        )
+
+    def _assert_search_behaviour(self):
+        response = self.client.get("/api/messages/search/?q=Lunch tomorrow")
+        self.assertEqual(response.status_code, 200)
+        self.assertEqual(response.data["count"], 2)
+        self.assertEqual(
+            [row["message_id"] for row in response.data["results"]],
+            [str(self.strong.message_id), str(self.weak.message_id)],
+        )
+
+        response = self.client.get("/api/messages/?search=lunch")
+        self.assertEqual(
+            [row["message_id"] for row in response.data["results"]],
+            [str(self.weak.message_id), str(self.strong.message_id)],
+        )
+
+        self.weak.message_body = "dinner"
+        self.weak.save()
+        response = self.client.get("/api/messages/?search=lunch")
+        self.assertEqual(len(response.data["results"]), 1)
+
+    def test_default_backend(self):
+        self._assert_search_behaviour()
+
+    @override_settings(CHATS_SEARCH_BACKEND="python")
+    def test_python_inverted_index_backend(self):
+        get_search_backend().rebuild()
+        self._assert_search_behaviour()
+
+    def test_query_is_required(self):
+        response = self.client.get("/api/messages/search/")
+        self.assertEqual(response.status_code, 400)
+
+    def test_queries_without_terms_are_rejected(self):
+        for query in ('"', "*", " -- "):
+            with self.subTest(query=query):
+                response = self.client.get("/api/messages/search/", {"q": query})
+                self.assertEqual(response.status_code, 400)
+                self.assertEqual(response.data["detail"], "q has no searchable terms.")
+
+                response = self.client.get("/api/messages/", {"search": query})
+                self.assertEqual(response.status_code, 200)
+                self.assertEqual(response.data["results"], [])
+
+    def test_queries_without_terms_are_ranked_empty(self):
+        queryset = get_search_backend().search(Message.objects.all(), "*")
+
+        self.assertEqual(list(queryset.order_by("-search_rank")), [])
+
+
+class SQLiteFullTextIndexTestCase(TestCase):
+    def setUp(self) -> None:
+        if connection.vendor != "sqlite":
+            self.skipTest("FTS5 index is SQLite specific")
+        get_cache().clear()
+        self.client = APIClient()
+        self.user = User.objects.create_user(
+            username="alice",
+            email="alice@example.com",
+            password="password123",
+        )
+        self.client.force_authenticate(self.user)
+        self.conversation = Conversation.objects.create()
+        self.conversation.participants.add(self.user)
+        Message.objects.bulk_create(
+            Message(
+                sender=self.user,
+                conversation=self.conversation,
+                message_body=f"lunch {i}" if i % 3 else f"lunch tomorrow {i}",
+            )
+            for i in range(3000)
+        )
+
+    def test_ranked_search_matches_once_per_query(self):
+        with CaptureQueriesContext(connection) as ctx:
+            response = self.client.get("/api/messages/search/?q=lunch tomorrow")
+
+        self.assertEqual(response.status_code, 200)
+        self.assertEqual(response.data["count"], 1000)
+        queries = [q["sql"] for q in ctx.captured_queries if "MATCH" in q["sql"]]
+        # The count and the page.
+        self.assertEqual(len(queries), 2)
+        for sql in queries:
+            self.assertEqual(sql.count("MATCH"), 1)
+            self.assertNotIn("rowid", sql)
+            with connection.cursor() as cursor:
+                cursor.execute("EXPLAIN QUERY PLAN " + sql)
+                plan = [row[-1] for row in cursor.fetchall()]
+            self.assertIn("VIRTUAL TABLE", plan[0])
+            self.assertIn("chats_message", plan[1])
+            self.assertIn("message_id=?", plan[1])
+
+    def test_missing_triggers_are_recreated(self):
+        with connection.cursor() as cursor:
+            for name in SQLITE_TRIGGERS:
+                cursor.execute(f"DROP TRIGGER {name}")
+        Message.objects.create(
+            sender=self.user, conversation=self.conversation, message_body="kittens"
+        )
+
+        ensure_search_index("default")
+
+        self.assertLessEqual(set(SQLITE_TRIGGERS), sqlite_fts_objects(connection))
+        response = self.client.get("/api/messages/?search=kittens")
+        self.assertEqual(len(response.data["results"]), 1)
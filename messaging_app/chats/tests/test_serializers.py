@@ -0,0 +1,58 @@
+from datetime import timedelta
+
+from django.test import TestCase
+from django.utils import timezone
+from rest_framework.renderers import JSONRenderer
+
+from chats.models import Conversation, Message, User
+from chats.serializers import (
+    MessageReadSerializer,
+    MessageSerializer,
+    UserReadSerializer,
+    UserSerializer,
+)
+
+
+class ReadSerializerTestCase(TestCase):
+    def setUp(self) -> None:
+        self.users = [
+            User.objects.create_user(
+                username="alice",
+                email="alice@example.com",
+                password="password123",
+                first_name="Alice",
+                last_name="Liddell",
+                phone_number="+20 100 000 0000",
+                role="host",
+            ),
+            User.objects.create_user(
+                username="bob",
+                email="bob@example.com",
+                password="password123",
+            ),
+        ]
+        conversation = Conversation.objects.create()
+        now = timezone.now()
+        Message.objects.bulk_create(
+            Message(
+                sender=self.users[i % 2],
+                conversation=conversation,
+                message_body=f"message {i} éè \"quoted\"\n",
+                sent_at=now - timedelta(microseconds=i * 1001),
+            )
+            for i in range(10)
+        )
+
+    def test_user_output_is_byte_identical(self):
+        users = User.objects.order_by("email")
+        self.assertEqual(
+            JSONRenderer().render(UserReadSerializer(users, many=True).data),
+            JSONRenderer().render(UserSerializer(users, many=True).data),
+        )
+
+    def test_message_output_is_byte_identical(self):
+        messages = Message.objects.select_related("sender")
+        self.assertEqual(
+            JSONRenderer().render(MessageReadSerializer(messages, many=True).data),
+            JSONRenderer().render(MessageSerializer(messages, many=True).data),
+        )
@@ -0,0 +1,88 @@
+from django.db import connection
+from django.test import TestCase
+from django.test.utils import CaptureQueriesContext
+from rest_framework.test import APIClient
+
+from chats.cache import get_cache
+from chats.models import Conversation, Message, User
+from chats.serializers import user_representation
+
+
+class SideloadTestCase(TestCase):
+    def setUp(self) -> None:
+        get_cache().clear()
+        self.client = APIClient()
+        self.user = User.objects.create_user(
+            username="alice", email="alice@example.com", password="password123"
+        )
+        self.other = User.objects.create_user(
+            username="bob", email="bob@example.com", password="password123"
+        )
+        self.client.force_authenticate(self.user)
+
+        self.conversation = Conversation.objects.create()
+        self.conversation.participants.add(self.user, self.other)
+        for i in range(6):
+            Message.objects.create(
+                sender=(self.user, self.other)[i % 2],
+                conversation=self.conversation,
+                message_body=f"message {i}",
+            )
+        self.url = f"/api/conversations/{self.conversation.pk}/messages/"
+
+    def test_senders_are_included_once(self):
+        data = self.client.get(self.url + "?include=users").data
+
+        self.assertEqual(len(data["results"]), 6)
+        self.assertNotIn("sender", data["results"][0])
+        self.assertEqual(
+            {row["sender_id"] for row in data["results"]},
+            {str(self.user.pk), str(self.other.pk)},
+        )
+        self.assertEqual(
+            data["included"]["users"],
+            {
+                str(self.user.pk): user_representation(self.user),
+                str(self.other.pk): user_representation(self.other),
+            },
+        )
+
+    def test_compact_rows_match_the_default_rows(self):
+        default = self.client.get(self.url).data["results"]
+        compact = self.client.get(self.url + "?include=users").data["results"]
+
+        for full, row in zip(default, compact):
+            sender = full.pop("sender")
+            self.assertEqual(row.pop("sender_id"), sender["user_id"])
+            self.assertEqual(row, full)
+
+    def test_no_extra_queries(self):
+        with CaptureQueriesContext(connection) as default:
+            self.client.get(self.url + "?page_size=5")
+        get_cache().clear()
+        with CaptureQueriesContext(connection) as compact:
+            self.client.get(self.url + "?page_size=5&include=users")
+
+        self.assertEqual(len(compact), len(default))
+
+    def test_cached_first_page_keeps_the_included_users(self):
+        first = self.client.get(self.url + "?include=users").data
+        second = self.client.get(self.url + "?include=users").data
+
+        self.assertEqual(second["included"], first["included"])
+        self.assertNotIn("included", self.client.get(self.url).data)
+
+    def test_search_and_wait_side_load(self):
+        search = self.client.get("/api/messages/search/?q=message&include=users").data
+        wait = self.client.get(self.url + "wait/?after=&timeout=0&include=users").data
+
+        self.assertEqual(set(search["included"]["users"]), {str(self.user.pk), str(self.other.pk)})
+        self.assertEqual(wait, {"cursor": wait["cursor"], "results": [], "included": {"users": {}}})
+
+    def test_invalid_includes_are_rejected(self):
+        for query in ("?include=conversations", "?include=users&fields=message_id"):
+            with self.subTest(query=query):
+                response = self.client.get(self.url + query)
+
+                self.assertEqual(response.status_code, 400)
+                self.assertIn("include", response.data)
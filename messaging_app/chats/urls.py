@@ -1,7 +1,9 @@
+from django.conf import settings
 from django.urls import path, include
 from rest_framework import routers
 from rest_framework_nested import routers as nested_routers
 
+from . import async_views
 from .views import ConversationViewSet, MessageViewSet
 
 # Default router for top-level resources
@@ -21,7 +23,57 @@ nested_router.register(
     basename="conversation-messages",
 )
 
+
+def router_view(name: str):
+    """
+    View the routers registered under the given URL name.
+    """
+    for pattern in [*router.urls, *nested_router.urls]:
+        if pattern.name == name:
+            return pattern.callback
+    raise LookupError(name)
+
+
+# Async fast paths for the hot endpoints (see chats.async_views). They
+# shadow the router URLs and fall back to the router's views.
+async_urlpatterns = [
+    path(
+        "conversations/",
+        async_views.with_fallback(
+            async_views.conversation_list, router_view("conversation-list")
+        ),
+    ),
+    path(
+        "conversations/<pk>/send-message/",
+        async_views.with_fallback(
+            async_views.send_message, router_view("conversation-send-message")
+        ),
+    ),
+    path(
+        "conversations/<conversation_pk>/messages/",
+        async_views.with_fallback(
+            async_views.conversation_messages,
+            router_view("conversation-messages-list"),
+        ),
+    ),
+]
+
+# The long-poll is always served by an async view, so that a waiting
+# request does not hold a thread under ASGI.
+long_poll_urlpatterns = [
+    path(
+        "conversations/<conversation_pk>/messages/wait/",
+        async_views.with_fallback(
+            async_views.wait_messages,
+            router_view("conversation-messages-wait"),
+        ),
+        name="conversation-messages-wait",
+    ),
+]
+
 urlpatterns = [
+    *(async_urlpatterns if settings.CHATS_ASYNC_VIEWS else []),
+    *long_poll_urlpatterns,
     path("", include(router.urls)),
     path("", include(nested_router.urls)),
 ]
@@ -0,0 +1,123 @@
+import time
+from typing import Any, Dict, Iterable, Optional, Tuple
+
+from .cache import get_cache
+
+# Version counters live in the cache without expiry. A missing counter
+# (evicted or never set) is re-created with the current time, which only
+# makes clients refetch once.
+VERSION_TIMEOUT = None
+
+
+def version_key(scope: str, object_id) -> str:
+    return f"chats:version:{scope}:{object_id}"
+
+
+def get_version(scope: str, object_id) -> int:
+    """
+    Current version of an object, as the nanosecond timestamp
+    of its last change.
+    """
+    cache = get_cache()
+    key = version_key(scope, object_id)
+    version = cache.get(key)
+    if version is None:
+        version = time.time_ns()
+        if not cache.add(key, version, VERSION_TIMEOUT):
+            version = cache.get(key, version)
+    return version
+
+
+async def aget_version(scope: str, object_id) -> int:
+    """
+    get_version() for async views.
+    """
+    cache = get_cache()
+    key = version_key(scope, object_id)
+    version = await cache.aget(key)
+    if version is None:
+        version = time.time_ns()
+        if not await cache.aadd(key, version, VERSION_TIMEOUT):
+            version = await cache.aget(key, version)
+    return version
+
+
+def bump_version(scope: str, *object_ids) -> None:
+    """
+    Mark objects as changed. Keys derived from the old version become
+    unreachable, so invalidation costs one cache write per object.
+    """
+    if not object_ids:
+        return
+    version = time.time_ns()
+    get_cache().set_many(
+        {version_key(scope, object_id): version for object_id in object_ids},
+        VERSION_TIMEOUT,
+    )
+
+
+def get_versions(scope: str, object_ids: Iterable) -> Dict[object, int]:
+    """
+    Versions of many objects with a single cache round trip.
+    """
+    keys = {version_key(scope, object_id): object_id for object_id in object_ids}
+    found = get_cache().get_many(list(keys))
+    versions = {keys[key]: version for key, version in found.items()}
+    missing = [object_id for object_id in keys.values() if object_id not in versions]
+    for object_id in missing:
+        versions[object_id] = get_version(scope, object_id)
+    return versions
+
+
+# ---------- Versioned entries ----------
+#
+# Read-through caches guarded against the read-then-set race: a reader
+# that loaded its data before an invalidation would otherwise write it
+# back after the invalidation dropped the entry. Entries are stored with
+# the version of their object read before loading, invalidation bumps
+# the version, and entries written under an older version are ignored.
+
+
+def get_versioned(scope: str, object_id, key: str) -> Tuple[int, Optional[Any]]:
+    """
+    (version, value) of an entry written by set_versioned(), with one
+    cache round trip. value is None when the entry is missing or stale;
+    load it, then store it under the returned version.
+    """
+    version_cache_key = version_key(scope, object_id)
+    found = get_cache().get_many([key, version_cache_key])
+    return _versioned(found.get(version_cache_key), found.get(key)) or (
+        get_version(scope, object_id),
+        None,
+    )
+
+
+async def aget_versioned(scope: str, object_id, key: str) -> Tuple[int, Optional[Any]]:
+    """
+    get_versioned() for async views.
+    """
+    version_cache_key = version_key(scope, object_id)
+    found = await get_cache().aget_many([key, version_cache_key])
+    return _versioned(found.get(version_cache_key), found.get(key)) or (
+        await aget_version(scope, object_id),
+        None,
+    )
+
+
+def _versioned(version: Optional[int], entry) -> Optional[Tuple[int, Optional[Any]]]:
+    if version is None:
+        return None
+    if entry is not None and entry[0] == version:
+        return version, entry[1]
+    return version, None
+
+
+def set_versioned(key: str, version: int, value, timeout) -> None:
+    get_cache().set(key, (version, value), timeout)
+
+
+async def aset_versioned(key: str, version: int, value, timeout) -> None:
+    """
+    set_versioned() for async views.
+    """
+    await get_cache().aset(key, (version, value), timeout)
@@ -1,32 +1,146 @@
+from typing import Tuple
+from uuid import UUID
+
+from django.db import transaction
+from django.db.models import Count, Max, Sum
+from django.db.models.functions import Coalesce
+from django.http import StreamingHttpResponse
+from django.utils import timezone
 from django_filters.rest_framework import DjangoFilterBackend
 from rest_framework import viewsets, filters
 from rest_framework.decorators import action
+from rest_framework.exceptions import (
+    NotFound,
+    ParseError,
+    PermissionDenied,
+    ValidationError,
+)
 from rest_framework.permissions import IsAuthenticated
 from rest_framework.response import Response
 from rest_framework.status import (
     HTTP_201_CREATED,
+    HTTP_204_NO_CONTENT,
     HTTP_400_BAD_REQUEST,
     HTTP_403_FORBIDDEN,
 )
 
-from .models import Conversation, Message
-from .serializers import ConversationSerializer, MessageSerializer
+from .binary import NativeValuesMixin
+from .conditional import ConditionalListMixin, build_validators
+from .export import FORMATS as EXPORT_FORMATS, walk
+from .fieldsets import SparseFieldsetMixin
+from .membership import as_uuid, is_participant
+from .models import (
+    Conversation,
+    Message,
+    add_participants,
+    participant_conversation_ids,
+)
+from .serializers import (
+    CONVERSATION_SHAPE,
+    CONVERSATION_SUMMARY_SHAPE,
+    MESSAGE_SHAPE,
+    BulkConversationCreateSerializer,
+    BulkMessageCreateSerializer,
+    CompactMessageListSerializer,
+    ConversationSerializer,
+    ConversationSummarySerializer,
+    MessageReadSerializer,
+    MessageSerializer,
+)
 from .permissions import IsParticipantOfConversation
-from .pagination import MessagePagination
-from .filters import MessageFilter
+from .notifications import notifier
+from .routers import use_primary
+from .pagination import (
+    ConversationPagination,
+    Cursor,
+    MessageCursorPagination,
+    MessagePagination,
+    decode_cursor_token,
+    encode_cursor_token,
+)
+from .filters import MessageFilter, MessageSearchFilter
+from . import inbox
+from .search import get_search_backend, tokenize
+from .sideload import SideloadMixin, with_included
+from .signals import messages_bulk_created
+from .versions import get_version
+
+
+def message_stats(queryset):
+    """
+    (count, latest sent_at) of a message queryset in one aggregate query.
+    """
+    stats = queryset.aggregate(count=Count("pk"), last_sent_at=Max("sent_at"))
+    return stats["count"], stats["last_sent_at"]
+
+
+async def amessage_stats(queryset):
+    """
+    message_stats() for async views.
+    """
+    stats = await queryset.aaggregate(count=Count("pk"), last_sent_at=Max("sent_at"))
+    return stats["count"], stats["last_sent_at"]
+
+
+def conversation_stats(queryset):
+    """
+    message_stats() over conversations, from their denormalized
+    activity counters instead of their messages.
+    """
+    stats = queryset.aggregate(
+        count=Coalesce(Sum("message_count"), 0), last_sent_at=Max("last_message_at")
+    )
+    return stats["count"], stats["last_sent_at"]
+
 
+async def aconversation_stats(queryset):
+    """
+    conversation_stats() for async views.
+    """
+    stats = await queryset.aaggregate(
+        count=Coalesce(Sum("message_count"), 0), last_sent_at=Max("last_message_at")
+    )
+    return stats["count"], stats["last_sent_at"]
+
+
+def last_modified_of(last_sent_at, version: int) -> float:
+    timestamps = [version / 1e9]
+    if last_sent_at is not None:
+        timestamps.append(last_sent_at.timestamp())
+    return max(timestamps)
 
-class ConversationViewSet(viewsets.ModelViewSet):
+
+def list_validators(request, stats, version: int):
+    """
+    ETag / Last-Modified of a list from message_stats() and a version.
+    """
+    count, last_sent_at = stats
+    return build_validators(
+        request,
+        (count, last_sent_at, version),
+        last_modified_of(last_sent_at, version),
+    )
+
+
+class ConversationViewSet(
+    NativeValuesMixin, SparseFieldsetMixin, ConditionalListMixin, viewsets.ModelViewSet
+):
     """
     ViewSet for listing, retrieving and creating conversations.
 
-    - list:     GET /conversations/
+    - list:     GET /conversations/ (summary representation, ETag aware)
     - create:   POST /conversations/
+    - bulk:     POST /conversations/bulk/
     - retrieve: GET /conversations/{conversation_id}/
     - send_message: POST /conversations/{conversation_id}/send-message/
+    - mark_read:    POST /conversations/{conversation_id}/mark-read/
+
+    Message history is served by /conversations/{conversation_id}/messages/.
+    list and retrieve accept ?fields= / ?expand= (see chats.fieldsets).
     """
 
     serializer_class = ConversationSerializer
+    pagination_class = ConversationPagination
     permission_classes = [IsAuthenticated, IsParticipantOfConversation]
 
     # Search & ordering for conversations
@@ -36,19 +150,50 @@ class ConversationViewSet(viewsets.ModelViewSet):
         "participants__first_name",
         "participants__last_name",
     ]
-    ordering_fields = ["created_at"]
-    ordering = ["-created_at"]
+    # The inbox is listed by latest activity, a range scan of the user's
+    # entries (chats_inbox_user_activity_idx).
+    ordering_fields = ["created_at", "last_message_at", "last_activity_at"]
+    ordering = ["-last_activity_at"]
+
+    fieldset_shapes = {"list": CONVERSATION_SUMMARY_SHAPE, "retrieve": CONVERSATION_SHAPE}
 
     def get_queryset(self):
         """
         Users can only see conversations where they are participants.
+        The list reads them through the user's inbox entries.
+        """
+        user = self.request.user
+        if self.action == "list":
+            queryset = Conversation.objects.inbox(user)
+        else:
+            # Same activity as the inbox's, for the default ordering.
+            queryset = Conversation.objects.for_participant(user).alias(
+                last_activity_at=Coalesce("last_message_at", "created_at")
+            )
+        if self.action in ("send_message", "mark_read"):
+            # These actions only need the row itself.
+            return queryset
+
+        return self.project(
+            queryset.prefetch_related("participants").with_last_message()
+        )
+
+    def get_serializer_class(self):
+        if self.action == "list":
+            return ConversationSummarySerializer
+        return ConversationSerializer
+
+    def get_list_validators(self):
+        """
+        ETag / Last-Modified of the conversation list: message count and
+        latest sent_at over the user's conversations, plus the user's
+        conversation-list version (membership, read markers, edits).
         """
         user = self.request.user
-        return (
-            Conversation.objects.filter(participants=user)
-            .prefetch_related("participants", "messages__sender")
-            .distinct()
+        stats = conversation_stats(
+            Conversation.objects.filter(pk__in=participant_conversation_ids(user))
         )
+        return list_validators(self.request, stats, get_version("user", user.pk))
 
     def create(self, request, *args, **kwargs) -> Response:
         """
@@ -62,12 +207,55 @@ class ConversationViewSet(viewsets.ModelViewSet):
         serializer = self.get_serializer(data=request.data)
         serializer.is_valid(raise_exception=True)
         conversation = serializer.save()
-        headers = self.get_success_headers(serializer.data)
         data = ConversationSerializer(
             conversation, context=self.get_serializer_context()
         ).data
+        headers = self.get_success_headers(data)
         return Response(data, status=HTTP_201_CREATED, headers=headers)
 
+    @action(detail=False, methods=["post"], url_path="bulk")
+    def bulk(self, request) -> Response:
+        """
+        Create many conversations in one transaction.
+
+        POST /api/conversations/bulk/
+
+        Body:
+        {
+          "conversations": [
+            {"participant_ids": ["uuid-1", "uuid-2"]},
+            ...
+          ]
+        }
+
+        - the authenticated user takes part in every conversation
+        - every participant id is checked with a single query, and
+          unknown ids are reported
+        - conversations and participant rows are inserted with one
+          bulk INSERT each
+        """
+        serializer = BulkConversationCreateSerializer(data=request.data)
+        serializer.is_valid(raise_exception=True)
+        items = serializer.validated_data["conversations"]
+
+        conversations = [Conversation() for _ in items]
+        with transaction.atomic():
+            Conversation.objects.bulk_create(conversations)
+            add_participants(
+                (conversation, {request.user.pk, *item["participant_ids"]})
+                for conversation, item in zip(conversations, items)
+            )
+
+        return Response(
+            {
+                "created": len(conversations),
+                "conversation_ids": [
+                    conversation.conversation_id for conversation in conversations
+                ],
+            },
+            status=HTTP_201_CREATED,
+        )
+
     @action(
         detail=True,
         methods=["post"],
@@ -95,7 +283,7 @@ class ConversationViewSet(viewsets.ModelViewSet):
             )
 
         # Extra safety: enforce that only participants can send messages.
-        if not conversation.participants.filter(pk=request.user.pk).exists():
+        if not is_participant(request, conversation.pk):
             return Response(
                 {"detail": "You are not a participant in this conversation."},
                 status=HTTP_403_FORBIDDEN,
@@ -111,26 +299,72 @@ class ConversationViewSet(viewsets.ModelViewSet):
         )
         return Response(message_serializer.data, status=HTTP_201_CREATED)
 
+    @action(
+        detail=True,
+        methods=["post"],
+        permission_classes=[IsAuthenticated, IsParticipantOfConversation],
+        url_path="mark-read",
+    )
+    def mark_read(self, request, pk=None) -> Response:
+        """
+        Mark every message currently in the conversation as read
+        for the authenticated user (resets its unread_count).
+
+        POST /api/conversations/{conversation_id}/mark-read/
+        """
+        inbox.mark_read(request.user, self.get_object())
+        return Response(status=HTTP_204_NO_CONTENT)
+
 
-class MessageViewSet(viewsets.ModelViewSet):
+class MessageViewSet(
+    NativeValuesMixin,
+    SideloadMixin,
+    SparseFieldsetMixin,
+    ConditionalListMixin,
+    viewsets.ModelViewSet,
+):
     """
     ViewSet for listing, retrieving, creating, updating and deleting messages.
 
     - list:   GET /messages/
+              GET /conversations/{conversation_pk}/messages/ (ETag aware)
     - create: POST /messages/
+    - bulk:   POST /conversations/{conversation_pk}/messages/bulk/
+    - search: GET /messages/search/?q=<terms> (ranked)
+    - wait:   GET /conversations/{conversation_pk}/messages/wait/?after=<cursor>
+    - export: GET /conversations/{conversation_pk}/messages/export/?output=ndjson|csv
+
+    Reads (list, retrieve, search, wait) accept ?fields= / ?expand=
+    (see chats.fieldsets); list, search and wait also accept
+    ?include=users, which side-loads the senders (see chats.sideload).
     """
 
+    # Rows per INSERT statement in the bulk import path.
+    bulk_batch_size = 500
+
+    # Long-poll limits (seconds) and maximum messages returned per wake-up.
+    wait_default_timeout = 25
+    wait_max_timeout = 30
+    wait_max_results = 100
+
+    # Export keyset batch (rows per query) and iterator() chunk size.
+    export_batch_size = 5000
+    export_chunk_size = 1000
+
     serializer_class = MessageSerializer
     permission_classes = [IsAuthenticated, IsParticipantOfConversation]
 
-    # Pagination + Filtering + search/ordering (Task 2)
-    pagination_class = MessagePagination
-    filter_backends = [DjangoFilterBackend, filters.SearchFilter, filters.OrderingFilter]
+    # Keyset pagination on (sent_at, message_id) + Filtering + search/ordering
+    pagination_class = MessageCursorPagination
+    filter_backends = [DjangoFilterBackend, MessageSearchFilter, filters.OrderingFilter]
     filterset_class = MessageFilter
-    search_fields = ["sender__email", "message_body"]
     ordering_fields = ["sent_at"]
     ordering = ["sent_at"]
 
+    fieldset_shapes = dict.fromkeys(("list", "retrieve", "search", "wait"), MESSAGE_SHAPE)
+    sideload_actions = ("list", "search", "wait")
+    sideload_serializer_class = CompactMessageListSerializer
+
     def get_queryset(self):
         """
         Users can only see messages belonging to conversations
@@ -143,15 +377,42 @@ class MessageViewSet(viewsets.ModelViewSet):
         user = self.request.user
 
         # Important for checker: "Message.objects.filter" appears here.
+        # Visibility is an IN subquery on the participants table rather
+        # than a join, so the listing needs no DISTINCT.
         queryset = Message.objects.filter(
-            conversation__participants=user
-        ).select_related("sender", "conversation").distinct()
+            conversation_id__in=participant_conversation_ids(user)
+        ).select_related("sender")
 
         conversation_pk = self.kwargs.get("conversation_pk")
         if conversation_pk:
-            queryset = queryset.filter(conversation__conversation_id=conversation_pk)
+            queryset = queryset.filter(conversation_id=conversation_pk)
+
+        return self.project(queryset)
+
+    def get_serializer_class(self):
+        """
+        Reads use the fast dict-building serializer; writes keep the
+        validating ModelSerializer.
+        """
+        if self.action in ("list", "retrieve", "search", "wait"):
+            return MessageReadSerializer
+        return MessageSerializer
+
+    def get_list_validators(self):
+        """
+        ETag / Last-Modified of /conversations/{conversation_pk}/messages/:
+        message count and latest sent_at of the conversation (one range
+        scan on chats_msg_conv_sent_idx), plus the conversation version
+        (participants, edits, deletes).
+        """
+        conversation_pk = self.kwargs.get("conversation_pk")
+        if not conversation_pk or not is_participant(self.request, conversation_pk):
+            return None
 
-        return queryset
+        stats = message_stats(Message.objects.filter(conversation_id=conversation_pk))
+        return list_validators(
+            self.request, stats, get_version("conversation", conversation_pk)
+        )
 
     def perform_create(self, serializer: MessageSerializer) -> None:
         """
@@ -162,9 +423,248 @@ class MessageViewSet(viewsets.ModelViewSet):
         conversation = serializer.validated_data["conversation"]
         user = self.request.user
 
-        if not conversation.participants.filter(pk=user.pk).exists():
-            from rest_framework.exceptions import PermissionDenied
-
+        if not is_participant(self.request, conversation.pk):
             raise PermissionDenied("You are not a participant in this conversation.")
 
         serializer.save(sender=user)
+
+    @action(detail=False, methods=["post"], url_path="bulk")
+    def bulk(self, request, conversation_pk=None) -> Response:
+        """
+        Import many messages into a conversation in one request.
+
+        POST /api/conversations/{conversation_id}/messages/bulk/
+
+        Body:
+        {
+          "messages": [
+            {"message_body": "Hello", "sender": "<uuid>", "sent_at": "..."},
+            ...
+          ]
+        }
+
+        - sender defaults to the authenticated user; other senders
+          require a staff account (bridge services)
+        - every distinct sender must be a participant of the conversation,
+          checked with a single query
+        - rows are inserted with bulk_create in batches
+        """
+        if conversation_pk is None:
+            raise NotFound("Use /conversations/{conversation_id}/messages/bulk/.")
+
+        conversation_id = as_uuid(conversation_pk)
+        conversation = (
+            Conversation.objects.filter(pk=conversation_id).first()
+            if conversation_id is not None
+            else None
+        )
+        if conversation is None:
+            raise NotFound("Conversation not found.")
+
+        user = request.user
+        if not (user.is_staff or is_participant(request, conversation.pk)):
+            raise PermissionDenied("You are not a participant in this conversation.")
+
+        serializer = BulkMessageCreateSerializer(data=request.data)
+        serializer.is_valid(raise_exception=True)
+        items = serializer.validated_data["messages"]
+
+        sender_ids = {item.get("sender", user.pk) for item in items}
+        if not user.is_staff and sender_ids != {user.pk}:
+            raise PermissionDenied("Only staff can import messages for other users.")
+
+        participant_ids = set(
+            Conversation.participants.through.objects.filter(
+                conversation_id=conversation.pk,
+                user_id__in=sender_ids,
+            ).values_list("user_id", flat=True)
+        )
+        missing = sender_ids - participant_ids
+        if missing:
+            raise ValidationError(
+                {
+                    "sender": [
+                        f"{sender_id} is not a participant in this conversation."
+                        for sender_id in sorted(map(str, missing))
+                    ]
+                }
+            )
+
+        now = timezone.now()
+        messages = [
+            Message(
+                sender_id=item.get("sender", user.pk),
+                conversation_id=conversation.pk,
+                message_body=item["message_body"],
+                sent_at=item.get("sent_at", now),
+            )
+            for item in items
+        ]
+        with transaction.atomic():
+            Message.objects.bulk_create(messages, batch_size=self.bulk_batch_size)
+            messages_bulk_created.send(
+                sender=Message,
+                conversation_id=conversation.pk,
+                messages=messages,
+            )
+
+        return Response(
+            {
+                "created": len(messages),
+                "message_ids": [message.message_id for message in messages],
+            },
+            status=HTTP_201_CREATED,
+        )
+
+    @action(detail=False, methods=["get"], url_path="search")
+    def search(self, request, conversation_pk=None) -> Response:
+        """
+        Ranked full-text search over the messages visible to the user.
+
+        GET /api/messages/search/?q=<terms>
+        GET /api/conversations/{conversation_id}/messages/search/?q=<terms>
+
+        Results are ordered by relevance (then newest first) and
+        paginated with page numbers; the filters of the list endpoint
+        (?user=, ?from_date=, ...) also apply.
+        """
+        query = request.query_params.get("q", "")
+        if not query.strip():
+            return Response(
+                {"detail": "q is required."},
+                status=HTTP_400_BAD_REQUEST,
+            )
+        if not tokenize(query):
+            return Response(
+                {"detail": "q has no searchable terms."},
+                status=HTTP_400_BAD_REQUEST,
+            )
+
+        queryset = self.filter_queryset(self.get_queryset())
+        queryset = get_search_backend(queryset.db).search(queryset, query).order_by(
+            "-search_rank", "-sent_at", "-message_id"
+        )
+
+        paginator = MessagePagination()
+        page = paginator.paginate_queryset(queryset, request, view=self)
+        serializer = self.get_serializer(page, many=True)
+        return paginator.get_paginated_response(serializer.data)
+
+    @action(detail=False, methods=["get"], url_path="wait")
+    def wait(self, request, conversation_pk=None) -> Response:
+        """
+        Long-poll for new messages in a conversation.
+
+        GET /api/conversations/{conversation_id}/messages/wait/?after=<cursor>&timeout=25
+
+        - after:   cursor from a previous wait response or a "next" link;
+                   defaults to "now" (only messages created from now on)
+        - timeout: seconds to hold the request (max 30)
+
+        Returns immediately when messages newer than the cursor exist,
+        otherwise holds the request until one is created in the
+        conversation (send-message, POST /messages/, bulk import) or the
+        timeout expires. The response carries the cursor to wait from next.
+        """
+        if conversation_pk is None:
+            raise NotFound("Use /conversations/{conversation_id}/messages/wait/.")
+        if not is_participant(request, conversation_pk):
+            raise NotFound("Conversation not found.")
+        # Woken up by a commit on the primary; a replica may lag behind.
+        use_primary()
+
+        cursor, timeout = self.wait_params(request)
+        queryset = self.wait_queryset(conversation_pk, cursor)
+        with notifier.listen(conversation_pk) as listener:
+            messages = list(queryset[: self.wait_max_results])
+            if not messages and timeout > 0 and listener.wait(timeout):
+                messages = list(queryset[: self.wait_max_results])
+        return Response(self.wait_data(messages, cursor))
+
+    # Shared with the async wait view (chats.async_views.wait_messages).
+
+    def wait_params(self, request) -> Tuple[Cursor, float]:
+        """
+        (cursor, timeout) of a wait request.
+        """
+        try:
+            after = request.query_params.get("after")
+            cursor = (
+                decode_cursor_token(after)
+                if after
+                else Cursor(timezone.now(), UUID(int=0), False)
+            )
+            timeout = min(
+                float(request.query_params.get("timeout", self.wait_default_timeout)),
+                self.wait_max_timeout,
+            )
+        except ValueError:
+            raise ParseError("Invalid after or timeout parameter.")
+        return cursor, timeout
+
+    def wait_queryset(self, conversation_pk, cursor: Cursor):
+        """
+        Messages of the conversation after the cursor, oldest first.
+        """
+        queryset = (
+            Message.objects.filter(conversation_id=conversation_pk)
+            .filter(MessageCursorPagination.position_filter(cursor, descending=False))
+            .select_related("sender")
+            .order_by("sent_at", "message_id")
+        )
+        return self.project(queryset)
+
+    def wait_data(self, messages, cursor: Cursor) -> dict:
+        """
+        Response body of a wait request: the messages and the cursor to
+        wait from next.
+        """
+        if messages:
+            last = messages[-1]
+            cursor = Cursor(last.sent_at, last.message_id, False)
+
+        results = self.get_serializer(messages, many=True).data
+        return with_included(
+            {"cursor": encode_cursor_token(cursor), "results": results}, results
+        )
+
+    @action(detail=False, methods=["get"], url_path="export")
+    def export(self, request, conversation_pk=None) -> StreamingHttpResponse:
+        """
+        Stream every message of a conversation, oldest first.
+
+        GET /api/conversations/{conversation_id}/messages/export/?output=ndjson
+
+        - output: "ndjson" (default) or "csv"; ?format= is taken by DRF's
+                  renderer negotiation
+        - the filters of the list endpoint (?user=, ?from_date=,
+          ?to_date=, ?search=) also apply
+
+        Rows are read in keyset batches and encoded as they are sent
+        (see chats.export), so memory does not grow with the conversation.
+        """
+        if conversation_pk is None:
+            raise NotFound("Use /conversations/{conversation_id}/messages/export/.")
+        if not is_participant(request, conversation_pk):
+            raise NotFound("Conversation not found.")
+
+        output = request.query_params.get("output", "ndjson")
+        if output not in EXPORT_FORMATS:
+            return Response(
+                {"detail": f"output must be one of: {', '.join(EXPORT_FORMATS)}."},
+                status=HTTP_400_BAD_REQUEST,
+            )
+        content_type, extension, encode = EXPORT_FORMATS[output]
+
+        rows = walk(
+            self.filter_queryset(self.get_queryset()),
+            batch_size=self.export_batch_size,
+            chunk_size=self.export_chunk_size,
+        )
+        response = StreamingHttpResponse(
+            encode(conversation_pk, rows), content_type=content_type
+        )
+        response["Content-Disposition"] = (
+            f'attachment; filename="conversation-{conversation_pk}.{extension}"'
+        )
+        return response
@@ -13,4 +13,3 @@ def main() -> None:
 
 if __name__ == "__main__":
     main()
-
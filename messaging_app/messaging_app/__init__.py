@@ -1,2 +1 @@
 # Empty file required for Python package recognition.
-
@@ -4,4 +4,3 @@ from django.core.asgi import get_asgi_application
 os.environ.setdefault("DJANGO_SETTINGS_MODULE", "messaging_app.settings")
 
 application = get_asgi_application()
-